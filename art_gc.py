@@ -0,0 +1,146 @@
+"""Deduplicate and garbage-collect files in static/art.
+
+Art files are content-addressed, so several Art rows can point at one file.
+This pass first folds byte-identical files (e.g. from before content
+addressing) into one, repointing their Art rows, then deletes files that no
+Art row references. Files younger than --min-age are left alone so a job
+that has rendered but not yet written its Art row is never collected.
+
+WebP derivatives live and die with their image: they are kept while the
+image is referenced, and --derivatives writes any that are missing (e.g.
+for art created before derivatives existed).
+
+    python art_gc.py --dry-run
+    python art_gc.py --min-age 3600
+    python art_gc.py --derivatives
+"""
+import argparse
+import hashlib
+import os
+import time
+from typing import Dict, List, Set
+
+from PIL import Image
+
+from database import SessionLocal, init_db
+from models import Art
+from art_service import ART_DIR, ART_DERIVATIVES, art_derivative_filename, save_art_derivatives
+
+ART_URL_PREFIX = "/static/art/"
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def art_files(art_dir: str) -> List[str]:
+    return sorted(
+        name for name in os.listdir(art_dir)
+        if os.path.isfile(os.path.join(art_dir, name)) and not name.endswith(".tmp")
+    )
+
+def is_derivative(name: str) -> bool:
+    return name.endswith(".webp")
+
+def referenced_files(db) -> Set[str]:
+    """Files some Art row points at, plus their derivatives"""
+    referenced = set()
+    for (url,) in db.query(Art.art_url).filter(Art.art_url.like(ART_URL_PREFIX + "%")):
+        name = url[len(ART_URL_PREFIX):]
+        referenced.add(name)
+        referenced.update(art_derivative_filename(name, derivative) for derivative, _ in ART_DERIVATIVES)
+    return referenced
+
+def dedupe_files(db, art_dir: str, dry_run: bool = False) -> int:
+    """Point Art rows at one copy of each byte-identical file; returns rows repointed"""
+    by_digest: Dict[str, List[str]] = {}
+    # Derivatives follow their image, so only the images themselves are compared
+    for name in (name for name in art_files(art_dir) if not is_derivative(name)):
+        by_digest.setdefault(file_digest(os.path.join(art_dir, name)), []).append(name)
+
+    repointed = 0
+    for names in by_digest.values():
+        if len(names) < 2:
+            continue
+        keep, duplicates = names[0], names[1:]
+        rows = db.query(Art)\
+            .filter(Art.art_url.in_([ART_URL_PREFIX + name for name in duplicates]))\
+            .all()
+        for row in rows:
+            row.art_url = ART_URL_PREFIX + keep
+        repointed += len(rows)
+        print(f"{keep}: {len(duplicates)} identical file(s), {len(rows)} Art row(s) repointed")
+
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+    return repointed
+
+def collect_garbage(db, art_dir: str, min_age: float, dry_run: bool = False) -> int:
+    """Delete files no Art row references; returns how many were (or would be) deleted"""
+    referenced = referenced_files(db)
+    cutoff = time.time() - min_age
+
+    removed = 0
+    freed = 0
+    for name in art_files(art_dir):
+        path = os.path.join(art_dir, name)
+        if name in referenced or os.path.getmtime(path) > cutoff:
+            continue
+        freed += os.path.getsize(path)
+        removed += 1
+        if not dry_run:
+            os.remove(path)
+
+    action = "Would remove" if dry_run else "Removed"
+    print(f"{action} {removed} unreferenced file(s), {freed / 1024:.1f} KiB")
+    return removed
+
+def write_missing_derivatives(db, art_dir: str, dry_run: bool = False) -> int:
+    """Create derivatives for referenced images that lack them; returns images updated"""
+    referenced = referenced_files(db)
+    updated = 0
+    for name in art_files(art_dir):
+        if is_derivative(name) or name not in referenced:
+            continue
+        missing = [
+            derivative for derivative, _ in ART_DERIVATIVES
+            if not os.path.exists(os.path.join(art_dir, art_derivative_filename(name, derivative)))
+        ]
+        if not missing:
+            continue
+        updated += 1
+        if not dry_run:
+            path = os.path.join(art_dir, name)
+            with Image.open(path) as image:
+                save_art_derivatives(image.convert("RGB"), path)
+
+    action = "Would write" if dry_run else "Wrote"
+    print(f"{action} derivatives for {updated} image(s)")
+    return updated
+
+def main():
+    parser = argparse.ArgumentParser(description="Deduplicate and garbage-collect art files")
+    parser.add_argument("--art-dir", default=ART_DIR)
+    parser.add_argument("--min-age", type=float, default=3600, help="seconds; younger files are kept")
+    parser.add_argument("--no-dedupe", action="store_true", help="skip folding identical files")
+    parser.add_argument("--derivatives", action="store_true", help="write missing WebP derivatives")
+    parser.add_argument("--dry-run", action="store_true", help="report without changing anything")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        if not args.no_dedupe:
+            dedupe_files(db, args.art_dir, args.dry_run)
+        collect_garbage(db, args.art_dir, args.min_age, args.dry_run)
+        if args.derivatives:
+            write_missing_derivatives(db, args.art_dir, args.dry_run)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+import asyncio
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Tuple
+
+from database import SessionLocal
+from models import Art
+
+class ArtQueueFull(Exception):
+    """Raised when the art job queue is at capacity"""
+
+# One ArtService per worker process, built by the pool initializer
+_worker_art_service = None
+
+def _init_worker():
+    global _worker_art_service
+    from art_service import ArtService
+    _worker_art_service = ArtService()
+
+def _render(text: str, style: str, entry_id: int) -> str:
+    return _worker_art_service.render_art(text, style, entry_id)
+
+def _render_batch(items: List[Tuple[str, str]]) -> List[str]:
+    return _worker_art_service.render_art_batch(items)
+
+def _renderer_version() -> str:
+    return _worker_art_service.renderer_version
+
+class ArtJobQueue:
+    """Runs art generation as jobs on a pool of worker processes
+
+    Jobs live in memory: submit() returns at once, the job moves through
+    queued -> running -> succeeded/failed, and the Art row is written only
+    when rendering finishes. Rendering never runs on the event loop.
+
+    Art files are content-addressed, so a text and style that were already
+    rendered finish immediately, and identical jobs in flight share one render.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+        job_ttl: Optional[float] = None,
+        on_finished: Optional[Callable[[dict], None]] = None
+    ):
+        # Each worker builds its own ArtService (and Stable Diffusion pipeline
+        # when a GPU is present), so keep this at 1 on GPU hosts
+        self.max_workers = max_workers or int(os.getenv("ART_WORKERS", "2"))
+        self.max_queue_size = max_queue_size or int(os.getenv("ART_QUEUE_SIZE", "32"))
+
+        # Finished jobs are kept this long for status polling
+        self.job_ttl = job_ttl or float(os.getenv("ART_JOB_TTL", "3600"))
+
+        # Called on the event loop with each job that succeeds or fails
+        self.on_finished = on_finished
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        # Job state and in-flight renders are unlocked, so only touch them from the
+        # event loop: async endpoints, and pool callbacks through _on_loop
+        self._jobs: Dict[str, dict] = {}
+        self._order: List[str] = []
+        self._in_flight: Dict[tuple, Future] = {}
+
+        # Reported by the workers once they have started
+        self.renderer_version: Optional[str] = None
+
+        # Stats
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.rejected = 0
+        self.reused = 0
+        self.shared = 0
+
+    def start(self):
+        """Spawn the worker processes in the background so the first job is not slowed by startup"""
+        executor = self._get_executor()
+        for _ in range(self.max_workers):
+            executor.submit(_renderer_version).add_done_callback(self._on_loop(self._set_renderer_version))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def submit(self, user_id: int, entry_id: int, text: str, style: str) -> dict:
+        """Queue a render and return the job; raises ArtQueueFull at capacity"""
+        self._prune()
+        job = self._new_job(user_id, entry_id, style)
+
+        # Already rendered: record the Art row and finish without a worker
+        art_url = self._existing_art_url(text, style)
+        if art_url:
+            self.reused += 1
+            self._track(job)
+            await self._finish(job, art_url)
+            return job
+
+        # The same render is already queued or running: share its result
+        render_key = (text, style)
+        future = self._in_flight.get(render_key)
+        if future is not None:
+            self.shared += 1
+        else:
+            if self.pending() >= self.max_workers + self.max_queue_size:
+                self.rejected += 1
+                raise ArtQueueFull("Art queue is full")
+            future = self._submit_render(text, style, entry_id)
+            self._in_flight[render_key] = future
+            future.add_done_callback(self._on_loop(lambda done: self._forget_render(render_key, done)))
+
+        job["future"] = future
+        self._track(job)
+        asyncio.get_running_loop().create_task(self._complete(job))
+        return job
+
+    async def submit_batch(self, user_id: int, items: List[Tuple[int, str, str]]) -> List[dict]:
+        """Queue one job per (entry_id, text, style); raises ArtQueueFull if the batch does not fit
+
+        Unique renders are split into one chunk per worker so each worker can
+        batch its prompts, and all Art rows are inserted in a single commit.
+        """
+        self._prune()
+        jobs = [self._new_job(user_id, entry_id, style) for entry_id, _, style in items]
+
+        # Group jobs by render so duplicates in the batch (or in flight) render once
+        reused: List[Tuple[dict, str]] = []
+        waiting: Dict[tuple, List[dict]] = {}
+        for job, (_, text, style) in zip(jobs, items):
+            art_url = self._existing_art_url(text, style)
+            if art_url:
+                reused.append((job, art_url))
+            else:
+                waiting.setdefault((text, style), []).append(job)
+
+        to_render = [key for key in waiting if key not in self._in_flight]
+        if to_render and self.pending() + len(to_render) > self.max_workers + self.max_queue_size:
+            self.rejected += len(jobs)
+            raise ArtQueueFull("Art queue is full")
+
+        chunk_size = -(-len(to_render) // self.max_workers) if to_render else 1
+        for start in range(0, len(to_render), chunk_size):
+            chunk = to_render[start:start + chunk_size]
+            chunk_future = self._submit_batch_render(chunk)
+            for index, render_key in enumerate(chunk):
+                self._in_flight[render_key] = self._chunk_item(chunk_future, index, render_key)
+
+        new_renders = set(to_render)
+        for render_key, key_jobs in waiting.items():
+            self.shared += len(key_jobs) - (1 if render_key in new_renders else 0)
+            for job in key_jobs:
+                job["future"] = self._in_flight[render_key]
+
+        for job in jobs:
+            self._track(job)
+
+        # Already rendered: record their Art rows now so those jobs return finished
+        if reused:
+            self.reused += len(reused)
+            await self._finish_batch(reused)
+        if waiting:
+            asyncio.get_running_loop().create_task(
+                self._complete_batch([job for key_jobs in waiting.values() for job in key_jobs])
+            )
+        return jobs
+
+    def _chunk_item(self, chunk_future: Future, index: int, render_key: tuple) -> Future:
+        """Future for one render of a batch chunk, so single jobs can share it"""
+        future: Future = Future()
+
+        def resolve(done: Future):
+            if done.cancelled():
+                future.cancel()
+            elif done.exception() is not None:
+                future.set_exception(done.exception())
+            else:
+                future.set_result(done.result()[index])
+
+        # Reported as running while its chunk is
+        future.running = chunk_future.running
+        chunk_future.add_done_callback(resolve)
+        future.add_done_callback(self._on_loop(lambda done: self._forget_render(render_key, done)))
+        return future
+
+    def _on_loop(self, callback: Callable[[Future], None]) -> Callable[[Future], None]:
+        """Wrap a done callback so it runs on the event loop, not the pool's management thread"""
+        loop = asyncio.get_running_loop()
+
+        def call_on_loop(future: Future):
+            try:
+                loop.call_soon_threadsafe(callback, future)
+            except RuntimeError:
+                # The loop closed at shutdown while the pool was finishing; nothing awaits the result
+                pass
+        return call_on_loop
+
+    def _forget_render(self, render_key: tuple, future: Future):
+        # Only if no newer render for the same key has replaced it
+        if self._in_flight.get(render_key) is future:
+            del self._in_flight[render_key]
+
+    def _new_job(self, user_id: int, entry_id: int, style: str) -> dict:
+        return {
+            "job_id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "entry_id": entry_id,
+            "style": style,
+            "status": "queued",
+            "art_id": None,
+            "art_url": None,
+            "error": None,
+            "created_at": time.time(),
+            "finished_at": None,
+            "art_created_at": None,
+            "future": None
+        }
+
+    def _track(self, job: dict):
+        self._jobs[job["job_id"]] = job
+        self._order.append(job["job_id"])
+        self.submitted += 1
+
+    def _submit_render(self, text: str, style: str, entry_id: int) -> Future:
+        try:
+            return self._get_executor().submit(_render, text, style, entry_id)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool
+            self._executor = None
+            return self._get_executor().submit(_render, text, style, entry_id)
+
+    def _submit_batch_render(self, items: List[Tuple[str, str]]) -> Future:
+        try:
+            return self._get_executor().submit(_render_batch, items)
+        except BrokenProcessPool:
+            self._executor = None
+            return self._get_executor().submit(_render_batch, items)
+
+    def _existing_art_url(self, text: str, style: str) -> Optional[str]:
+        if self.renderer_version is None:
+            return None
+        from art_service import ART_DIR, art_content_key, art_filename
+        filename = art_filename(art_content_key(text, style, self.renderer_version))
+        return f"/static/art/{filename}" if os.path.exists(os.path.join(ART_DIR, filename)) else None
+
+    def _set_renderer_version(self, future: Future):
+        if not future.cancelled() and future.exception() is None:
+            self.renderer_version = future.result()
+
+    def get(self, job_id: str, user_id: int) -> Optional[dict]:
+        """The job if it exists and belongs to the user"""
+        job = self._jobs.get(job_id)
+        if job is None or job["user_id"] != user_id:
+            return None
+        self._refresh(job)
+        return job
+
+    def queue_position(self, job: dict) -> Optional[int]:
+        """How many queued jobs are ahead of this one (None once it has started)"""
+        if job["status"] != "queued":
+            return None
+        ahead = 0
+        for job_id in self._order:
+            if job_id == job["job_id"]:
+                break
+            other = self._jobs.get(job_id)
+            if other is not None:
+                self._refresh(other)
+                if other["status"] == "queued":
+                    ahead += 1
+        return ahead
+
+    def pending(self) -> int:
+        return sum(1 for job in self._jobs.values() if job["status"] in ("queued", "running"))
+
+    def stats(self) -> Dict[str, int]:
+        for job in self._jobs.values():
+            self._refresh(job)
+        counts = {"queued": 0, "running": 0}
+        for job in self._jobs.values():
+            if job["status"] in counts:
+                counts[job["status"]] += 1
+        return {
+            "workers": self.max_workers,
+            "max_queue_size": self.max_queue_size,
+            "queued": counts["queued"],
+            "running": counts["running"],
+            "submitted": self.submitted,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "reused": self.reused,
+            "shared": self.shared,
+            "renderer_version": self.renderer_version
+        }
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that holds model threads and DB connections is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        return self._executor
+
+    def _refresh(self, job: dict):
+        if job["status"] == "queued" and job["future"] is not None and job["future"].running():
+            job["status"] = "running"
+
+    async def _complete(self, job: dict):
+        try:
+            art_url = await asyncio.wrap_future(job["future"])
+        except Exception as e:
+            self._fail(job, e)
+            return
+        await self._finish(job, art_url)
+
+    async def _finish(self, job: dict, art_url: str):
+        try:
+            job["art_id"] = await asyncio.to_thread(self._save_art, job, art_url)
+        except Exception as e:
+            self._fail(job, e)
+            return
+        job["art_url"] = art_url
+        job["status"] = "succeeded"
+        job["finished_at"] = time.time()
+        job["future"] = None
+        self.succeeded += 1
+        self._notify(job)
+
+    async def _complete_batch(self, jobs: List[dict]):
+        rendered = []
+        for job in jobs:
+            try:
+                rendered.append((job, await asyncio.wrap_future(job["future"])))
+            except Exception as e:
+                self._fail(job, e)
+        if rendered:
+            await self._finish_batch(rendered)
+
+    async def _finish_batch(self, rendered: List[Tuple[dict, str]]):
+        try:
+            await asyncio.to_thread(self._save_art_batch, rendered)
+        except Exception as e:
+            for job, _ in rendered:
+                self._fail(job, e)
+            return
+        for job, art_url in rendered:
+            job["art_url"] = art_url
+            job["status"] = "succeeded"
+            job["finished_at"] = time.time()
+            job["future"] = None
+            self.succeeded += 1
+            self._notify(job)
+
+    def _notify(self, job: dict):
+        if self.on_finished is not None:
+            try:
+                self.on_finished(job)
+            except Exception as e:
+                print(f"Art job {job['job_id']} notification failed: {e}")
+
+    def _fail(self, job: dict, error: Exception):
+        print(f"Art job {job['job_id']} failed: {error}")
+        job["error"] = "Failed to generate art"
+        job["status"] = "failed"
+        job["finished_at"] = time.time()
+        job["future"] = None
+        self.failed += 1
+        self._notify(job)
+
+    def _save_art(self, job: dict, art_url: str) -> int:
+        db = SessionLocal()
+        try:
+            art = Art(
+                owner_user_id=job["user_id"],
+                source_entry_id=job["entry_id"],
+                art_url=art_url,
+                style=job["style"]
+            )
+            db.add(art)
+            db.commit()
+            job["art_created_at"] = art.created_at
+            return art.id
+        finally:
+            db.close()
+
+    def _save_art_batch(self, rendered: List[Tuple[dict, str]]):
+        db = SessionLocal()
+        try:
+            arts = [
+                Art(
+                    owner_user_id=job["user_id"],
+                    source_entry_id=job["entry_id"],
+                    art_url=art_url,
+                    style=job["style"]
+                )
+                for job, art_url in rendered
+            ]
+            db.add_all(arts)
+            # Read ids before commit expires the rows, which would reload each one
+            db.flush()
+            saved = [(art.id, art.created_at) for art in arts]
+            db.commit()
+            for (job, _), (art_id, created_at) in zip(rendered, saved):
+                job["art_id"] = art_id
+                job["art_created_at"] = created_at
+        finally:
+            db.close()
+
+    def _prune(self):
+        cutoff = time.time() - self.job_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        if expired:
+            self._order = [job_id for job_id in self._order if job_id in self._jobs]
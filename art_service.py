@@ -1,33 +1,96 @@
 import os
 import uuid
+import asyncio
 import hashlib
-from typing import Optional
+import importlib.util
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import requests
-from datetime import datetime
+from cache import LRUCache
+from text_signals import TextSignals, analyze
 
-# Try to import diffusers for local art generation
-try:
-    from diffusers import StableDiffusionPipeline
-    import torch
-    DIFFUSERS_AVAILABLE = True
-except ImportError:
-    DIFFUSERS_AVAILABLE = False
+# Part of every art file's content key; bump when a renderer's output changes
+PLACEHOLDER_RENDERER_VERSION = "placeholder-1"
+STABLE_DIFFUSION_VERSION = "runwayml/stable-diffusion-v1-5:20steps:7.5"
+
+def art_content_key(text: str, style: str, renderer_version: str) -> str:
+    """Hash of everything that determines the rendered image"""
+    content = "\0".join([renderer_version, style, text])
+    return hashlib.sha256(content.encode()).hexdigest()
+
+ART_DIR = "./static/art"
+
+def art_filename(content_key: str) -> str:
+    return f"art_{content_key[:32]}.png"
+
+# WebP derivatives written next to every image: (name, longest side in pixels)
+ART_DERIVATIVES = [("thumb", 128), ("medium", 320)]
+
+def art_derivative_filename(filename: str, name: str) -> str:
+    """art_<hash>.png -> art_<hash>_<name>.webp"""
+    return f"{os.path.splitext(filename)[0]}_{name}.webp"
+
+def art_derivative_urls(art_url: str) -> Dict[str, str]:
+    """Derivative URLs for an art URL, falling back to the full image where one is missing"""
+    urls = {name: art_url for name, _ in ART_DERIVATIVES}
+    if not art_url.startswith("/static/art/"):
+        return urls
+    filename = art_url[len("/static/art/"):]
+    for name, _ in ART_DERIVATIVES:
+        derivative = art_derivative_filename(filename, name)
+        if os.path.exists(os.path.join(ART_DIR, derivative)):
+            urls[name] = f"/static/art/{derivative}"
+    return urls
+
+def save_art_image(image: Image.Image, filepath: str, **options):
+    """Write the derivatives, then the PNG itself, each through a temporary file
+
+    The PNG goes last because its existence is what marks an image as
+    rendered, so a half-written image or missing derivative is never reused.
+    """
+    save_art_derivatives(image, filepath)
+    _write_atomic(image, filepath, format="PNG", **options)
+
+def save_art_derivatives(image: Image.Image, filepath: str):
+    filename = os.path.basename(filepath)
+    art_dir = os.path.dirname(filepath)
+    # Largest first, each resized from the previous one; method 2 keeps the
+    # WebP encode cheap on the render path
+    derivative = image
+    for name, size in sorted(ART_DERIVATIVES, key=lambda item: -item[1]):
+        derivative = derivative.copy()
+        derivative.thumbnail((size, size), Image.Resampling.LANCZOS)
+        _write_atomic(
+            derivative, os.path.join(art_dir, art_derivative_filename(filename, name)),
+            format="WEBP", quality=80, method=2
+        )
+
+def _write_atomic(image: Image.Image, filepath: str, **options):
+    tmp_path = f"{filepath}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        image.save(tmp_path, **options)
+        os.replace(tmp_path, filepath)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+# Check for diffusers without importing it; torch and diffusers are only
+# imported when a GPU pipeline is actually going to be built
+DIFFUSERS_AVAILABLE = (
+    importlib.util.find_spec("diffusers") is not None
+    and importlib.util.find_spec("torch") is not None
+)
 
 class ArtService:
     def __init__(self):
         # Initialize Stable Diffusion pipeline if available
         self.pipeline = None
-        if DIFFUSERS_AVAILABLE and torch.cuda.is_available():
-            try:
-                self.pipeline = StableDiffusionPipeline.from_pretrained(
-                    "runwayml/stable-diffusion-v1-5",
-                    torch_dtype=torch.float16
-                )
-                self.pipeline = self.pipeline.to("cuda")
-                print("Stable Diffusion pipeline initialized successfully")
-            except Exception as e:
-                print(f"Could not initialize Stable Diffusion: {e}")
+        if DIFFUSERS_AVAILABLE and os.getenv("ART_DISABLE_DIFFUSION", "").lower() not in ("1", "true"):
+            self.pipeline = self._load_stable_diffusion()
+        
+        self.renderer_version = STABLE_DIFFUSION_VERSION if self.pipeline else PLACEHOLDER_RENDERER_VERSION
+        self.sd_batch_size = int(os.getenv("ART_SD_BATCH_SIZE", "4"))
         
         # Style prompts for different art styles
         self.style_prompts = {
@@ -42,87 +105,174 @@ class ArtService:
         }
         
         # Ensure art directory exists
-        self.art_dir = "./static/art"
+        self.art_dir = ART_DIR
         os.makedirs(self.art_dir, exist_ok=True)
+        
+        # Rendered gradient backgrounds keyed by (mood color, style color, size)
+        self.background_cache = LRUCache(max_entries=int(os.getenv("ART_BACKGROUND_CACHE_SIZE", "64")))
+        self.font = self._load_font(24)
+
+    def _load_stable_diffusion(self):
+        """Build the Stable Diffusion pipeline when a CUDA device is present"""
+        import torch
+        if not torch.cuda.is_available():
+            return None
+        
+        try:
+            from diffusers import StableDiffusionPipeline
+            pipeline = StableDiffusionPipeline.from_pretrained(
+                "runwayml/stable-diffusion-v1-5",
+                torch_dtype=torch.float16
+            )
+            pipeline = pipeline.to("cuda")
+            print("Stable Diffusion pipeline initialized successfully")
+            return pipeline
+        except Exception as e:
+            print(f"Could not initialize Stable Diffusion: {e}")
+            return None
 
     async def generate_art(self, text: str, style: str = "abstract", entry_id: int = None) -> str:
         """Generate art from text using various methods"""
+        # Rendering and PNG encoding are CPU work, keep them off the event loop
+        return await asyncio.to_thread(self.render_art, text, style, entry_id)
+
+    def render_art(self, text: str, style: str = "abstract", entry_id: int = None) -> str:
+        """Generate art in the calling thread (used by the art worker processes)"""
         try:
-            # Create safe filename
-            filename = self._generate_filename(text, style, entry_id)
-            filepath = os.path.join(self.art_dir, filename)
+            # Scan the text once for everything the renderers need
+            signals = analyze(text)
             
             # Try different art generation methods in order of preference
             if self.pipeline:
                 # Use local Stable Diffusion
-                art_path = await self._generate_with_stable_diffusion(text, style, filepath)
+                filename, filepath = self._art_file(text, style, STABLE_DIFFUSION_VERSION)
+                if os.path.exists(filepath):
+                    return f"/static/art/{filename}"
+                art_path = self._generate_with_stable_diffusion(text, style, filepath, signals)
                 if art_path:
                     return f"/static/art/{filename}"
             
             # Fallback to placeholder art
-            art_path = await self._generate_placeholder_art(text, style, filepath)
-            return f"/static/art/{filename}"
+            return self._placeholder_art_url(text, style, signals)
             
         except Exception as e:
             print(f"Error generating art: {e}")
             # Create a simple error placeholder
-            return await self._create_error_placeholder()
+            return self._create_error_placeholder()
+
+    def render_art_batch(self, items: List[Tuple[str, str]]) -> List[str]:
+        """Generate art for many (text, style) pairs; Stable Diffusion prompts run in real batches"""
+        urls: List[Optional[str]] = [None] * len(items)
+        signals = [analyze(text) for text, _ in items]
+        
+        if self.pipeline:
+            pending = []
+            for i, (text, style) in enumerate(items):
+                filename, filepath = self._art_file(text, style, STABLE_DIFFUSION_VERSION)
+                if os.path.exists(filepath):
+                    urls[i] = f"/static/art/{filename}"
+                else:
+                    pending.append((i, filename, filepath))
+            
+            for start in range(0, len(pending), self.sd_batch_size):
+                chunk = pending[start:start + self.sd_batch_size]
+                rendered = self._generate_with_stable_diffusion_batch(
+                    [items[i] for i, _, _ in chunk],
+                    [filepath for _, _, filepath in chunk],
+                    [signals[i] for i, _, _ in chunk]
+                )
+                for (i, filename, _), ok in zip(chunk, rendered):
+                    if ok:
+                        urls[i] = f"/static/art/{filename}"
+        
+        # Placeholders for everything Stable Diffusion did not produce
+        for i, (text, style) in enumerate(items):
+            if urls[i] is None:
+                try:
+                    urls[i] = self._placeholder_art_url(text, style, signals[i])
+                except Exception as e:
+                    print(f"Error generating art: {e}")
+                    urls[i] = self._create_error_placeholder()
+        return urls
+
+    def _placeholder_art_url(self, text: str, style: str, signals: Optional[TextSignals] = None) -> str:
+        filename, filepath = self._art_file(text, style, PLACEHOLDER_RENDERER_VERSION)
+        if not os.path.exists(filepath):
+            self._generate_placeholder_art(text, style, filepath, signals)
+        return f"/static/art/{filename}"
 
-    async def _generate_with_stable_diffusion(self, text: str, style: str, filepath: str) -> Optional[str]:
+    def _art_file(self, text: str, style: str, renderer_version: str):
+        """Content-addressed filename and path: same text, style and renderer share one file"""
+        filename = art_filename(art_content_key(text, style, renderer_version))
+        return filename, os.path.join(self.art_dir, filename)
+
+    def _generate_with_stable_diffusion(
+        self, text: str, style: str, filepath: str, signals: Optional[TextSignals] = None
+    ) -> Optional[str]:
         """Generate art using Stable Diffusion"""
+        rendered = self._generate_with_stable_diffusion_batch([(text, style)], [filepath], [signals])
+        return filepath if rendered[0] else None
+
+    def _generate_with_stable_diffusion_batch(
+        self, items: List[Tuple[str, str]], filepaths: List[str], signals: List[Optional[TextSignals]]
+    ) -> List[bool]:
+        """Run one pipeline call for several prompts; returns which images were saved"""
         try:
-            # Build prompt
-            prompt = self._build_art_prompt(text, style)
+            # Build prompts
+            prompts = [
+                self._build_art_prompt(text, style, item_signals)
+                for (text, style), item_signals in zip(items, signals)
+            ]
             
-            # Generate image
-            image = self.pipeline(
-                prompt,
+            # Seed each image from its content key so stored images are reproducible
+            import torch
+            generators = [
+                torch.Generator(device="cuda").manual_seed(
+                    int(art_content_key(text, style, STABLE_DIFFUSION_VERSION)[:8], 16)
+                )
+                for text, style in items
+            ]
+            
+            # Generate images
+            images = self.pipeline(
+                prompts,
                 num_inference_steps=20,
                 guidance_scale=7.5,
                 width=512,
-                height=512
-            ).images[0]
+                height=512,
+                generator=generators
+            ).images
             
-            # Save image
-            image.save(filepath)
-            print(f"Generated art with Stable Diffusion: {filepath}")
-            return filepath
+            # Save images
+            for image, filepath in zip(images, filepaths):
+                save_art_image(image, filepath)
+                print(f"Generated art with Stable Diffusion: {filepath}")
+            return [True] * len(items)
             
         except Exception as e:
             print(f"Stable Diffusion generation error: {e}")
-            return None
+            return [False] * len(items)
 
-    async def _generate_placeholder_art(self, text: str, style: str, filepath: str) -> str:
+    def _generate_placeholder_art(
+        self, text: str, style: str, filepath: str, signals: Optional[TextSignals] = None, size: int = 512
+    ) -> str:
         """Generate placeholder art with text overlay"""
         try:
             # Create a colorful gradient background based on text sentiment
-            image = Image.new('RGB', (512, 512), color=self._get_mood_color(text))
+            mood_color = (signals or analyze(text)).mood_color
+            image = self._render_background(mood_color, self._get_secondary_color(style), size)
             draw = ImageDraw.Draw(image)
             
-            # Add gradient effect
-            for y in range(512):
-                gradient_color = self._interpolate_color(
-                    self._get_mood_color(text),
-                    self._get_secondary_color(style),
-                    y / 512
-                )
-                draw.line([(0, y), (512, y)], fill=gradient_color)
-            
             # Add text overlay
             text_excerpt = text[:50] + "..." if len(text) > 50 else text
-            
-            # Try to use a nice font, fallback to default
-            try:
-                font = ImageFont.truetype("arial.ttf", 24)
-            except:
-                font = ImageFont.load_default()
+            font = self.font
             
             # Calculate text position for centering
             bbox = draw.textbbox((0, 0), text_excerpt, font=font)
             text_width = bbox[2] - bbox[0]
             text_height = bbox[3] - bbox[1]
-            x = (512 - text_width) // 2
-            y = (512 - text_height) // 2
+            x = (size - text_width) // 2
+            y = (size - text_height) // 2
             
             # Add text with shadow for better visibility
             draw.text((x+2, y+2), text_excerpt, fill=(0, 0, 0, 128), font=font)
@@ -132,8 +282,8 @@ class ArtService:
             style_text = f"Style: {style.title()}"
             draw.text((20, 20), style_text, fill=(255, 255, 255, 180), font=font)
             
-            # Save image
-            image.save(filepath)
+            # Save image (fast zlib level; a smooth gradient compresses well anyway)
+            save_art_image(image, filepath, compress_level=1)
             print(f"Generated placeholder art: {filepath}")
             return filepath
             
@@ -141,10 +291,32 @@ class ArtService:
             print(f"Placeholder art generation error: {e}")
             raise
 
-    def _build_art_prompt(self, text: str, style: str) -> str:
+    def _render_background(self, mood_color: tuple, style_color: tuple, size: int) -> Image.Image:
+        """Vertical gradient from the mood color to the style color (a fresh copy each call)"""
+        key = (mood_color, style_color, size)
+        background = self.background_cache.get(key)
+        if background is None:
+            # Same per-row truncation as interpolating each row separately
+            factors = np.arange(size, dtype=np.float64)[:, None] / size
+            start = np.array(mood_color, dtype=np.float64)
+            end = np.array(style_color, dtype=np.float64)
+            rows = (start + (end - start) * factors).astype(np.uint8)
+            pixels = np.ascontiguousarray(np.broadcast_to(rows[:, None, :], (size, size, 3)))
+            background = Image.fromarray(pixels, "RGB")
+            self.background_cache.set(key, background)
+        return background.copy()
+
+    def _load_font(self, size: int):
+        """Try to use a nice font, fallback to default"""
+        try:
+            return ImageFont.truetype("arial.ttf", size)
+        except OSError:
+            return ImageFont.load_default()
+
+    def _build_art_prompt(self, text: str, style: str, signals: Optional[TextSignals] = None) -> str:
         """Build an artistic prompt for image generation"""
         # Extract key emotional words and themes from text
-        keywords = self._extract_keywords(text)
+        keywords = signals.art_themes if signals else self._extract_keywords(text)
         
         # Get style prompt
         style_prompt = self.style_prompts.get(style, self.style_prompts["abstract"])
@@ -156,40 +328,12 @@ class ArtService:
 
     def _extract_keywords(self, text: str) -> list:
         """Extract emotional and thematic keywords from text"""
-        # Simple keyword extraction based on common emotional themes
-        emotional_keywords = [
-            "peace", "calm", "serenity", "joy", "happiness", "love", "hope",
-            "growth", "change", "reflection", "nature", "beauty", "connection",
-            "strength", "healing", "discovery", "journey", "light", "color",
-            "harmony", "balance", "freedom", "expression", "creativity"
-        ]
-        
-        text_lower = text.lower()
-        found_keywords = [kw for kw in emotional_keywords if kw in text_lower]
-        
-        # If no emotional keywords found, add some default artistic themes
-        if not found_keywords:
-            found_keywords = ["abstract", "emotion", "expression"]
-        
-        return found_keywords
+        # Falls back to default artistic themes when none are found
+        return analyze(text).art_themes
 
     def _get_mood_color(self, text: str) -> tuple:
         """Get a color based on the mood of the text"""
-        text_lower = text.lower()
-        
-        # Color mappings for different moods/themes
-        if any(word in text_lower for word in ["happy", "joy", "excited", "energetic"]):
-            return (255, 215, 0)  # Gold
-        elif any(word in text_lower for word in ["sad", "blue", "down"]):
-            return (70, 130, 180)  # Steel Blue
-        elif any(word in text_lower for word in ["angry", "frustrated", "mad"]):
-            return (220, 20, 60)  # Crimson
-        elif any(word in text_lower for word in ["calm", "peaceful", "serene"]):
-            return (152, 251, 152)  # Pale Green
-        elif any(word in text_lower for word in ["anxious", "nervous", "worried"]):
-            return (186, 85, 211)  # Medium Orchid
-        else:
-            return (100, 149, 237)  # Cornflower Blue
+        return analyze(text).mood_color
 
     def _get_secondary_color(self, style: str) -> tuple:
         """Get secondary color based on art style"""
@@ -205,31 +349,14 @@ class ArtService:
         }
         return style_colors.get(style, (128, 128, 128))
 
-    def _interpolate_color(self, color1: tuple, color2: tuple, factor: float) -> tuple:
-        """Interpolate between two colors"""
-        r1, g1, b1 = color1
-        r2, g2, b2 = color2
-        
-        r = int(r1 + (r2 - r1) * factor)
-        g = int(g1 + (g2 - g1) * factor)
-        b = int(b1 + (b2 - b1) * factor)
-        
-        return (r, g, b)
-
-    def _generate_filename(self, text: str, style: str, entry_id: int) -> str:
-        """Generate a unique filename for the art piece"""
-        # Create a hash of the text and style for uniqueness
-        content = f"{text}_{style}_{entry_id}_{datetime.now().isoformat()}"
-        hash_object = hashlib.md5(content.encode())
-        hex_dig = hash_object.hexdigest()[:12]
-        
-        return f"art_{entry_id}_{style}_{hex_dig}.png"
-
-    async def _create_error_placeholder(self) -> str:
+    def _create_error_placeholder(self) -> str:
         """Create a simple error placeholder image"""
         try:
-            filename = f"error_placeholder_{uuid.uuid4().hex[:8]}.png"
+            # The error image never changes, so every failure shares one file
+            filename = "error_placeholder_1.png"
             filepath = os.path.join(self.art_dir, filename)
+            if os.path.exists(filepath):
+                return f"/static/art/{filename}"
             
             # Create simple error image
             image = Image.new('RGB', (512, 512), color=(240, 240, 240))
@@ -251,7 +378,7 @@ class ArtService:
             
             draw.multiline_text((x, y), error_text, fill=(128, 128, 128), font=font, align="center")
             
-            image.save(filepath)
+            save_art_image(image, filepath)
             return f"/static/art/{filename}"
             
         except Exception as e:
@@ -261,9 +388,4 @@ class ArtService:
     def safety_check(self, text: str) -> bool:
         """Check if text is appropriate for art generation"""
         # Allow free expression - only block truly harmful content
-        harmful_content = [
-            "child", "minor", "illegal", "terrorist", "bomb", "suicide"
-        ]
-        
-        text_lower = text.lower()
-        return not any(harmful in text_lower for harmful in harmful_content)
+        return not analyze(text).art_harmful
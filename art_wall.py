@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, tuple_
+
+from art_service import art_derivative_urls
+from models import Art
+from pagination import decode_cursor, encode_cursor
+
+def wall_query(after: Optional[Tuple[datetime, int]], limit: int):
+    """Shared art newest first, continuing after a decoded cursor"""
+    statement = select(Art.id, Art.art_url, Art.style, Art.created_at)\
+        .where(Art.shared_anonymized == True)
+    if after is not None:
+        statement = statement.where(tuple_(Art.created_at, Art.id) < after)
+    return statement.order_by(Art.created_at.desc(), Art.id.desc()).limit(limit)
+
+def owned_art_query(art_id: int, user_id: int):
+    return select(Art).where(Art.id == art_id, Art.owner_user_id == user_id)
+
+class WallPage:
+    """A serialized page of the wall with its ETag"""
+
+    def __init__(self, items: List[dict], next_cursor: Optional[str]):
+        self.body = json.dumps(jsonable_encoder(items), separators=(",", ":")).encode()
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+        self.next_cursor = next_cursor
+
+class ArtWallFeed:
+    """Keyset-paginated feed of shared art, newest first
+
+    Pages are ordered by (created_at, id) and continue from an opaque cursor,
+    so deep pages cost the same as the first. The first page is kept in
+    memory and rebuilt only after art is shared or unshared.
+    """
+
+    def __init__(self, page_size: Optional[int] = None, max_page_size: Optional[int] = None):
+        self.page_size = page_size or int(os.getenv("ART_WALL_PAGE_SIZE", "20"))
+        self.max_page_size = max_page_size or int(os.getenv("ART_WALL_MAX_PAGE_SIZE", "50"))
+
+        self._first_page: Optional[WallPage] = None
+        self._version = 0
+        self._lock = threading.Lock()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+
+    def page(self, db, cursor: Optional[str] = None, limit: Optional[int] = None) -> WallPage:
+        """One page of the wall; raises InvalidCursor for a bad cursor"""
+        limit = min(limit or self.page_size, self.max_page_size)
+        if cursor is not None or limit != self.page_size:
+            return self._query(db, decode_cursor(cursor) if cursor else None, limit)
+
+        with self._lock:
+            page, version = self._first_page, self._version
+        if page is not None:
+            self.hits += 1
+            return page
+
+        self.misses += 1
+        page = self._query(db, None, limit)
+        with self._lock:
+            # Skip storing a page that a share or unshare made stale meanwhile
+            if self._version == version:
+                self._first_page = page
+        return page
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._first_page = None
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "first_page_cached": self._first_page is not None}
+
+    def _query(self, db, after: Optional[Tuple[datetime, int]], limit: int) -> WallPage:
+        rows = db.execute(wall_query(after, limit + 1)).all()
+
+        next_cursor = encode_cursor(rows[limit - 1].created_at, rows[limit - 1].id) if len(rows) > limit else None
+        return WallPage([wall_item(row) for row in rows[:limit]], next_cursor)
+
+def wall_item(art) -> dict:
+    derivatives = art_derivative_urls(art.art_url)
+    return {
+        "id": art.id,
+        "art_url": art.art_url,
+        "thumbnail_url": derivatives["thumb"],
+        "medium_url": derivatives["medium"],
+        "style": art.style,
+        "created_at": art.created_at
+    }
@@ -2,11 +2,13 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models import User
-from database import get_db
+from database import AsyncSessionLocal, get_async_db, get_db
 import os
 
 # Configuration
@@ -46,39 +48,78 @@ def verify_token(token: str) -> Optional[dict]:
     except JWTError:
         return None
 
+def user_by_email_query(email: str):
+    return select(User).where(User.email == email)
+
 def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     """Authenticate user by email and password"""
-    user = db.query(User).filter(User.email == email).first()
+    user = db.execute(user_by_email_query(email)).scalars().first()
     if not user or not verify_password(password, user.hashed_password):
         return None
     return user
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user from JWT token"""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def _token_email(token: str) -> str:
+    """Email (subject) from a valid JWT; raises 401 otherwise"""
     try:
-        token = credentials.credentials
         payload = verify_token(token)
         if payload is None:
-            raise credentials_exception
+            raise _credentials_exception()
         
         email: str = payload.get("sub")
         if email is None:
-            raise credentials_exception
+            raise _credentials_exception()
             
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    
+    return email
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get current authenticated user from JWT token"""
+    email = _token_email(credentials.credentials)
+    
+    user = db.execute(user_by_email_query(email)).scalars().first()
+    if user is None:
+        raise _credentials_exception()
+    
+    return user
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Same as get_current_user, for async endpoints (no threadpool hop)"""
+    email = _token_email(credentials.credentials)
+    
+    result = await db.execute(user_by_email_query(email))
+    user = result.scalar_one_or_none()
+    if user is None:
+        raise _credentials_exception()
+    
+    return user
+
+async def get_stream_user_async(token: str = Query(...)) -> User:
+    """For long-lived streams: EventSource cannot send headers, so the token comes as ?token=
+
+    Uses its own short session so no pooled connection is held while the
+    stream stays open.
+    """
+    email = _token_email(token)
     
-    user = db.query(User).filter(User.email == email).first()
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(user_by_email_query(email))
+        user = result.scalar_one_or_none()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
     return user
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""Cold-start benchmark: import time, time to first response and time to ready.
+
+Starts the API the way a fresh worker would and fails (exit code 1) when
+either budget is exceeded, so it can run as a regression check in CI.
+
+    python benchmarks/bench_cold_start.py --import-budget 1.5 --first-response-budget 3
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+def measure_import(runs: int) -> float:
+    """Best-of-N wall time for `import main` in a fresh interpreter"""
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return min(timings)
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_for(url: str, deadline: float) -> float:
+    """Seconds until url answers 200, or inf on timeout"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.02)
+    return float("inf")
+
+def measure_server(timeout: float):
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        first = wait_for(f"{base}/", timeout)
+        first_response = time.perf_counter() - start if first != float("inf") else first
+        ready = wait_for(f"{base}/ready", timeout)
+        time_to_ready = time.perf_counter() - start if ready != float("inf") else ready
+        return first_response, time_to_ready
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--import-budget", type=float, default=1.5, help="seconds")
+    parser.add_argument("--first-response-budget", type=float, default=3.0, help="seconds")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    import_time = measure_import(args.runs)
+    first_response, time_to_ready = measure_server(args.timeout)
+
+    print(f"import main:          {import_time:7.3f}s (budget {args.import_budget}s)")
+    print(f"first response (/):   {first_response:7.3f}s (budget {args.first_response_budget}s)")
+    print(f"ready (/ready == 200): {time_to_ready:6.3f}s")
+
+    failed = []
+    if import_time > args.import_budget:
+        failed.append("import time")
+    if first_response > args.first_response_budget:
+        failed.append("time to first response")
+    if failed:
+        print(f"REGRESSION: {', '.join(failed)} over budget")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
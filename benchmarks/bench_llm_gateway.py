@@ -0,0 +1,67 @@
+"""Concurrent chat completions through LLMGateway against a local fake server.
+
+Fires a burst of requests and reports how many answered, how many hit the
+deadline (and would get the fallback reply), latency percentiles, retries
+and token counts. Start the fake server first:
+
+    python benchmarks/fake_openai_server.py --port 8001 --token-delay-ms 20 --error-rate 0.1
+    python benchmarks/bench_llm_gateway.py --requests 200 --concurrency 8 --timeout 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from llm_gateway import LLMGateway, LLMUnavailable
+
+MESSAGES = [
+    {"role": "system", "content": "You are Mudi, a friendly companion."},
+    {"role": "user", "content": "I had a rough day at school and feel tired."}
+]
+
+async def run(args):
+    gateway = LLMGateway(
+        api_key="test",
+        base_url=args.base_url,
+        max_concurrency=args.concurrency,
+        timeout=args.timeout,
+        max_retries=args.retries
+    )
+    answered = fallbacks = 0
+
+    async def one():
+        nonlocal answered, fallbacks
+        try:
+            await gateway.complete(MESSAGES)
+            answered += 1
+        except LLMUnavailable:
+            fallbacks += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - start
+    await gateway.close()
+
+    stats = gateway.stats()
+    print(f"{args.requests} requests, concurrency cap {args.concurrency}, deadline {args.timeout}s")
+    print(f"answered:       {answered}")
+    print(f"fallbacks:      {fallbacks} ({stats['deadline_exceeded']} deadline, {stats['failures'] - stats['deadline_exceeded']} errors)")
+    print(f"retries:        {stats['retries']}")
+    print(f"latency p50/95: {stats['latency_ms_p50']} / {stats['latency_ms_p95']} ms")
+    print(f"tokens:         {stats['prompt_tokens']} prompt, {stats['completion_tokens']} completion")
+    print(f"wall time:      {elapsed:.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8001/v1")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--retries", type=int, default=2)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
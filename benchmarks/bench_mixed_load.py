@@ -0,0 +1,98 @@
+"""Mixed /journal and /chat load against a running API.
+
+Registers a few users, then runs concurrent clients that each loop over
+POST /journal and POST /chat for a fixed time, while a probe measures how
+long GET / takes under that load (a blocked event loop shows up there).
+Reports requests per second and latency percentiles per endpoint.
+
+    uvicorn main:app --port 8000
+    python benchmarks/bench_mixed_load.py --clients 32 --seconds 20 --chat-ratio 0.5
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from typing import Dict, List
+
+import httpx
+
+MOODS = ["happy", "sad", "anxious", "calm", "excited"]
+MESSAGES = [
+    "I had a rough day at school and feel tired.",
+    "Exams are coming up and I'm worried.",
+    "I went for a walk with a friend and felt better.",
+]
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+async def register(client: httpx.AsyncClient) -> Dict[str, str]:
+    response = await client.post("/auth/register", json={
+        "display_name": "bench",
+        "email": f"bench-{uuid.uuid4().hex[:12]}@example.com",
+        "password": "bench-password"
+    })
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def run(args):
+    latencies: Dict[str, List[float]] = {"POST /journal": [], "POST /chat": [], "GET / (probe)": []}
+    errors: Dict[str, int] = {name: 0 for name in latencies}
+    limits = httpx.Limits(max_connections=args.clients + 1)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60, limits=limits) as client:
+        users = [await register(client) for _ in range(args.users)]
+        stop = time.perf_counter() + args.seconds
+
+        async def timed(name: str, request):
+            start = time.perf_counter()
+            try:
+                response = await request
+                response.raise_for_status()
+                latencies[name].append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                errors[name] += 1
+
+        async def worker(n: int):
+            rng = random.Random(n)
+            headers = users[n % len(users)]
+            while time.perf_counter() < stop:
+                if rng.random() < args.chat_ratio:
+                    await timed("POST /chat", client.post(
+                        "/chat", json={"message": rng.choice(MESSAGES)}, headers=headers
+                    ))
+                else:
+                    await timed("POST /journal", client.post("/journal", json={
+                        "text": f"{rng.choice(MESSAGES)} {uuid.uuid4().hex}",
+                        "mood_tag": rng.choice(MOODS)
+                    }, headers=headers))
+
+        async def probe():
+            while time.perf_counter() < stop:
+                await timed("GET / (probe)", client.get("/"))
+                await asyncio.sleep(0.05)
+
+        await asyncio.gather(probe(), *(worker(n) for n in range(args.clients)))
+
+    print(f"{args.clients} clients, {args.seconds:.0f}s, chat ratio {args.chat_ratio}")
+    print(f"{'':16s}{'req/s':>8s}{'p50 ms':>9s}{'p95 ms':>9s}{'p99 ms':>9s}{'errors':>8s}")
+    for name, values in latencies.items():
+        print(f"{name:16s}{len(values) / args.seconds:8.1f}{percentile(values, 0.5):9.1f}"
+              f"{percentile(values, 0.95):9.1f}{percentile(values, 0.99):9.1f}{errors[name]:8d}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--chat-ratio", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Mood analytics over years of journal entries.
+
+Seeds a temporary database with one user who has written a few entries a
+day for several years, then times GET /analytics/moods' two steps for a
+range of windows: reading the entries as columns (load_entries) and the
+pandas analysis (mood_analytics). For comparison it also times loading the
+same window as full ORM rows, which is what the client-side insights needed
+from /journal.
+
+    python benchmarks/bench_mood_analytics.py --years 5 --per-day 3
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from database import create_db_engine
+from models import Base, JournalEntry, MOOD_TAGS, User
+from mood_analytics import load_entries, mood_analytics
+
+CATEGORIES = ["general", "rant", "wishes", "dreams", "goals"]
+
+def seed(session_factory, years: int, per_day: int) -> datetime:
+    rng = random.Random(0)
+    db = session_factory()
+    db.add(User(id=1, display_name="bench", email="bench@example.com", hashed_password="x"))
+    now = datetime.utcnow()
+    rows = []
+    for day in range(years * 365):
+        for _ in range(rng.randint(0, per_day * 2)):
+            rows.append({
+                "user_id": 1,
+                "text": "Today I thought about school, friends and what comes next. " * 6,
+                "mood_tag": rng.choice(MOOD_TAGS + [None]),
+                "category": rng.choice(CATEGORIES),
+                "created_at": now - timedelta(days=day, minutes=rng.randint(0, 1439)),
+            })
+    db.execute(JournalEntry.__table__.insert(), rows)
+    db.commit()
+    db.close()
+    return now
+
+def best_of(repeat: int, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--per-day", type=int, default=3, help="average entries per day")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_db_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    now = seed(session_factory, args.years, args.per_day)
+
+    print(f"{args.years} years, ~{args.per_day} entries/day")
+    print(f"{'window':>8s}{'entries':>9s}{'ORM rows ms':>13s}{'columns ms':>12s}{'analyse ms':>12s}{'+keywords ms':>14s}")
+    db = session_factory()
+    for days in (30, 365, args.years * 365):
+        end = now.date()
+        start = end - timedelta(days=days - 1)
+        orm_ms, _ = best_of(args.repeat, lambda: db.query(JournalEntry).filter(
+            JournalEntry.user_id == 1,
+            JournalEntry.created_at >= datetime.combine(start, datetime.min.time())
+        ).all())
+        db.expunge_all()
+        load_ms, entries = best_of(args.repeat, lambda: load_entries(db, 1, start, end))
+        analyse_ms, _ = best_of(args.repeat, lambda: mood_analytics(entries, start, end))
+        keywords_ms, _ = best_of(args.repeat, lambda: mood_analytics(load_entries(db, 1, start, end, with_text=True), start, end))
+        print(f"{days:>7d}d{len(entries):9d}{orm_ms:13.1f}{load_ms:12.1f}{analyse_ms:12.1f}{keywords_ms:14.1f}")
+    db.close()
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Placeholder art: per-image render time and /art fallback throughput.
+
+Renders placeholder images with ArtService directly (Stable Diffusion
+disabled) into a temporary directory. Reports the single-image latency with
+a cold and a warm background cache, then images per second when many
+generate_art calls run concurrently on one event loop.
+
+    python benchmarks/bench_placeholder_art.py --images 200 --concurrency 16
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("ART_DISABLE_DIFFUSION", "true")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from art_service import ArtService
+
+STYLES = ["abstract", "realistic", "dreamy", "minimalist", "impressionist", "surreal", "watercolor", "digital"]
+TEXT = (
+    "Today I felt happy and calm after walking by the river with a friend. "
+    "Exams are coming up and I am a little worried, but I think I will be okay. "
+) * 20
+
+async def throughput(service: ArtService, images: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            # Distinct text per image so content-addressed reuse doesn't skip rendering
+            await service.generate_art(f"{TEXT} ({i})", STYLES[i % len(STYLES)], entry_id=i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(images)))
+    return images / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as art_dir, contextlib.redirect_stdout(io.StringIO()):
+        service = ArtService()
+        service.art_dir = art_dir
+        path = os.path.join(art_dir, "bench.png")
+
+        start = time.perf_counter()
+        service._generate_placeholder_art(TEXT, "abstract", path)
+        cold = (time.perf_counter() - start) * 1000
+
+        runs = 50
+        start = time.perf_counter()
+        for _ in range(runs):
+            service._generate_placeholder_art(TEXT, "abstract", path)
+        warm = (time.perf_counter() - start) * 1000 / runs
+
+        rate = asyncio.run(throughput(service, args.images, args.concurrency))
+
+    print(f"render, cold background cache: {cold:7.2f} ms")
+    print(f"render, warm background cache: {warm:7.2f} ms")
+    print(f"generate_art throughput:       {rate:7.1f} images/s ({args.concurrency} concurrent)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Recall vs memory for int8-quantized journal vectors.
+
+Builds the same per-user NumpyVectorStore three ways (float32, int8, and
+int8 with full-precision rescoring) and compares top-k recall against exact
+float32 search, resident vector bytes and query latency.
+
+    python benchmarks/bench_quantization.py --entries 3000 --queries 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from vector_store import NumpyVectorStore
+
+def synthetic_embeddings(count: int, dim: int, topics: int, rng) -> np.ndarray:
+    """Clustered unit vectors, closer to sentence embeddings than uniform noise"""
+    centers = rng.standard_normal((topics, dim)).astype(np.float32)
+    labels = rng.integers(0, topics, size=count)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def build_store(root: str, name: str, vectors: np.ndarray, **options) -> NumpyVectorStore:
+    store = NumpyVectorStore(name, root=root, **options)
+    store.add(
+        ids=[f"entry-{i}" for i in range(len(vectors))],
+        embeddings=vectors,
+        documents=[""] * len(vectors),
+        metadatas=[{"user_id": 1}] * len(vectors)
+    )
+    return store
+
+def resident_bytes(store: NumpyVectorStore) -> int:
+    """Bytes of vector data a query keeps in RAM (mmapped float rows excluded when quantized)"""
+    index = store._load(1)
+    if index["qvectors"] is not None:
+        return index["qvectors"].nbytes + index["scales"].nbytes
+    return index["vectors"].nbytes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=3000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--rescore", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    corpus = synthetic_embeddings(args.entries, args.dim, topics=40, rng=rng)
+    queries = synthetic_embeddings(args.queries, args.dim, topics=40, rng=rng)
+
+    with tempfile.TemporaryDirectory() as root:
+        stores = {
+            "float32": build_store(root, "float32", corpus, quantization="none"),
+            "int8": build_store(root, "int8", corpus, quantization="int8", rescore_candidates=0),
+            f"int8+rescore{args.rescore}": build_store(
+                root, "int8_rescore", corpus, quantization="int8", rescore_candidates=args.rescore
+            ),
+        }
+
+        truth = [
+            {hit["id"] for hit in stores["float32"].query(query, 1, args.k)}
+            for query in queries
+        ]
+        baseline_bytes = resident_bytes(stores["float32"])
+
+        print(f"{args.entries} vectors x {args.dim} dims, {args.queries} queries, recall@{args.k}")
+        print(f"{'variant':>18} {'recall':>8} {'bytes/vec':>10} {'saving':>7} {'ms/query':>9}")
+        for name, store in stores.items():
+            start = time.perf_counter()
+            results = [{hit["id"] for hit in store.query(query, 1, args.k)} for query in queries]
+            elapsed = (time.perf_counter() - start) * 1000 / len(queries)
+
+            recall = np.mean([len(found & expected) / args.k for found, expected in zip(results, truth)])
+            size = resident_bytes(store)
+            print(
+                f"{name:>18} {recall:8.4f} {size / args.entries:10.1f} "
+                f"{baseline_bytes / size:6.2f}x {elapsed:9.3f}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Event-loop lag while /chat retrieval is saturated.
+
+Compares encoding queries inline on the event loop (the old behaviour) with
+the bounded RetrievalExecutor. Uses a CPU-bound stand-in for the embedding
+model unless --real-model is passed.
+
+    python benchmarks/bench_retrieval_lag.py --requests 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from retrieval_executor import RetrievalExecutor
+
+class FakeEncoder:
+    """Burns roughly the same CPU per call as a small transformer forward pass"""
+
+    def __init__(self, dim: int = 384, cost_ms: float = 8.0):
+        self.dim = dim
+        self.cost = cost_ms / 1000
+
+    def encode(self, texts):
+        single = isinstance(texts, str)
+        batch = [texts] if single else texts
+        # Batched calls amortise the fixed cost, like a real forward pass
+        deadline = time.perf_counter() + self.cost * (1 + 0.1 * (len(batch) - 1))
+        while time.perf_counter() < deadline:
+            pass
+        vectors = np.random.rand(len(batch), self.dim).astype(np.float32)
+        return vectors[0] if single else vectors
+
+async def measure_lag(stop: asyncio.Event, interval: float = 0.001):
+    lags = []
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append((loop.time() - start - interval) * 1000)
+    return lags
+
+async def run(mode: str, model, requests: int):
+    executor = RetrievalExecutor(model, max_queue_size=requests)
+
+    async def query(i: int):
+        if mode == "inline":
+            model.encode(f"I feel anxious {i}")
+            await asyncio.sleep(0)
+        else:
+            await executor.encode(f"I feel anxious {i}")
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_lag(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(query(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    lags = await lag_task
+    executor.shutdown()
+
+    stats = executor.stats()
+    print(
+        f"{mode:>8}: {requests / elapsed:8.1f} req/s  "
+        f"loop lag p50={np.percentile(lags, 50):6.2f}ms p99={np.percentile(lags, 99):7.2f}ms "
+        f"max={max(lags):7.2f}ms  avg batch={stats['average_encode_batch_size']}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--real-model", action="store_true")
+    args = parser.parse_args()
+
+    if args.real_model:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer("all-MiniLM-L6-v2")
+    else:
+        model = FakeEncoder()
+
+    for mode in ("inline", "executor"):
+        asyncio.run(run(mode, model, args.requests))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Concurrent journal writes and calendar reads on SQLite, per engine profile.
+
+Seeds a temporary database, then runs writer threads (insert a journal entry
+and commit, like POST /journal) alongside reader threads (the /calendar
+query) for a fixed time, once with SQLite's defaults and once with the
+production PRAGMA profile from database.py. Reports throughput, read latency
+and "database is locked" errors for each.
+
+    python benchmarks/bench_sqlite_profile.py --writers 4 --readers 8 --seconds 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from database import create_db_engine
+from models import Base, JournalEntry, User
+
+MOODS = ["happy", "sad", "anxious", "calm", "excited", None]
+
+def seed(session_factory, users: int, entries_per_user: int):
+    db = session_factory()
+    now = datetime.utcnow()
+    for user_id in range(1, users + 1):
+        db.add(User(id=user_id, display_name=f"user{user_id}", email=f"user{user_id}@example.com", hashed_password="x"))
+        db.add_all([
+            JournalEntry(
+                user_id=user_id,
+                text=f"Entry {i} about my day, school and friends. " * 8,
+                mood_tag=MOODS[i % len(MOODS)],
+                created_at=now - timedelta(hours=i * 7)
+            )
+            for i in range(entries_per_user)
+        ])
+    db.commit()
+    db.close()
+
+def run_profile(profile: str, args) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_db_engine(f"sqlite:///{path}", profile)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    seed(session_factory, args.users, args.entries)
+
+    stop = time.perf_counter() + args.seconds
+    lock = threading.Lock()
+    counts = {"writes": 0, "reads": 0, "locked": 0}
+    read_latencies = []
+
+    def writer(worker: int):
+        i = 0
+        while time.perf_counter() < stop:
+            db = session_factory()
+            try:
+                db.add(JournalEntry(user_id=(worker + i) % args.users + 1, text="A new entry. " * 20, mood_tag="calm"))
+                db.commit()
+                with lock:
+                    counts["writes"] += 1
+            except OperationalError:
+                db.rollback()
+                with lock:
+                    counts["locked"] += 1
+            finally:
+                db.close()
+            i += 1
+
+    def reader(worker: int):
+        i = 0
+        while time.perf_counter() < stop:
+            db = session_factory()
+            start = time.perf_counter()
+            try:
+                db.query(JournalEntry).filter(
+                    JournalEntry.user_id == (worker + i) % args.users + 1,
+                    JournalEntry.created_at >= datetime.utcnow() - timedelta(days=30),
+                    JournalEntry.mood_tag.isnot(None)
+                ).all()
+                with lock:
+                    counts["reads"] += 1
+                    read_latencies.append(time.perf_counter() - start)
+            except OperationalError:
+                with lock:
+                    counts["locked"] += 1
+            finally:
+                db.close()
+            i += 1
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(n,)) for n in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    read_latencies.sort()
+    def percentile(p):
+        return read_latencies[min(len(read_latencies) - 1, int(len(read_latencies) * p))] * 1000 if read_latencies else 0.0
+    return {
+        "writes/s": counts["writes"] / args.seconds,
+        "reads/s": counts["reads"] / args.seconds,
+        "read p50 ms": percentile(0.50),
+        "read p95 ms": percentile(0.95),
+        "locked errors": counts["locked"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--entries", type=int, default=200, help="seeded entries per user")
+    args = parser.parse_args()
+
+    results = {profile: run_profile(profile, args) for profile in ("default", "production")}
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:.0f}s, "
+          f"{args.users} users x {args.entries} entries")
+    print(f"{'':16s}{'default':>12s}{'production':>12s}")
+    for metric in results["default"]:
+        print(f"{metric:16s}{results['default'][metric]:12.1f}{results['production'][metric]:12.1f}")
+
+if __name__ == "__main__":
+    main()
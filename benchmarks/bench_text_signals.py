@@ -0,0 +1,90 @@
+"""Keyword scanning: one pass vs the per-service `any(kw in text)` checks.
+
+The legacy row repeats what the services did before text_signals existed:
+a chat safety check, the fallback reply's crisis and sentiment checks, art
+theme extraction, the mood color lookup and the art safety check, each
+scanning the lowercased text again. The single-pass rows time
+text_signals.analyze with the Aho-Corasick automaton (when pyahocorasick is
+installed) and with the compiled regex fallback.
+
+    python benchmarks/bench_text_signals.py --words 2000 --entries 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import text_signals
+from text_signals import (
+    ART_HARMFUL_CONTENT, ART_THEMES, CONCERNING_PATTERNS, CRISIS_KEYWORDS,
+    MOOD_COLORS, SENTIMENT_KEYWORDS, analyze
+)
+
+FILLER = (
+    "today i went to class and then walked home the long way because the weather "
+    "was nice and i wanted some time to think about everything that happened this week"
+).split()
+
+def legacy_scan(text: str):
+    text_lower = text.lower()
+    concerning = any(pattern in text_lower for pattern in CONCERNING_PATTERNS)
+    crisis = any(keyword in text_lower for keyword in CRISIS_KEYWORDS)
+    sentiment = None
+    for bucket, group in SENTIMENT_KEYWORDS:
+        if any(keyword in text_lower for keyword in group):
+            sentiment = bucket
+            break
+    themes = [theme for theme in ART_THEMES if theme in text_lower]
+    color = None
+    for mood_color, group in MOOD_COLORS:
+        if any(word in text_lower for word in group):
+            color = mood_color
+            break
+    harmful = any(word in text_lower for word in ART_HARMFUL_CONTENT)
+    return concerning, crisis, sentiment, themes, color, harmful
+
+def make_entry(words: int, keyword_rate: float, rng: random.Random) -> str:
+    keywords = ART_THEMES + [keyword for _, group in SENTIMENT_KEYWORDS for keyword in group]
+    return " ".join(
+        rng.choice(keywords) if rng.random() < keyword_rate else rng.choice(FILLER)
+        for _ in range(words)
+    )
+
+def timed(fn, entries, repeat: int) -> float:
+    """Best-of-N milliseconds per entry"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for entry in entries:
+            fn(entry)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000 / len(entries)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=2000, help="words per entry")
+    parser.add_argument("--entries", type=int, default=200)
+    parser.add_argument("--keyword-rate", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    entries = [make_entry(args.words, args.keyword_rate, rng) for _ in range(args.entries)]
+
+    legacy = timed(legacy_scan, entries, args.repeat)
+    print(f"{args.entries} entries x {args.words} words, keyword rate {args.keyword_rate}")
+    print(f"{'legacy multi-pass':>25}: {legacy:8.3f} ms/entry")
+
+    backends = [("regex", False)]
+    if text_signals.AHOCORASICK_AVAILABLE:
+        backends.insert(0, ("aho-corasick", True))
+    for name, use_automaton in backends:
+        text_signals.AHOCORASICK_AVAILABLE = use_automaton
+        single = timed(analyze, entries, args.repeat)
+        print(f"{'single pass, ' + name:>25}: {single:8.3f} ms/entry ({legacy / single:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Local OpenAI-compatible server for exercising the chat paths without an API key.
+
+Implements POST /v1/chat/completions, streaming and non-streaming, with a
+configurable per-token delay. It logs when a client abandons a stream, which
+is how /chat/stream cancellation can be checked by hand:
+
+    python benchmarks/fake_openai_server.py --port 8001 --token-delay-ms 50
+    OPENAI_API_KEY=test OPENAI_BASE_URL=http://127.0.0.1:8001/v1 uvicorn main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Fake OpenAI")
+app.state.token_delay = 0.05
+app.state.error_rate = 0.0
+app.state.stats = {"requests": 0, "errors": 0, "completed_streams": 0, "cancelled_streams": 0}
+
+REPLY = (
+    "That sounds like a lot to carry, and it makes sense that you feel this way. "
+    "Maybe try writing down one small thing you can do tomorrow to make it lighter."
+)
+
+def _completion_id() -> str:
+    return f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    app.state.stats["requests"] += 1
+    if random.random() < app.state.error_rate:
+        app.state.stats["errors"] += 1
+        return JSONResponse({"error": {"message": "overloaded", "type": "server_error"}}, status_code=503)
+    tokens = [word + " " for word in REPLY.split(" ")][:body.get("max_tokens", 200)]
+    completion_id = _completion_id()
+    created = int(time.time())
+    model = body.get("model", "fake")
+
+    if not body.get("stream"):
+        await asyncio.sleep(app.state.token_delay * len(tokens))
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 50, "completion_tokens": len(tokens), "total_tokens": 50 + len(tokens)}
+        }
+
+    async def stream():
+        try:
+            for token in tokens:
+                await asyncio.sleep(app.state.token_delay)
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+            app.state.stats["completed_streams"] += 1
+        except asyncio.CancelledError:
+            app.state.stats["cancelled_streams"] += 1
+            print("client disconnected, generation stopped")
+            raise
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+@app.get("/stats")
+def stats():
+    return app.state.stats
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--token-delay-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    app.state.token_delay = args.token_delay_ms / 1000
+    app.state.error_rate = args.error_rate
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+
+def normalize_text(text: str) -> str:
+    """Normalize a message so trivially different spellings share a cache key"""
+    return " ".join(text.lower().split())
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count, approximate bytes and TTL"""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        sizeof: Optional[Callable[[Any], int]] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self.sizeof = sizeof or (lambda value: 0)
+
+        # key -> (value, size, expires_at)
+        self._items: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+
+            value, _, expires_at = item
+            if expires_at is not None and expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return default
+
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+            self._items[key] = (value, size, expires_at)
+            self.current_bytes += size
+
+            while self._items and (
+                len(self._items) > self.max_entries
+                or (self.max_bytes is not None and self.current_bytes > self.max_bytes)
+            ):
+                oldest = next(iter(self._items))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every key matching the predicate and return how many were dropped"""
+        with self._lock:
+            stale = [key for key in self._items if predicate(key)]
+            for key in stale:
+                self._remove(key)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._items),
+            "max_entries": self.max_entries,
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0
+        }
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._items.pop(key)
+        self.current_bytes -= size
+
+class SemanticCache:
+    """Per-user cache of replies looked up by embedding similarity
+
+    An entry is reused only when its extra key (e.g. retrieved-context
+    fingerprint and mode) matches exactly and its query embedding is within
+    the cosine similarity threshold of the new query.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        max_entries_per_user: int = 64,
+        max_users: int = 1024,
+        ttl_seconds: Optional[float] = None
+    ):
+        self.threshold = threshold
+        self.max_entries_per_user = max_entries_per_user
+        self.max_users = max_users
+        self.ttl = ttl_seconds
+
+        # user_id -> list of [unit embedding, key, value, expires_at], most recent last
+        self._users: "OrderedDict[Hashable, List[list]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, user_id: Hashable, embedding, key: Hashable, default: Any = None) -> Any:
+        query = _unit(embedding)
+        now = time.monotonic()
+        with self._lock:
+            entries = self._users.get(user_id)
+            if entries:
+                entries[:] = [entry for entry in entries if entry[3] is None or entry[3] >= now]
+
+            candidates = [entry for entry in entries or [] if entry[1] == key]
+            if candidates:
+                scores = np.stack([entry[0] for entry in candidates]) @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    entry = candidates[best]
+                    entries[:] = [other for other in entries if other is not entry] + [entry]
+                    self._users.move_to_end(user_id)
+                    self.hits += 1
+                    return entry[2]
+
+            self.misses += 1
+            return default
+
+    def set(self, user_id: Hashable, embedding, key: Hashable, value: Any):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            entries = self._users.setdefault(user_id, [])
+            self._users.move_to_end(user_id)
+            entries.append([_unit(embedding), key, value, expires_at])
+
+            if len(entries) > self.max_entries_per_user:
+                del entries[0]
+                self.evictions += 1
+            while len(self._users) > self.max_users:
+                _, dropped = self._users.popitem(last=False)
+                self.evictions += len(dropped)
+
+    def invalidate_user(self, user_id: Hashable) -> int:
+        """Drop every entry for the user and return how many were dropped"""
+        with self._lock:
+            dropped = self._users.pop(user_id, [])
+            self.invalidations += len(dropped)
+            return len(dropped)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "users": len(self._users),
+            "entries": sum(len(entries) for entries in self._users.values()),
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0
+        }
+
+def _unit(embedding) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
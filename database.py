@@ -1,25 +1,92 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from models import Base
+from typing import Dict
+import asyncio
+import contextlib
 import os
 
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/mudi.db")
 
-# Create database engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+# "production" applies the PRAGMAs below on every SQLite connection and sizes
+# the pool; "default" leaves SQLite's and SQLAlchemy's own settings
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def sqlite_pragmas(profile: str = SQLITE_PROFILE) -> Dict[str, str]:
+    if profile == "default":
+        return {}
+    return {
+        # Readers no longer block the writer and vice versa
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        # Safe with WAL: a power loss can drop the last commits but never corrupts
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+        # Negative values are KiB: 64 MiB of page cache per connection
+        "cache_size": os.getenv("SQLITE_CACHE_SIZE", str(-64 * 1024)),
+        # Wait for the write lock instead of failing with "database is locked"
+        "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+        "temp_store": "MEMORY",
+    }
+
+def async_database_url(url: str = DATABASE_URL) -> str:
+    """The same database through an asyncio driver (aiosqlite, asyncpg)"""
+    for sync_prefix, async_prefix in (("sqlite://", "sqlite+aiosqlite://"), ("postgresql://", "postgresql+asyncpg://")):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+def _engine_options(url: str, profile: str) -> dict:
+    options = {}
+    if profile != "default" and ":memory:" not in url and not url.rstrip("/").endswith(":"):
+        # Request threads, the embedding pipeline and art job saves share the
+        # pool; with WAL they read concurrently and only writers queue
+        options.update(
+            pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        )
+    return options
+
+def _apply_sqlite_pragmas(db_engine, profile: str):
+    pragmas = sqlite_pragmas(profile)
+    if pragmas:
+        @event.listens_for(db_engine, "connect")
+        def apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+def create_db_engine(url: str = DATABASE_URL, profile: str = SQLITE_PROFILE):
+    """Engine with the connection PRAGMAs and pool sizing for the given profile"""
+    is_sqlite = url.startswith("sqlite")
+    options = _engine_options(url, profile)
+    if is_sqlite:
+        options["connect_args"] = {"check_same_thread": False}
+    db_engine = create_engine(url, **options)
+    if is_sqlite:
+        _apply_sqlite_pragmas(db_engine, profile)
+    return db_engine
+
+def create_async_db_engine(url: str = DATABASE_URL, profile: str = SQLITE_PROFILE) -> AsyncEngine:
+    """Async engine for the same database, with the same profile"""
+    db_engine = create_async_engine(async_database_url(url), **_engine_options(url, profile))
+    if url.startswith("sqlite"):
+        _apply_sqlite_pragmas(db_engine.sync_engine, profile)
+    return db_engine
 
-# Create tables
-def create_tables():
-    Base.metadata.create_all(bind=engine)
+# Create database engines: sync for threadpool endpoints and background
+# workers, async for the async endpoints so they never block the event loop
+engine = create_db_engine()
+async_engine = create_async_db_engine()
 
-# Database dependency for FastAPI
+# Create session factories
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Database dependencies for FastAPI
 def get_db():
     db = SessionLocal()
     try:
@@ -27,10 +94,25 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# SQLite takes one writer at a time. Async writers queue here in FIFO order
+# instead of in SQLite's busy handler, where waiters poll and can starve
+# while the current writer waits for its turn on the event loop
+_async_write_lock = asyncio.Lock() if DATABASE_URL.startswith("sqlite") else None
+
+def async_write_lock():
+    """Hold around an async session's writes, from the first flush to commit"""
+    return _async_write_lock or contextlib.nullcontext()
+
 # Initialize database
 def init_db():
     """Initialize database with tables and sample data if needed"""
-    create_tables()
+    # Creates missing tables and applies pending schema migrations
+    from migrations import migrate
+    migrate()
     print("Database initialized successfully!")
 
 if __name__ == "__main__":
@@ -0,0 +1,212 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import EmbeddingMetadata, JournalEntry, VectorOutbox
+
+def queue_vector_sync(db: Session, entry: JournalEntry, operation: str):
+    """Record a vector change in the caller's transaction; commits with the journal write
+
+    Only calls db.add, so an AsyncSession works here as well.
+    """
+    db.add(VectorOutbox(entry_id=entry.id, user_id=entry.user_id, operation=operation))
+
+def embedding_metadata_query(entry_ids: List[int], collection: Optional[str] = None):
+    """Metadata rows for these entries, in one collection or in every collection"""
+    statement = select(EmbeddingMetadata).where(EmbeddingMetadata.entry_id.in_(entry_ids))
+    if collection is not None:
+        statement = statement.where(EmbeddingMetadata.collection == collection)
+    return statement
+
+class EmbeddingPipeline:
+    """Background worker that drains the vector outbox in micro-batches
+
+    rag_service is a services.LazyService; the worker waits for the model
+    to finish loading before taking its first batch.
+    """
+
+    def __init__(
+        self,
+        rag_service,
+        max_batch_size: Optional[int] = None,
+        max_delay_ms: Optional[int] = None,
+        poll_interval: Optional[float] = None
+    ):
+        self.rag_service = rag_service
+
+        # A batch is flushed when it is full or when its oldest change has waited max_delay
+        self.max_batch_size = max_batch_size or int(os.getenv("EMBED_BATCH_SIZE", "32"))
+        self.max_delay = (max_delay_ms or int(os.getenv("EMBED_BATCH_DELAY_MS", "50"))) / 1000
+
+        # Also picks up rows left by a crash or written by another worker process
+        self.poll_interval = poll_interval or float(os.getenv("EMBED_POLL_INTERVAL", "5"))
+
+        # A row that keeps failing is retried with exponential backoff, then dead-lettered
+        self.max_attempts = int(os.getenv("EMBED_MAX_ATTEMPTS", "8"))
+        self.retry_base = float(os.getenv("EMBED_RETRY_BASE_SECONDS", "5"))
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._notified = 0
+
+        # Stats
+        self.batches_processed = 0
+        self.changes_processed = 0
+        self.batches_failed = 0
+        self.changes_failed = 0
+        self.last_batch_size = 0
+        self.largest_batch_size = 0
+
+    def start(self):
+        """Start the background worker on the running event loop"""
+        if self._worker is None:
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+            self._wake.set()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Drain the outbox and stop the worker"""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        while await asyncio.to_thread(self._process_batch) == self.max_batch_size:
+            pass
+
+    def notify(self):
+        """Wake the worker after a committed journal write; safe from any thread"""
+        self._notified += 1
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def stats(self) -> Dict[str, float]:
+        """Outbox depth and batch-size statistics"""
+        db = SessionLocal()
+        try:
+            queue_depth = db.query(VectorOutbox).filter(VectorOutbox.dead_at.is_(None)).count()
+            dead_letters = db.query(VectorOutbox).filter(VectorOutbox.dead_at.isnot(None)).count()
+        finally:
+            db.close()
+
+        return {
+            "queue_depth": queue_depth,
+            "dead_letters": dead_letters,
+            "batches_processed": self.batches_processed,
+            "batches_failed": self.batches_failed,
+            "changes_failed": self.changes_failed,
+            "changes_processed": self.changes_processed,
+            "last_batch_size": self.last_batch_size,
+            "largest_batch_size": self.largest_batch_size,
+            "average_batch_size": (
+                round(self.changes_processed / self.batches_processed, 2)
+                if self.batches_processed else 0
+            )
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            # Give a burst of writes until the deadline to fill the batch
+            deadline = loop.time() + self.max_delay
+            while self._notified < self.max_batch_size and loop.time() < deadline:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                self._wake.clear()
+            self._notified = 0
+
+            # Blocking model and DB work stays off the event loop
+            while await asyncio.to_thread(self._process_batch) == self.max_batch_size:
+                pass
+
+    def _process_batch(self) -> int:
+        """Apply the oldest due outbox rows and delete them; returns how many were taken"""
+        # Follow a collection switched by reindex.py even when no journal writes arrive
+        if self.rag_service.ready:
+            self.rag_service.instance.check_active_collection()
+
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            rows = db.query(VectorOutbox)\
+                .filter(
+                    VectorOutbox.dead_at.is_(None),
+                    or_(VectorOutbox.next_attempt_at.is_(None), VectorOutbox.next_attempt_at <= now)
+                )\
+                .order_by(VectorOutbox.id)\
+                .limit(self.max_batch_size)\
+                .all()
+            if not rows:
+                return 0
+
+            # A model that fails to load is not the rows' fault; they stay queued untouched
+            rag = self.rag_service.get()
+
+            try:
+                self._sync(rag, rows, db)
+            except Exception as e:
+                db.rollback()
+                self.batches_failed += 1
+                print(f"Error syncing vector outbox batch, retrying rows one at a time: {e}")
+
+                # Isolate the failing rows so they cannot hold up the rest.
+                # sync_entries reads the entries' current state, so applying
+                # them individually gives the same result as the batch.
+                for row in rows:
+                    try:
+                        self._sync(rag, [row], db)
+                    except Exception as e:
+                        db.rollback()
+                        self._record_failure(row, e, db)
+
+            self.last_batch_size = len(rows)
+            self.largest_batch_size = max(self.largest_batch_size, len(rows))
+            return len(rows)
+
+        except Exception as e:
+            print(f"Error syncing vector outbox: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def _sync(self, rag, rows: List[VectorOutbox], db: Session):
+        changes = [(row.operation, row.entry_id, row.user_id) for row in rows]
+        for row in rows:
+            db.delete(row)
+
+        # Outbox rows are removed in the same commit as the metadata writes
+        rag.sync_entries(changes, db)
+
+        self.batches_processed += 1
+        self.changes_processed += len(rows)
+
+    def _record_failure(self, row: VectorOutbox, error: Exception, db: Session):
+        """Back the row off exponentially, or dead-letter it after max_attempts"""
+        self.changes_failed += 1
+        now = datetime.utcnow()
+        row.attempts = (row.attempts or 0) + 1
+        row.last_error = str(error)[:500]
+        if row.attempts >= self.max_attempts:
+            row.dead_at = now
+            print(f"Vector outbox row {row.id} ({row.operation} entry {row.entry_id}) dead-lettered after {row.attempts} attempts: {error}")
+        else:
+            row.next_attempt_at = now + timedelta(seconds=self.retry_base * 2 ** (row.attempts - 1))
+        db.commit()
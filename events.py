@@ -0,0 +1,104 @@
+import asyncio
+import contextlib
+import os
+import time
+from typing import Dict, Optional, Set
+
+class Broker:
+    """Delivers messages published on a channel to that channel's subscribers
+
+    The in-process broker below only reaches clients connected to the same
+    worker. A multi-worker deployment swaps in a broker backed by a shared
+    service (Redis pub/sub, Postgres LISTEN/NOTIFY) with the same two methods.
+    """
+
+    def publish(self, channel: str, message: dict):
+        """Called on the event loop; must not block"""
+        raise NotImplementedError
+
+    def subscribe(self, channel: str):
+        """Async context manager yielding an object whose get() awaits the next message"""
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+class InProcessBroker(Broker):
+    """Fans messages out to one bounded asyncio.Queue per subscriber"""
+
+    def __init__(self, queue_size: Optional[int] = None):
+        self.queue_size = queue_size or int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+        # Stats
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def publish(self, channel: str, message: dict):
+        self.published += 1
+        for queue in self._subscribers.get(channel, ()):
+            # A client that stopped reading loses its oldest messages, not the newest
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(message)
+            self.delivered += 1
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, channel: str):
+        queue = asyncio.Queue(self.queue_size)
+        self._subscribers.setdefault(channel, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(channel)
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[channel]
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self._subscribers),
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+class EventBus:
+    """Per-user events (journal changes, finished art jobs) for connected clients
+
+    publish() may be called from the event loop or from a threadpool
+    endpoint; either way delivery happens on the loop captured by start().
+    """
+
+    def __init__(self, broker: Optional[Broker] = None):
+        self.broker = broker or InProcessBroker()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+
+    @staticmethod
+    def channel(user_id: int) -> str:
+        return f"user:{user_id}"
+
+    def publish(self, user_id: int, event: str, data: dict):
+        if self._loop is None or self._loop.is_closed():
+            return
+        message = {"event": event, "data": data, "time": time.time()}
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self.broker.publish(self.channel(user_id), message)
+        else:
+            self._loop.call_soon_threadsafe(self.broker.publish, self.channel(user_id), message)
+
+    def subscribe(self, user_id: int):
+        return self.broker.subscribe(self.channel(user_id))
+
+    def stats(self) -> dict:
+        return self.broker.stats()
@@ -0,0 +1,45 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select, tuple_
+
+from models import JournalEntry
+
+def journal_filters(user_id: int, category: Optional[str] = None, mood: Optional[str] = None) -> list:
+    filters = [JournalEntry.user_id == user_id]
+    if category:
+        filters.append(JournalEntry.category == category)
+    if mood:
+        filters.append(JournalEntry.mood_tag == mood)
+    return filters
+
+def journal_count_query(filters: list):
+    return select(func.count(JournalEntry.id)).where(*filters)
+
+def journal_page_query(
+    filters: list,
+    after: Optional[Tuple[datetime, int]] = None,
+    limit: Optional[int] = None,
+    excerpt_chars: Optional[int] = None
+):
+    """Newest first, continuing after a decoded cursor; excerpt_chars selects only the start of the text"""
+    if after is not None:
+        filters = filters + [tuple_(JournalEntry.created_at, JournalEntry.id) < after]
+    # Only the columns the response needs; summaries never read the full text
+    if excerpt_chars:
+        body = func.substr(JournalEntry.text, 1, excerpt_chars).label("excerpt")
+    else:
+        body = JournalEntry.text
+    statement = select(
+        JournalEntry.id,
+        body,
+        JournalEntry.mood_tag,
+        JournalEntry.category,
+        JournalEntry.shared_anonymized,
+        JournalEntry.created_at,
+        JournalEntry.updated_at
+    ).where(*filters).order_by(JournalEntry.created_at.desc(), JournalEntry.id.desc())
+    return statement.limit(limit) if limit else statement
+
+def owned_entry_query(entry_id: int, user_id: int):
+    return select(JournalEntry).where(JournalEntry.id == entry_id, JournalEntry.user_id == user_id)
@@ -0,0 +1,266 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, List, Optional
+
+class LLMUnavailable(Exception):
+    """The model could not answer within the deadline; callers should fall back"""
+
+class LLMGateway:
+    """Long-lived chat completion client with pooling, concurrency caps, deadlines and retries
+
+    One AsyncOpenAI client (and its HTTP connection pool) is shared by every
+    request. At most max_concurrency calls are in flight; a call that cannot
+    finish, including time spent waiting for a slot, within its deadline
+    raises LLMUnavailable so the caller can answer with the rule-based reply.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        model: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None
+    ):
+        import httpx
+        from openai import AsyncOpenAI
+
+        self.model = model or os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        self.timeout = timeout or float(os.getenv("LLM_TIMEOUT", "8"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LLM_MAX_RETRIES", "2"))
+        self.backoff_base = backoff_base or float(os.getenv("LLM_BACKOFF_BASE", "0.25"))
+
+        # Retries and timeouts are handled here, so the SDK's own are disabled
+        self.client = AsyncOpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            base_url=base_url or os.getenv("OPENAI_BASE_URL"),
+            max_retries=0,
+            timeout=self.timeout,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                ),
+                timeout=self.timeout
+            )
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        # Stats
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.deadline_exceeded = 0
+        self.retries = 0
+        self.cancelled = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._latencies = deque(maxlen=1000)
+        self._recent_calls = deque(maxlen=20)
+
+    async def complete(self, messages: List[Dict[str, str]], max_tokens: int = 200, temperature: float = 0.7) -> str:
+        """Return the full completion text"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        start = time.perf_counter()
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with asyncio.timeout_at(deadline):
+                    await self._acquire()
+                    try:
+                        response = await self.client.chat.completions.create(
+                            model=self.model,
+                            messages=messages,
+                            max_tokens=max_tokens,
+                            temperature=temperature
+                        )
+                    finally:
+                        self._release()
+            except TimeoutError:
+                self._record_failure(start, deadline_exceeded=True)
+                raise LLMUnavailable("LLM deadline exceeded")
+            except Exception as e:
+                if not await self._should_retry(e, attempt, deadline):
+                    self._record_failure(start)
+                    raise LLMUnavailable(str(e)) from e
+                continue
+
+            usage = response.usage
+            self._record_success(
+                start,
+                usage.prompt_tokens if usage else 0,
+                usage.completion_tokens if usage else 0
+            )
+            return response.choices[0].message.content.strip()
+
+    async def stream(self, messages: List[Dict[str, str]], max_tokens: int = 200, temperature: float = 0.7) -> AsyncIterator[str]:
+        """Yield completion text as it arrives
+
+        The deadline covers getting the first token; retries only happen
+        before anything has been yielded. Closing the generator closes the
+        upstream stream and frees the concurrency slot.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        start = time.perf_counter()
+
+        # The slot is held for the whole stream, not just the first token
+        try:
+            async with asyncio.timeout_at(deadline):
+                await self._acquire()
+        except TimeoutError:
+            self._record_failure(start, deadline_exceeded=True)
+            raise LLMUnavailable("LLM deadline exceeded")
+
+        try:
+            for attempt in range(self.max_retries + 1):
+                upstream = None
+                try:
+                    async with asyncio.timeout_at(deadline):
+                        upstream = await self.client.chat.completions.create(
+                            model=self.model,
+                            messages=messages,
+                            max_tokens=max_tokens,
+                            temperature=temperature,
+                            stream=True,
+                            extra_body={"stream_options": {"include_usage": True}}
+                        )
+                        iterator = upstream.__aiter__()
+                        first = await iterator.__anext__()
+                    break
+                except StopAsyncIteration:
+                    await upstream.close()
+                    self._record_success(start, 0, 0)
+                    return
+                except TimeoutError:
+                    if upstream is not None:
+                        await upstream.close()
+                    self._record_failure(start, deadline_exceeded=True)
+                    raise LLMUnavailable("LLM deadline exceeded")
+                except Exception as e:
+                    if upstream is not None:
+                        await upstream.close()
+                    if not await self._should_retry(e, attempt, deadline):
+                        self._record_failure(start)
+                        raise LLMUnavailable(str(e)) from e
+
+            prompt_tokens = completion_tokens = 0
+            try:
+                chunk = first
+                while True:
+                    if chunk.usage:
+                        prompt_tokens = chunk.usage.prompt_tokens
+                        completion_tokens = chunk.usage.completion_tokens
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if not chunk.usage:
+                            # Servers that don't send usage: count chunks instead
+                            completion_tokens += 1
+                        yield chunk.choices[0].delta.content
+                    try:
+                        chunk = await iterator.__anext__()
+                    except StopAsyncIteration:
+                        break
+                self._record_success(start, prompt_tokens, completion_tokens)
+            except (GeneratorExit, asyncio.CancelledError):
+                # The reader went away; not an upstream failure
+                self.cancelled += 1
+                self._record_success(start, prompt_tokens, completion_tokens)
+                raise
+            except BaseException:
+                self._record_failure(start)
+                raise
+            finally:
+                # Stops the upstream generation when the client goes away
+                await upstream.close()
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, object]:
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 1)
+
+        return {
+            "model": self.model,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "failures": self.failures,
+            "deadline_exceeded": self.deadline_exceeded,
+            "retries": self.retries,
+            "cancelled_streams": self.cancelled,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_ms_p50": percentile(0.5),
+            "latency_ms_p95": percentile(0.95),
+            "recent_calls": list(self._recent_calls)
+        }
+
+    async def close(self):
+        await self.client.close()
+
+    async def _acquire(self):
+        await self._semaphore.acquire()
+        self.in_flight += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    async def _should_retry(self, error: Exception, attempt: int, deadline: float) -> bool:
+        """Sleep with jittered exponential backoff if the error is transient and time remains"""
+        import openai
+
+        retryable = isinstance(error, (
+            openai.APIConnectionError,
+            openai.APITimeoutError,
+            openai.RateLimitError,
+            openai.InternalServerError
+        ))
+        if not retryable or attempt >= self.max_retries:
+            return False
+
+        delay = random.uniform(0, self.backoff_base * (2 ** attempt))
+        if asyncio.get_running_loop().time() + delay >= deadline:
+            return False
+
+        self.retries += 1
+        print(f"LLM call failed ({error.__class__.__name__}), retrying in {delay:.2f}s")
+        await asyncio.sleep(delay)
+        return True
+
+    def _record_success(self, start: float, prompt_tokens: int, completion_tokens: int):
+        latency_ms = (time.perf_counter() - start) * 1000
+        self.calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self._latencies.append(latency_ms)
+        self._recent_calls.append({
+            "latency_ms": round(latency_ms, 1),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "ok": True
+        })
+
+    def _record_failure(self, start: float, deadline_exceeded: bool = False):
+        latency_ms = (time.perf_counter() - start) * 1000
+        self.calls += 1
+        self.failures += 1
+        if deadline_exceeded:
+            self.deadline_exceeded += 1
+        self._recent_calls.append({
+            "latency_ms": round(latency_ms, 1),
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "ok": False
+        })
@@ -1,17 +1,32 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from typing import List, Dict
+from datetime import date, datetime
+from typing import List, Dict, Literal, Optional, Union
+from contextlib import aclosing
+import asyncio
+import json
 import os
 
-from database import get_db, init_db
+from database import async_engine, async_write_lock, get_async_db, get_db, init_db
 from models import *
-from auth import get_current_user, authenticate_user, create_access_token, get_password_hash
-from rag_service import RAGService
-from playlist_service import PlaylistService
-from art_service import ArtService
+from auth import get_current_user, get_current_user_async, get_stream_user_async, authenticate_user, create_access_token, get_password_hash
+from embedding_pipeline import EmbeddingPipeline, queue_vector_sync
+from events import EventBus
+from art_jobs import ArtJobQueue, ArtQueueFull
+from art_service import art_derivative_urls
+from art_wall import ArtWallFeed, owned_art_query, wall_item
+from journal_queries import journal_count_query, journal_filters, journal_page_query, owned_entry_query
+from mood_analytics import analytics_range, load_entries, mood_analytics
+from mood_rollups import build_calendar, calendar_etag, calendar_query, calendar_since, day_key, refresh_daily_mood, refresh_daily_mood_async
+from pagination import InvalidCursor, decode_cursor, encode_cursor
+from rag_service import fallback_events
+from services import LazyService, warm_up
+from vector_store import remove_collection_ack
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -27,28 +42,136 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count"],
 )
 
+class ArtStaticFiles(StaticFiles):
+    """Art files are never rewritten once named (names carry the content hash), so clients may keep them"""
+
+    def file_response(self, *args, **kwargs):
+        # StaticFiles already sends an ETag and answers If-None-Match with 304
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
 # Serve static files (for generated art)
 if not os.path.exists("./static/art"):
     os.makedirs("./static/art", exist_ok=True)
+app.mount("/static/art", ArtStaticFiles(directory="static/art"), name="art")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Initialize services
-rag_service = RAGService()
-playlist_service = PlaylistService()
-art_service = ArtService()
+# Services are built lazily so importing this module stays cheap; the heavy
+# model imports happen inside the factories, during the background warmup
+def _build_rag_service():
+    from rag_service import RAGService
+    return RAGService()
+
+def _build_playlist_service():
+    from playlist_service import PlaylistService
+    return PlaylistService()
+
+rag_service = LazyService("rag", _build_rag_service)
+playlist_service = LazyService("playlist", _build_playlist_service)
+embedding_pipeline = EmbeddingPipeline(rag_service)
+event_bus = EventBus()
+
+def on_art_job_finished(job: dict):
+    """Push the finished job to the owner's connected clients"""
+    event_bus.publish(job["user_id"], "art", _art_job_response(job).model_dump(mode="json"))
+
+art_jobs = ArtJobQueue(on_finished=on_art_job_finished)
+art_wall = ArtWallFeed()
+ART_BATCH_MAX_ITEMS = int(os.getenv("ART_BATCH_MAX_ITEMS", "32"))
+JOURNAL_MAX_PAGE_SIZE = int(os.getenv("JOURNAL_MAX_PAGE_SIZE", "100"))
+JOURNAL_EXCERPT_CHARS = int(os.getenv("JOURNAL_EXCERPT_CHARS", "200"))
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))
 
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    event_bus.start()
+    embedding_pipeline.start()
+    art_jobs.start()
+    app.state.warmup_task = asyncio.create_task(
+        warm_up([rag_service, playlist_service])
+    )
 
-# Health check
+@app.on_event("shutdown")
+async def shutdown_event():
+    await embedding_pipeline.stop()
+    art_jobs.shutdown()
+    await async_engine.dispose()
+    if rag_service.ready:
+        remove_collection_ack()
+        rag_service.instance.retrieval_executor.shutdown()
+        if rag_service.instance.llm_gateway:
+            await rag_service.instance.llm_gateway.close()
+
+def on_journal_changed(user_id: int):
+    """Drop per-user derived state after a journal write"""
+    if rag_service.ready:
+        rag_service.instance.invalidate_user(user_id)
+
+def journal_event(action: str, entry: JournalEntry) -> dict:
+    """Payload of the "journal" event; build it before a delete is committed"""
+    return {
+        "action": action,
+        "entry_id": entry.id,
+        "mood_tag": entry.mood_tag,
+        "category": entry.category,
+        "day": day_key(entry.created_at),
+    }
+
+# Health check (liveness)
 @app.get("/")
 def health_check():
     return {"status": "healthy", "service": "Mudi API"}
 
+# Readiness: 503 until the models have been loaded
+@app.get("/ready")
+def readiness_check():
+    services = {
+        service.name: service.status()
+        for service in (rag_service, playlist_service)
+    }
+    ready = all(service["ready"] for service in services.values())
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"ready": ready, "services": services}
+    )
+
+@app.get("/ingest/stats")
+def get_ingest_stats():
+    """Embedding queue depth and batch-size statistics"""
+    return embedding_pipeline.stats()
+
+@app.get("/retrieval/stats")
+def get_retrieval_stats():
+    """Retrieval pool, batching and cache statistics"""
+    # Reading stats must not load the model; before warmup finishes report its status
+    if not rag_service.ready:
+        return rag_service.status()
+    return rag_service.instance.retrieval_stats()
+
+@app.get("/art/stats")
+async def get_art_stats():
+    """Art worker pool, job queue and wall cache statistics"""
+    # async: the job table is only read and written on the event loop
+    return {**art_jobs.stats(), "wall": art_wall.stats()}
+
+@app.get("/events/stats")
+def get_event_stats():
+    """Event bus subscribers and delivery statistics"""
+    return event_bus.stats()
+
+@app.get("/llm/stats")
+def get_llm_stats():
+    """LLM call latency, token usage, retries, deadline misses and response cache hit rate"""
+    if not rag_service.ready:
+        return rag_service.status()
+    return rag_service.instance.llm_stats()
+
 # Authentication endpoints
 @app.post("/auth/register")
 def register(user_data: UserCreate, db: Session = Depends(get_db)):
@@ -117,24 +240,68 @@ def update_user_settings(
     return {"message": "Settings updated successfully", "settings": current_user.settings}
 
 # Journal endpoints
-@app.get("/journal", response_model=List[JournalEntryResponse])
+# Without limit or cursor every matching entry is returned, as before
+@app.get("/journal", response_model=List[Union[JournalEntryResponse, JournalEntrySummary]])
 def get_journal_entries(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=JOURNAL_MAX_PAGE_SIZE),
+    fields: Literal["full", "summary"] = "full",
+    category: Optional[str] = None,
+    mood: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all journal entries for the current user"""
-    entries = db.query(JournalEntry)\
-        .filter(JournalEntry.user_id == current_user.id)\
-        .order_by(JournalEntry.created_at.desc())\
-        .all()
+    """Get the current user's journal entries, newest first
+
+    Pages continue from the X-Next-Cursor header; X-Total-Count counts every
+    entry matching the filters. fields=summary returns an excerpt instead of
+    the full text.
+    """
+    filters = journal_filters(current_user.id, category, mood)
+    
+    total = db.execute(journal_count_query(filters)).scalar()
+    response.headers["X-Total-Count"] = str(total)
     
-    return [JournalEntryResponse.model_validate(entry) for entry in entries]
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except InvalidCursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    
+    rows = db.execute(journal_page_query(
+        filters,
+        after,
+        limit=limit + 1 if limit else None,
+        excerpt_chars=JOURNAL_EXCERPT_CHARS + 1 if fields == "summary" else None
+    )).all()
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    
+    if fields == "summary":
+        return [
+            JournalEntrySummary(
+                **{**row._asdict(), "excerpt": _excerpt(row.excerpt)}
+            )
+            for row in rows
+        ]
+    return [JournalEntryResponse.model_validate(row._asdict()) for row in rows]
+
+def _excerpt(text: str) -> str:
+    if len(text) <= JOURNAL_EXCERPT_CHARS:
+        return text
+    return text[:JOURNAL_EXCERPT_CHARS].rstrip() + "…"
 
 @app.post("/journal", response_model=JournalEntryResponse)
 async def create_journal_entry(
     entry_data: JournalEntryCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new journal entry"""
     # Create journal entry
@@ -145,15 +312,17 @@ async def create_journal_entry(
         category=entry_data.category or "general"
     )
     
-    db.add(new_entry)
-    db.commit()
-    db.refresh(new_entry)
-    
-    # Add to RAG vector database asynchronously
-    try:
-        await rag_service.add_entry_to_vector_db(new_entry, db)
-    except Exception as e:
-        print(f"Error adding entry to vector DB: {e}")
+    async with async_write_lock():
+        db.add(new_entry)
+        await db.flush()
+        if new_entry.mood_tag:
+            await refresh_daily_mood_async(db, current_user, day_key(new_entry.created_at))
+        
+        # Embedding happens in the background; the outbox row commits with the entry
+        queue_vector_sync(db, new_entry, "upsert")
+        await db.commit()
+    embedding_pipeline.notify()
+    event_bus.publish(current_user.id, "journal", journal_event("created", new_entry))
     
     return JournalEntryResponse.model_validate(new_entry)
 
@@ -165,9 +334,7 @@ def update_journal_entry(
     db: Session = Depends(get_db)
 ):
     """Update a journal entry"""
-    entry = db.query(JournalEntry)\
-        .filter(JournalEntry.id == entry_id, JournalEntry.user_id == current_user.id)\
-        .first()
+    entry = db.execute(owned_entry_query(entry_id, current_user.id)).scalars().first()
     
     if not entry:
         raise HTTPException(
@@ -175,6 +342,14 @@ def update_journal_entry(
             detail="Journal entry not found"
         )
     
+    # Only text and mood changes need the vector store updated
+    needs_vector_sync = (
+        (entry_data.text is not None and entry_data.text != entry.text)
+        or (entry_data.mood_tag is not None and entry_data.mood_tag != entry.mood_tag)
+    )
+    
+    mood_changed = entry_data.mood_tag is not None and entry_data.mood_tag != entry.mood_tag
+    
     # Update fields
     if entry_data.text is not None:
         entry.text = entry_data.text
@@ -186,9 +361,19 @@ def update_journal_entry(
         entry.shared_anonymized = entry_data.shared_anonymized
     
     entry.updated_at = datetime.utcnow()
+    if mood_changed:
+        db.flush()
+        refresh_daily_mood(db, current_user, day_key(entry.created_at))
+    if needs_vector_sync:
+        queue_vector_sync(db, entry, "upsert")
     db.commit()
     db.refresh(entry)
     
+    if needs_vector_sync:
+        on_journal_changed(current_user.id)
+        embedding_pipeline.notify()
+    event_bus.publish(current_user.id, "journal", journal_event("updated", entry))
+    
     return JournalEntryResponse.model_validate(entry)
 
 @app.delete("/journal/{entry_id}")
@@ -198,9 +383,7 @@ def delete_journal_entry(
     db: Session = Depends(get_db)
 ):
     """Delete a journal entry"""
-    entry = db.query(JournalEntry)\
-        .filter(JournalEntry.id == entry_id, JournalEntry.user_id == current_user.id)\
-        .first()
+    entry = db.execute(owned_entry_query(entry_id, current_user.id)).scalars().first()
     
     if not entry:
         raise HTTPException(
@@ -208,9 +391,16 @@ def delete_journal_entry(
             detail="Journal entry not found"
         )
     
-    # TODO: Remove from vector DB as well
+    event = journal_event("deleted", entry)
+    queue_vector_sync(db, entry, "delete")
     db.delete(entry)
+    if entry.mood_tag:
+        db.flush()
+        refresh_daily_mood(db, current_user, day_key(entry.created_at))
     db.commit()
+    on_journal_changed(current_user.id)
+    embedding_pipeline.notify()
+    event_bus.publish(current_user.id, "journal", event)
     
     return {"message": "Journal entry deleted successfully"}
 
@@ -218,17 +408,16 @@ def delete_journal_entry(
 @app.post("/chat", response_model=ChatResponse)
 async def chat_with_companion(
     chat_data: ChatRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async)
 ):
     """Chat with AI companion using RAG"""
     try:
-        response = await rag_service.get_companion_response(
+        rag = await rag_service.aget()
+        response = await rag.get_companion_response(
             user_message=chat_data.message,
             user_id=current_user.id,
             mode=chat_data.mode,
-            honesty_mode=current_user.settings.get("honesty_mode", False),
-            db=db
+            honesty_mode=current_user.settings.get("honesty_mode", False)
         )
         return response
     except Exception as e:
@@ -239,50 +428,135 @@ async def chat_with_companion(
             context_used=[]
         )
 
+@app.post("/chat/stream")
+async def chat_with_companion_stream(
+    chat_data: ChatRequest,
+    current_user: User = Depends(get_current_user_async)
+):
+    """Chat with AI companion, streaming the reply as server-sent events
+
+    Events: `context` (journal snippets used), then `token` for each piece
+    of the reply, then `done`. If the client disconnects Starlette cancels
+    the generator, which also closes the upstream model stream. If the
+    model cannot be loaded the fallback reply is streamed instead, as /chat
+    does.
+    """
+    honesty_mode = current_user.settings.get("honesty_mode", False)
+    
+    async def event_stream():
+        try:
+            rag = await rag_service.aget()
+            events = rag.stream_companion_response(
+                user_message=chat_data.message,
+                user_id=current_user.id,
+                mode=chat_data.mode,
+                honesty_mode=honesty_mode
+            )
+        except Exception as e:
+            print(f"Chat error: {e}")
+            events = fallback_events(chat_data.message, honesty_mode)
+        async with aclosing(events):
+            async for event, data in events:
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Push channel: replaces polling /calendar and art job status
+@app.get("/events")
+async def stream_events(current_user: User = Depends(get_stream_user_async)):
+    """The signed-in user's events as server-sent events
+
+    Authenticate with `?token=`, since EventSource cannot send headers.
+    Events: `ready` once subscribed (and again after every reconnect, so the
+    client refetches anything it missed), `journal` on entry create, update
+    and delete, and `art` when an art job succeeds or fails. A comment line
+    is sent every EVENTS_HEARTBEAT seconds to keep idle connections open.
+    """
+    user_id = current_user.id
+    
+    async def event_stream():
+        async with event_bus.subscribe(user_id) as subscription:
+            yield "retry: 5000\nevent: ready\ndata: {}\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Calendar and insights endpoint
 @app.get("/calendar", response_model=CalendarResponse)
-def get_mood_calendar(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_mood_calendar(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get mood calendar data and insights"""
-    # Get entries from the last 30 days
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    entries = db.query(JournalEntry)\
-        .filter(
-            JournalEntry.user_id == current_user.id,
-            JournalEntry.created_at >= thirty_days_ago,
-            JournalEntry.mood_tag.isnot(None)
-        )\
-        .all()
-    
-    # Build daily moods (most recent entry per day)
-    daily_moods = {}
-    mood_counts = {}
-    
-    for entry in entries:
-        date_str = entry.created_at.strftime("%Y-%m-%d")
-        if date_str not in daily_moods:
-            daily_moods[date_str] = entry.mood_tag
-        
-        # Count mood frequency
-        mood = entry.mood_tag
-        mood_counts[mood] = mood_counts.get(mood, 0) + 1
+    """Get mood calendar data and insights for the last 30 days"""
+    since = calendar_since()
+    
+    # The ETag comes from the user row auth already loaded, so unchanged
+    # polls are answered without touching the journal
+    headers = {"ETag": calendar_etag(current_user, since), "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    # One row per day with the most recent mood and that day's mood counts
+    rows = await db.execute(calendar_query(current_user.id, since))
+    daily_moods, mood_counts = build_calendar(rows)
+    response.headers.update(headers)
     
     return CalendarResponse(
         daily_moods=daily_moods,
         mood_insights=mood_counts
     )
 
+@app.get("/analytics/moods", response_model=MoodAnalyticsResponse)
+def get_mood_analytics(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    keywords: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Mood streaks, transitions and patterns over an inclusive date range (UTC days)
+
+    Defaults to the last ANALYTICS_DEFAULT_DAYS days. Entries are read as
+    columns into a DataFrame and analysed with vectorized pandas operations;
+    `keywords=true` also loads the text to find recurring words per mood.
+    """
+    try:
+        start, end = analytics_range(start, end)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    entries = load_entries(db, current_user.id, start, end, with_text=keywords)
+    return mood_analytics(entries, start, end)
+
 # Playlist endpoint
 @app.post("/playlist", response_model=PlaylistResponse)
 async def generate_playlist(
     playlist_data: PlaylistRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_async)
 ):
     """Generate mood-based playlist"""
     try:
-        playlist = await playlist_service.generate_playlist(
+        playlists = await playlist_service.aget()
+        playlist = await playlists.generate_playlist(
             mood_tag=playlist_data.mood_tag,
             preferences=playlist_data.preferences
         )
@@ -296,18 +570,42 @@ async def generate_playlist(
             justification=f"A curated playlist for when you're feeling {playlist_data.mood_tag}."
         )
 
-# Art generation endpoint
-@app.post("/art", response_model=ArtResponse)
+def _art_job_response(job: dict) -> ArtJobResponse:
+    art = None
+    if job["status"] == "succeeded":
+        derivatives = art_derivative_urls(job["art_url"])
+        art = ArtResponse(
+            id=job["art_id"],
+            art_url=job["art_url"],
+            thumbnail_url=derivatives["thumb"],
+            medium_url=derivatives["medium"],
+            style=job["style"],
+            created_at=job["art_created_at"]
+        )
+    return ArtJobResponse(
+        job_id=job["job_id"],
+        status=job["status"],
+        entry_id=job["entry_id"],
+        style=job["style"],
+        queue_position=art_jobs.queue_position(job),
+        art=art,
+        error=job["error"]
+    )
+
+# Art generation endpoint: queues a job and returns 202 with its id
+@app.post("/art", response_model=ArtJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def generate_art(
     art_data: ArtRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Generate art from journal entry"""
+    """Queue art generation for a journal entry"""
     # Get the journal entry
-    entry = db.query(JournalEntry)\
-        .filter(JournalEntry.id == art_data.entry_id, JournalEntry.user_id == current_user.id)\
-        .first()
+    result = await db.execute(
+        select(JournalEntry.id, JournalEntry.text)
+        .where(JournalEntry.id == art_data.entry_id, JournalEntry.user_id == current_user.id)
+    )
+    entry = result.first()
     
     if not entry:
         raise HTTPException(
@@ -316,53 +614,121 @@ async def generate_art(
         )
     
     try:
-        # Generate art
-        art_url = await art_service.generate_art(
-            text=entry.text,
-            style=art_data.style,
-            entry_id=entry.id
+        # The Art row is written by the job when rendering finishes
+        job = await art_jobs.submit(current_user.id, entry.id, entry.text, art_data.style)
+    except ArtQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Art generation is busy, please try again shortly"
         )
-        
-        # Save art record
-        new_art = Art(
-            owner_user_id=current_user.id,
-            source_entry_id=entry.id,
-            art_url=art_url,
-            style=art_data.style
+    
+    return _art_job_response(job)
+
+# Batch art generation: one ownership query, one job per item, one bulk insert
+@app.post("/art/batch", response_model=ArtBatchResponse, status_code=status.HTTP_202_ACCEPTED)
+async def generate_art_batch(
+    batch: ArtBatchRequest,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Queue art generation for many journal entries at once"""
+    if not batch.items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No items to generate"
         )
-        
-        db.add(new_art)
-        db.commit()
-        db.refresh(new_art)
-        
-        return ArtResponse.model_validate(new_art)
-        
-    except Exception as e:
-        print(f"Art generation error: {e}")
+    if len(batch.items) > ART_BATCH_MAX_ITEMS:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to generate art"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {ART_BATCH_MAX_ITEMS} items per batch"
+        )
+    
+    # Validate ownership of every entry in one query
+    entry_ids = {item.entry_id for item in batch.items}
+    result = await db.execute(
+        select(JournalEntry.id, JournalEntry.text)
+        .where(JournalEntry.id.in_(entry_ids), JournalEntry.user_id == current_user.id)
+    )
+    texts = dict(result.all())
+    missing = sorted(entry_ids - texts.keys())
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Journal entries not found: {missing}"
         )
+    
+    try:
+        jobs = await art_jobs.submit_batch(
+            current_user.id,
+            [(item.entry_id, texts[item.entry_id], item.style) for item in batch.items]
+        )
+    except ArtQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Art generation is busy, please try again shortly"
+        )
+    
+    return ArtBatchResponse(jobs=[_art_job_response(job) for job in jobs])
 
-# Art wall endpoint
+@app.get("/art/jobs/{job_id}", response_model=ArtJobResponse)
+async def get_art_job(job_id: str, current_user: User = Depends(get_current_user_async)):
+    """Status of an art job, with the art once it has finished"""
+    job = art_jobs.get(job_id, current_user.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Art job not found"
+        )
+    
+    return _art_job_response(job)
+
+@app.put("/art/{art_id}/share", response_model=ArtResponse)
+def share_art(
+    art_id: int,
+    share_data: ArtShareRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Share art anonymously on the wall, or take it down"""
+    art = db.execute(owned_art_query(art_id, current_user.id)).scalars().first()
+    
+    if not art:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Art not found"
+        )
+    
+    if art.shared_anonymized != share_data.shared:
+        art.shared_anonymized = share_data.shared
+        db.commit()
+        db.refresh(art)
+        art_wall.invalidate()
+    
+    return ArtResponse(**wall_item(art))
+
+# Art wall endpoint: newest first, continued with the X-Next-Cursor header
 @app.get("/art/wall")
-def get_art_wall(db: Session = Depends(get_db)):
+def get_art_wall(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db)
+):
     """Get anonymized shared art"""
-    art_pieces = db.query(Art)\
-        .filter(Art.shared_anonymized == True)\
-        .order_by(Art.created_at.desc())\
-        .limit(20)\
-        .all()
-    
-    return [
-        {
-            "id": art.id,
-            "art_url": art.art_url,
-            "style": art.style,
-            "created_at": art.created_at
-        }
-        for art in art_pieces
-    ]
+    try:
+        page = art_wall.page(db, cursor, limit)
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    
+    headers = {"ETag": page.etag, "Cache-Control": "no-cache"}
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    if request.headers.get("if-none-match") == page.etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=page.body, media_type="application/json", headers=headers)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,193 @@
+"""Versioned schema migrations.
+
+New tables come from the models via create_all; everything create_all cannot
+do on an existing database (new columns, new indexes, backfills) is a
+numbered migration here. Applied versions are recorded in schema_version, so
+each migration runs once per database. Add new migrations at the end of
+MIGRATIONS with the next version number and never edit an applied one.
+
+    python migrations.py                # apply pending migrations
+    python migrations.py --status
+    python migrations.py --check-plans  # fail if a hot query scans a table
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Connection
+
+from art_wall import owned_art_query, wall_query
+from auth import user_by_email_query
+from database import engine
+from embedding_pipeline import embedding_metadata_query
+from journal_queries import journal_count_query, journal_filters, journal_page_query, owned_entry_query
+from models import Base, DailyMoodRollup, JournalEntry
+from mood_analytics import entries_query
+from mood_rollups import calendar_query, day_key, day_moods_query, summarize_moods
+
+def _add_columns(conn: Connection, table_name: str, column_names: List[str]):
+    """Add nullable columns declared on the model, skipping ones that exist"""
+    table = Base.metadata.tables[table_name]
+    existing = {column["name"] for column in inspect(conn).get_columns(table_name)}
+    for name in column_names:
+        if name not in existing:
+            column_type = table.columns[name].type.compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {name} {column_type}"))
+
+def _create_indexes(conn: Connection, index_names: List[str]):
+    """Create indexes declared on the models, by name, skipping ones that exist"""
+    indexes = {index.name: index for table in Base.metadata.sorted_tables for index in table.indexes}
+    for name in index_names:
+        indexes[name].create(bind=conn, checkfirst=True)
+
+# Frozen with migration 1: columns added to the models before migrations existed.
+# Columns added since then get their own migration.
+_LATE_COLUMNS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("journal_entries", ("category",)),
+    ("embedding_metadata", ("collection", "text_hash")),
+)
+
+def _late_columns(conn: Connection):
+    # Databases created before journal categories, reindex collections and vector sync hashes
+    for table_name, column_names in _LATE_COLUMNS:
+        if inspect(conn).has_table(table_name):
+            _add_columns(conn, table_name, list(column_names))
+
+def _hot_query_indexes(conn: Connection):
+    _create_indexes(conn, [
+        "ix_journal_entries_user_created",
+        "ix_art_wall",
+        "ix_art_owner_created",
+        "ix_embedding_metadata_entry_collection",
+    ])
+
+def _daily_mood_rollups(conn: Connection):
+    _add_columns(conn, "users", ["journal_updated_at"])
+    # Backfill from existing entries; from here on journal writes keep it current
+    conn.execute(DailyMoodRollup.__table__.delete())
+    days: Dict[Tuple[int, str], List[str]] = {}
+    rows = conn.execute(
+        select(JournalEntry.user_id, JournalEntry.created_at, JournalEntry.mood_tag)
+        .where(JournalEntry.mood_tag.isnot(None))
+        .order_by(JournalEntry.created_at, JournalEntry.id)
+    )
+    for user_id, created_at, mood_tag in rows:
+        days.setdefault((user_id, day_key(created_at)), []).append(mood_tag)
+    rollups = []
+    for (user_id, day), moods in days.items():
+        latest_mood, mood_counts = summarize_moods(moods)
+        rollups.append({"user_id": user_id, "day": day, "latest_mood": latest_mood, "mood_counts": mood_counts})
+    if rollups:
+        conn.execute(DailyMoodRollup.__table__.insert(), rollups)
+
+def _outbox_retries(conn: Connection):
+    _add_columns(conn, "vector_outbox", ["attempts", "next_attempt_at", "last_error", "dead_at"])
+
+# (version, description, upgrade)
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "nullable columns declared after their tables were created", _late_columns),
+    (2, "indexes for journal, calendar, art wall and vector sync queries", _hot_query_indexes),
+    (3, "daily mood rollups for the calendar", _daily_mood_rollups),
+    (4, "retry and dead-letter state for the vector outbox", _outbox_retries),
+]
+
+def _ensure_version_table(conn: Connection):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, description VARCHAR(255), applied_at DATETIME)"
+    ))
+
+def applied_versions(conn: Connection) -> Dict[int, str]:
+    _ensure_version_table(conn)
+    rows = conn.execute(text("SELECT version, applied_at FROM schema_version"))
+    return {version: str(applied_at) for version, applied_at in rows}
+
+def migrate(bind=engine) -> List[int]:
+    """Create missing tables, then apply pending migrations in order; returns the versions applied"""
+    Base.metadata.create_all(bind=bind)
+
+    with bind.begin() as conn:
+        done = applied_versions(conn)
+
+    applied = []
+    for version, description, upgrade in MIGRATIONS:
+        if version in done:
+            continue
+        # One transaction per migration, recorded together with its changes
+        with bind.begin() as conn:
+            upgrade(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": version, "d": description, "t": datetime.utcnow()}
+            )
+        print(f"Applied migration {version}: {description}")
+        applied.append(version)
+    return applied
+
+def hot_queries() -> Dict[str, object]:
+    """The statements behind the busiest endpoints, built by the same helpers, with placeholder values"""
+    since = datetime(2024, 1, 1)
+    return {
+        "GET /journal": journal_page_query(journal_filters(1)),
+        "GET /journal?cursor&mood": journal_page_query(journal_filters(1, mood="happy"), (since, 1), limit=21),
+        "GET /journal?fields=summary&category": journal_page_query(
+            journal_filters(1, category="dreams"), limit=21, excerpt_chars=201
+        ),
+        "GET /journal count": journal_count_query(journal_filters(1, category="dreams")),
+        "GET /calendar": calendar_query(1, day_key(since)),
+        "GET /analytics/moods": entries_query(1, since.date(), since.date() + timedelta(days=89), with_text=True),
+        "journal write rollup": day_moods_query(1, day_key(since)),
+        "PUT /journal/{id}": owned_entry_query(1, 1),
+        "GET /art/wall": wall_query(None, 21),
+        "GET /art/wall?cursor": wall_query((since, 1), 21),
+        "PUT /art/{id}/share": owned_art_query(1, 1),
+        "vector sync metadata": embedding_metadata_query([1, 2, 3]),
+        "reindex metadata": embedding_metadata_query([1, 2, 3], "journal_entries"),
+        "login": user_by_email_query("someone@example.com"),
+    }
+
+def query_plan(conn: Connection, statement) -> List[str]:
+    sql = statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+def check_query_plans(bind=engine) -> Dict[str, List[str]]:
+    """Plan steps that scan a whole table or sort in a temp b-tree, per query (empty when all use indexes)"""
+    problems = {}
+    with bind.connect() as conn:
+        for name, statement in hot_queries().items():
+            bad = [
+                step for step in query_plan(conn, statement)
+                if step.startswith("SCAN") or "TEMP B-TREE" in step
+            ]
+            if bad:
+                problems[name] = bad
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply schema migrations")
+    parser.add_argument("--status", action="store_true", help="list applied and pending migrations")
+    parser.add_argument("--check-plans", action="store_true", help="check hot queries use indexes")
+    args = parser.parse_args()
+
+    if args.status:
+        with engine.begin() as conn:
+            done = applied_versions(conn)
+        for version, description, _ in MIGRATIONS:
+            state = f"applied {done[version]}" if version in done else "pending"
+            print(f"{version:4d}  {state:32s}  {description}")
+        return
+
+    migrate()
+
+    if args.check_plans:
+        problems = check_query_plans()
+        for name, steps in problems.items():
+            print(f"{name}: {'; '.join(steps)}")
+        if problems:
+            sys.exit(1)
+        print(f"All {len(hot_queries())} hot queries use indexes")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index, JSON
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -15,6 +15,7 @@ class User(Base):
     hashed_password = Column(String(255), nullable=False)
     settings = Column(JSON, default=lambda: {"honesty_mode": False})
     created_at = Column(DateTime, default=datetime.utcnow)
+    journal_updated_at = Column(DateTime, nullable=True)  # last journal write touching moods, the /calendar ETag
     
     # Relationships
     journal_entries = relationship("JournalEntry", back_populates="user")
@@ -35,6 +36,11 @@ class JournalEntry(Base):
     # Relationships
     user = relationship("User", back_populates="journal_entries")
     art_pieces = relationship("Art", back_populates="source_entry")
+    
+    # Indexes on existing databases are added by migrations.py
+    __table_args__ = (
+        Index("ix_journal_entries_user_created", "user_id", "created_at"),  # /journal, /calendar
+    )
 
 class Art(Base):
     __tablename__ = "art"
@@ -50,6 +56,11 @@ class Art(Base):
     # Relationships
     owner = relationship("User", back_populates="art_pieces")
     source_entry = relationship("JournalEntry", back_populates="art_pieces")
+    
+    __table_args__ = (
+        Index("ix_art_wall", "shared_anonymized", "created_at", "id"),  # /art/wall keyset pages
+        Index("ix_art_owner_created", "owner_user_id", "created_at"),
+    )
 
 class EmbeddingMetadata(Base):
     __tablename__ = "embedding_metadata"
@@ -57,13 +68,41 @@ class EmbeddingMetadata(Base):
     id = Column(Integer, primary_key=True, index=True)
     entry_id = Column(Integer, ForeignKey("journal_entries.id"), nullable=False)
     vector_id = Column(String(255), nullable=False)  # ID in Chroma vector DB
+    collection = Column(String(100), nullable=True)  # vector collection the embedding lives in (NULL = journal_entries)
+    text_hash = Column(String(64), nullable=True)  # sha256 of the embedded text
     mood_tag = Column(String(50), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_embedding_metadata_entry_collection", "entry_id", "collection"),  # vector sync, reindex
+    )
+
+class DailyMoodRollup(Base):
+    __tablename__ = "daily_mood_rollups"
+    
+    # Maintained by mood_rollups.py on every journal write; /calendar reads only this
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(String(10), primary_key=True)  # YYYY-MM-DD (UTC)
+    latest_mood = Column(String(50), nullable=False)
+    mood_counts = Column(JSON, nullable=False)  # {"happy": 2, "tired": 1}
+
+class VectorOutbox(Base):
+    __tablename__ = "vector_outbox"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    entry_id = Column(Integer, nullable=False)  # no FK, the entry may already be deleted
+    user_id = Column(Integer, nullable=False)
+    operation = Column(String(10), nullable=False)  # upsert, delete
+    created_at = Column(DateTime, default=datetime.utcnow)
+    attempts = Column(Integer, nullable=True)  # failed sync attempts so far (NULL = none)
+    next_attempt_at = Column(DateTime, nullable=True)  # retry backoff; NULL = ready now
+    last_error = Column(String(500), nullable=True)
+    dead_at = Column(DateTime, nullable=True)  # dead letter: stopped retrying, kept for inspection
 
 # Pydantic models for API
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
-from datetime import datetime
+from datetime import date, datetime
 
 class UserCreate(BaseModel):
     display_name: str
@@ -107,6 +146,16 @@ class JournalEntryResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class JournalEntrySummary(BaseModel):
+    """GET /journal?fields=summary: an excerpt instead of the full text"""
+    id: int
+    excerpt: str
+    mood_tag: Optional[str]
+    category: Optional[str] = "general"
+    shared_anonymized: bool
+    created_at: datetime
+    updated_at: datetime
+
 class ChatRequest(BaseModel):
     message: str
     mode: str = "supportive"  # supportive, practical, honest
@@ -131,16 +180,82 @@ class ArtRequest(BaseModel):
 class ArtResponse(BaseModel):
     id: int
     art_url: str
+    thumbnail_url: Optional[str] = None  # small WebP for grids
+    medium_url: Optional[str] = None  # medium WebP
     style: str
     created_at: datetime
     
     class Config:
         from_attributes = True
 
+class ArtShareRequest(BaseModel):
+    shared: bool = True
+
+class ArtJobResponse(BaseModel):
+    job_id: str
+    status: str  # queued, running, succeeded, failed
+    entry_id: int
+    style: str
+    queue_position: Optional[int] = None  # queued jobs ahead of this one
+    art: Optional[ArtResponse] = None  # set once the job has succeeded
+    error: Optional[str] = None
+
+class ArtBatchRequest(BaseModel):
+    items: List[ArtRequest]
+
+class ArtBatchResponse(BaseModel):
+    jobs: List[ArtJobResponse]  # in request order
+
 class CalendarResponse(BaseModel):
     daily_moods: Dict[str, str]  # {"2024-01-01": "happy", ...}
     mood_insights: Dict[str, int]  # {"happy": 5, "sad": 2, ...}
 
+class MoodRun(BaseModel):
+    mood: str
+    entries: int
+
+class MoodStreaks(BaseModel):
+    current_days: int  # consecutive days written, ending on the range's last day or the one before
+    longest_days: int
+    longest_start: Optional[date] = None
+    longest_end: Optional[date] = None
+    longest_mood_run: Optional[MoodRun] = None  # same mood on consecutive entries
+
+class MoodTransitions(BaseModel):
+    moods: List[str]
+    counts: List[List[int]]  # counts[i][j]: entries with moods[j] right after moods[i]
+    probabilities: List[List[float]]  # each row normalized
+
+class RollingWeeklyPoint(BaseModel):
+    day: date
+    entries: int
+    average_mood_score: Optional[float] = None
+    weekly_distribution: Dict[str, float]  # mood shares over the 7 days ending on day
+
+class WeekdayPattern(BaseModel):
+    weekday: str
+    entries: int
+    average_mood_score: Optional[float] = None
+    top_mood: Optional[str] = None
+
+class MoodKeywords(BaseModel):
+    negative: List[str]
+    positive: List[str]
+
+class MoodAnalyticsResponse(BaseModel):
+    start: date
+    end: date
+    total_entries: int
+    mood_counts: Dict[str, int]
+    average_mood_score: Optional[float] = None  # 1 (low) to 5 (high)
+    streaks: MoodStreaks
+    transitions: MoodTransitions
+    rolling_weekly: List[RollingWeeklyPoint]
+    category_by_mood: Dict[str, Dict[str, int]]
+    weekdays: List[WeekdayPattern]
+    time_of_day: Dict[str, int]  # UTC: night, morning, afternoon, evening
+    keywords: Optional[MoodKeywords] = None  # only with ?keywords=true
+
 # Mood tags enum for consistency
 MOOD_TAGS = [
     "happy", "sad", "anxious", "excited", "calm", "frustrated", 
@@ -0,0 +1,164 @@
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Tuple
+import os
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import JournalEntry
+
+# Default range when the client gives no start, and the most points the
+# rolling weekly series returns (longer ranges are sampled evenly)
+ANALYTICS_DEFAULT_DAYS = int(os.getenv("ANALYTICS_DEFAULT_DAYS", "90"))
+ANALYTICS_MAX_POINTS = int(os.getenv("ANALYTICS_MAX_POINTS", "366"))
+
+# Same scale the insights panel has always used (1 = low, 5 = high)
+MOOD_SCORES = {
+    "happy": 5, "excited": 5, "grateful": 5, "confident": 5, "peaceful": 4,
+    "hopeful": 4, "content": 4, "energetic": 4, "calm": 3,
+    "tired": 2, "lonely": 2, "sad": 1, "anxious": 1, "frustrated": 1,
+    "angry": 1, "overwhelmed": 1
+}
+NEGATIVE_MOODS = ["sad", "anxious", "frustrated", "angry", "overwhelmed", "lonely"]
+POSITIVE_MOODS = ["happy", "excited", "grateful", "confident", "peaceful", "hopeful", "content"]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+def analytics_range(start: Optional[date], end: Optional[date]) -> Tuple[date, date]:
+    """Inclusive day range, defaulting to the last ANALYTICS_DEFAULT_DAYS days"""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=ANALYTICS_DEFAULT_DAYS - 1)
+    if start > end:
+        raise ValueError("start must not be after end")
+    return start, end
+
+def entries_query(user_id: int, start: date, end: date, with_text: bool = False):
+    columns = [JournalEntry.created_at, JournalEntry.mood_tag, JournalEntry.category]
+    if with_text:
+        columns.append(JournalEntry.text)
+    return select(*columns)\
+        .where(
+            JournalEntry.user_id == user_id,
+            JournalEntry.created_at >= datetime.combine(start, time.min),
+            JournalEntry.created_at < datetime.combine(end + timedelta(days=1), time.min)
+        )\
+        .order_by(JournalEntry.created_at, JournalEntry.id)
+
+def load_entries(db: Session, user_id: int, start: date, end: date, with_text: bool = False) -> pd.DataFrame:
+    """The user's entries in the range as columns, oldest first; text only when asked for"""
+    statement = entries_query(user_id, start, end, with_text)
+    return pd.read_sql(statement, db.connection(), parse_dates=["created_at"])
+
+def _counts(rows, columns) -> pd.DataFrame:
+    """Entries per (row, column) pair, like pd.crosstab without its pivot_table overhead"""
+    pairs = pd.DataFrame({"row": np.asarray(rows), "column": np.asarray(columns)}).value_counts()
+    if pairs.empty:
+        return pd.DataFrame(dtype=int)
+    return pairs.unstack(fill_value=0)
+
+def _streaks(days: pd.Series, moods: pd.Series, end: date) -> dict:
+    # Writing streaks: runs of consecutive days with at least one entry
+    streaks = {"current_days": 0, "longest_days": 0, "longest_start": None, "longest_end": None, "longest_mood_run": None}
+    if not days.empty:
+        run_id = (days.diff() != pd.Timedelta(days=1)).cumsum()
+        runs = days.groupby(run_id).agg(["first", "last", "size"])
+        longest = runs.loc[runs["size"].idxmax()]
+        latest = runs.iloc[-1]
+        streaks.update(
+            longest_days=int(longest["size"]),
+            longest_start=longest["first"].date(),
+            longest_end=longest["last"].date(),
+            # Still current if the user wrote on the last day or the day before
+            current_days=int(latest["size"]) if latest["last"].date() >= end - timedelta(days=1) else 0,
+        )
+    # Longest run of consecutive entries with the same mood
+    if not moods.empty:
+        run_id = (moods != moods.shift()).cumsum()
+        sizes = moods.groupby(run_id).size()
+        longest_run = sizes.idxmax()
+        streaks["longest_mood_run"] = {"mood": moods[run_id == longest_run].iloc[0], "entries": int(sizes.max())}
+    return streaks
+
+def _transitions(moods: pd.Series) -> dict:
+    """How often each mood is followed by each other mood, entry to entry"""
+    if len(moods) < 2:
+        return {"moods": [], "counts": [], "probabilities": []}
+    values = moods.to_numpy()
+    labels = sorted(set(values))
+    counts = _counts(values[:-1], values[1:]).reindex(index=labels, columns=labels, fill_value=0)
+    probabilities = counts.div(counts.sum(axis=1).replace(0, np.nan), axis=0).fillna(0).round(3)
+    return {"moods": labels, "counts": counts.to_numpy().tolist(), "probabilities": probabilities.to_numpy().tolist()}
+
+def _rolling_weekly(df: pd.DataFrame, scores: pd.Series, start: date, end: date) -> List[dict]:
+    """Per day: entries, average mood score, and the mood mix of the trailing 7 days"""
+    calendar = pd.date_range(start, end, freq="D")
+    day = df["created_at"].dt.normalize()
+    entries = day.value_counts().reindex(calendar, fill_value=0).to_numpy()
+    day_scores = scores.groupby(day).mean().reindex(calendar).round(2).to_numpy()
+    daily_moods = _counts(day, df["mood_tag"]).reindex(index=calendar, fill_value=0)
+    window = daily_moods.rolling(7, min_periods=1).sum()
+    shares = window.div(window.sum(axis=1).replace(0, np.nan), axis=0).round(3).to_numpy()
+    moods = list(daily_moods.columns)
+    days = calendar.date
+
+    # Only the output rows leave numpy
+    points = np.unique(np.linspace(0, len(calendar) - 1, min(len(calendar), ANALYTICS_MAX_POINTS)).round().astype(int))
+    return [
+        {
+            "day": days[i],
+            "entries": int(entries[i]),
+            "average_mood_score": None if np.isnan(day_scores[i]) else float(day_scores[i]),
+            "weekly_distribution": {moods[j]: float(shares[i, j]) for j in np.flatnonzero(shares[i] > 0)},
+        }
+        for i in points
+    ]
+
+def _weekdays(df: pd.DataFrame, scores: pd.Series) -> List[dict]:
+    weekday = df["created_at"].dt.dayofweek
+    entries = weekday.value_counts().reindex(range(7), fill_value=0)
+    average = scores.groupby(weekday).mean().reindex(range(7))
+    moods = _counts(weekday, df["mood_tag"]).reindex(index=range(7), fill_value=0)
+    top = moods.idxmax(axis=1).where(moods.sum(axis=1) > 0) if not moods.columns.empty else pd.Series([None] * 7)
+    return [
+        {
+            "weekday": WEEKDAYS[i],
+            "entries": int(entries.iloc[i]),
+            "average_mood_score": None if pd.isna(average.iloc[i]) else round(float(average.iloc[i]), 2),
+            "top_mood": None if pd.isna(top.iloc[i]) else top.iloc[i],
+        }
+        for i in range(7)
+    ]
+
+def _keywords(df: pd.DataFrame, moods: List[str]) -> List[str]:
+    """Top repeated longer words in entries with these moods"""
+    words = df.loc[df["mood_tag"].isin(moods), "text"].str.lower().str.split().explode()
+    counts = words[words.str.len() > 4].value_counts()
+    return counts[counts > 1].head(3).index.tolist()
+
+def mood_analytics(df: pd.DataFrame, start: date, end: date) -> dict:
+    """Streaks, transitions, rolling weekly mix, category and weekday patterns for load_entries output"""
+    df = df.assign(category=df["category"].fillna("general"))
+    moods = df["mood_tag"].dropna().reset_index(drop=True)
+    scores = df["mood_tag"].map(MOOD_SCORES)
+    hour_bins = pd.cut(df["created_at"].dt.hour, bins=[0, 6, 12, 18, 24], right=False, labels=["night", "morning", "afternoon", "evening"])
+
+    result = {
+        "start": start,
+        "end": end,
+        "total_entries": len(df),
+        "mood_counts": {mood: int(count) for mood, count in moods.value_counts().items()},
+        "average_mood_score": None if scores.isna().all() else round(float(scores.mean()), 2),
+        "streaks": _streaks(df["created_at"].dt.normalize().drop_duplicates().reset_index(drop=True), moods, end),
+        "transitions": _transitions(moods),
+        "rolling_weekly": _rolling_weekly(df, scores, start, end),
+        "category_by_mood": {
+            category: {mood: int(count) for mood, count in row.items() if count}
+            for category, row in _counts(df["category"], df["mood_tag"]).iterrows()
+        },
+        "weekdays": _weekdays(df, scores),
+        "time_of_day": {period: int(count) for period, count in hour_bins.value_counts(sort=False).items()},
+    }
+    if "text" in df:
+        result["keywords"] = {"negative": _keywords(df, NEGATIVE_MOODS), "positive": _keywords(df, POSITIVE_MOODS)}
+    return result
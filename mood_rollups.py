@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models import DailyMoodRollup, JournalEntry, User
+
+# Days of history /calendar returns
+CALENDAR_DAYS = 30
+
+def day_key(moment: datetime) -> str:
+    """Calendar day (UTC) an entry belongs to, as used in daily_moods"""
+    return moment.strftime("%Y-%m-%d")
+
+def summarize_moods(moods: List[str]) -> Tuple[str, Dict[str, int]]:
+    """Latest mood and mood counts for one day's moods in entry order"""
+    counts = {}
+    for mood in moods:
+        counts[mood] = counts.get(mood, 0) + 1
+    return moods[-1], counts
+
+def day_moods_query(user_id: int, day: str):
+    start = datetime.strptime(day, "%Y-%m-%d")
+    return select(JournalEntry.mood_tag)\
+        .where(
+            JournalEntry.user_id == user_id,
+            JournalEntry.created_at >= start,
+            JournalEntry.created_at < start + timedelta(days=1),
+            JournalEntry.mood_tag.isnot(None)
+        )\
+        .order_by(JournalEntry.created_at, JournalEntry.id)
+
+def _apply(rollup: Optional[DailyMoodRollup], user_id: int, day: str, moods: List[str]) -> Optional[DailyMoodRollup]:
+    if not moods:
+        return None
+    if rollup is None:
+        rollup = DailyMoodRollup(user_id=user_id, day=day)
+    rollup.latest_mood, rollup.mood_counts = summarize_moods(moods)
+    return rollup
+
+def refresh_daily_mood(db: Session, user: User, day: str):
+    """Rebuild the user's rollup row for one day from that day's entries
+
+    Call after the journal change is flushed and before the commit, so the
+    rollup and the entry commit together. Re-reading one day through the
+    (user_id, created_at) index keeps update and delete exact without
+    tracking the old mood.
+    """
+    moods = db.execute(day_moods_query(user.id, day)).scalars().all()
+    rollup = db.get(DailyMoodRollup, (user.id, day))
+    updated = _apply(rollup, user.id, day, moods)
+    if updated is None and rollup is not None:
+        db.delete(rollup)
+    elif updated is not None and rollup is None:
+        db.add(updated)
+    user.journal_updated_at = datetime.utcnow()
+
+async def refresh_daily_mood_async(db: AsyncSession, user: User, day: str):
+    """Same as refresh_daily_mood, for an async session"""
+    moods = (await db.execute(day_moods_query(user.id, day))).scalars().all()
+    rollup = await db.get(DailyMoodRollup, (user.id, day))
+    updated = _apply(rollup, user.id, day, moods)
+    if updated is None and rollup is not None:
+        await db.delete(rollup)
+    elif updated is not None and rollup is None:
+        db.add(updated)
+    user.journal_updated_at = datetime.utcnow()
+
+def calendar_since(now: Optional[datetime] = None) -> str:
+    return day_key((now or datetime.utcnow()) - timedelta(days=CALENDAR_DAYS))
+
+def calendar_query(user_id: int, since: str):
+    # A range read on the (user_id, day) primary key
+    return select(DailyMoodRollup.day, DailyMoodRollup.latest_mood, DailyMoodRollup.mood_counts)\
+        .where(DailyMoodRollup.user_id == user_id, DailyMoodRollup.day >= since)
+
+def calendar_etag(user: User, since: str) -> str:
+    """Changes with the user's last journal write and when the window moves to a new day"""
+    written = user.journal_updated_at.isoformat() if user.journal_updated_at else "0"
+    return f'"{user.id}-{since}-{written}"'
+
+def build_calendar(rows: Iterable[Tuple[str, str, Dict[str, int]]]) -> Tuple[Dict[str, str], Dict[str, int]]:
+    """daily_moods and mood_insights from rollup rows"""
+    daily_moods = {}
+    mood_counts = {}
+    for day, latest_mood, counts in rows:
+        daily_moods[day] = latest_mood
+        for mood, count in counts.items():
+            mood_counts[mood] = mood_counts.get(mood, 0) + count
+    return daily_moods, mood_counts
@@ -1,31 +1,147 @@
 import os
-import chromadb
-from sentence_transformers import SentenceTransformer
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from models import JournalEntry, EmbeddingMetadata, ChatResponse
+from embedding_pipeline import embedding_metadata_query
+from retrieval_executor import RetrievalExecutor, RetrievalOverloaded
+from cache import LRUCache, SemanticCache, normalize_text
+from llm_gateway import LLMGateway, LLMUnavailable
+from text_signals import analyze
+from vector_store import (
+    ACTIVE_COLLECTION_PATH,
+    DEFAULT_COLLECTION,
+    create_vector_store,
+    read_active_collection,
+    write_collection_ack,
+)
 # import openai  # Will import dynamically when needed
 from datetime import datetime, timedelta
-import uuid
+import asyncio
+import hashlib
+import threading
+import time
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def vector_metadata(entry) -> dict:
+    """Metadata stored next to each vector"""
+    return {
+        "entry_id": entry.id,
+        "user_id": entry.user_id,
+        "mood_tag": entry.mood_tag or "",
+        "created_at": entry.created_at.isoformat()
+    }
+
+def load_embedding_model(model_name: str):
+    # Imported here because torch and sentence-transformers take seconds to import
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+def fallback_response(user_message: str, context_snippets: List[str], honesty_mode: bool) -> str:
+    """Rule-based reply used when the model or OpenAI is unavailable"""
+    # Simple rule-based responses based on keywords and context
+    signals = analyze(user_message)
+    
+    # Check for concerning content
+    if signals.crisis:
+        return "I'm really concerned about what you're sharing. Please reach out to a mental health professional, a trusted friend, or a crisis helpline. You're not alone, and there are people who want to help. In the US, you can contact the National Suicide Prevention Lifeline at 988."
+    
+    # Mood-based responses
+    if signals.sentiment == "positive":
+        if context_snippets:
+            return "It's wonderful to hear you're feeling positive! I noticed in your recent entries that you've been working through some things. What's contributing to this good feeling today?"
+        else:
+            return "That's great to hear! What's been bringing you joy lately? It's important to celebrate these positive moments."
+    
+    elif signals.sentiment == "anxious":
+        response = "I can hear that you're feeling anxious right now, and that's completely valid. "
+        if honesty_mode:
+            response += "Try focusing on what you can control today. What's one small action you can take right now?"
+        else:
+            response += "Take a deep breath with me. What usually helps you feel more grounded?"
+        return response
+    
+    elif signals.sentiment == "negative":
+        response = "I'm sorry you're going through a difficult time. Your feelings are completely valid. "
+        if context_snippets:
+            response += "Looking at your recent entries, it seems like you've been processing a lot. What feels most heavy right now?"
+        else:
+            response += "Would you like to share what's been weighing on your mind?"
+        return response
+    
+    # Default supportive response
+    if context_snippets:
+        return "Thank you for sharing with me. I can see from your recent entries that you've been reflecting on important things. What's on your mind today?"
+    else:
+        return "I'm here to listen and support you. What would you like to talk about today? Sometimes it helps to just put your thoughts into words."
+
+async def stream_text(text: str) -> AsyncIterator[str]:
+    """Stream a ready-made response word by word"""
+    words = text.split(" ")
+    for i, word in enumerate(words):
+        yield word if i == len(words) - 1 else word + " "
+        await asyncio.sleep(0)
+
+async def fallback_events(user_message: str, honesty_mode: bool) -> AsyncIterator[Tuple[str, object]]:
+    """The stream_companion_response events for a service that could not be built"""
+    yield "context", []
+    async for token in stream_text(fallback_response(user_message, [], honesty_mode)):
+        yield "token", token
+    yield "done", None
 
 class RAGService:
     def __init__(self):
-        # Initialize embedding model
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Initialize embedding model and vector store for the active collection
+        active = read_active_collection()
+        self.model_name = active["model"]
+        self.embedding_model = load_embedding_model(self.model_name)
+        
+        # Vector store is Chroma or the exact per-user NumPy index
+        self.vector_store = create_vector_store(active["collection"])
+        self._active_collection_mtime = _mtime(ACTIVE_COLLECTION_PATH)
+        self._active_collection_checked = time.monotonic()
+        self._switching_collection = False
+        write_collection_ack(active["collection"])
+        
+        # Query encoding and search run on a bounded pool, never on the event loop
+        self.retrieval_executor = RetrievalExecutor(self.embedding_model)
         
-        # Initialize Chroma DB
-        self.chroma_client = chromadb.PersistentClient(path="./data/chroma_db")
+        # Query embeddings keyed by (model, normalized text), shared by all users
+        self.query_embedding_cache = LRUCache(
+            max_entries=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "4096")),
+            max_bytes=int(os.getenv("QUERY_EMBEDDING_CACHE_BYTES", str(8 * 1024 * 1024))),
+            ttl_seconds=float(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "86400")),
+            sizeof=lambda embedding: embedding.nbytes
+        )
+        
+        # Top-k context snippets keyed by (user, normalized text, k), dropped when the journal changes
+        self.context_cache = LRUCache(
+            max_entries=int(os.getenv("CONTEXT_CACHE_SIZE", "4096")),
+            max_bytes=int(os.getenv("CONTEXT_CACHE_BYTES", str(16 * 1024 * 1024))),
+            ttl_seconds=float(os.getenv("CONTEXT_CACHE_TTL", "600")),
+            sizeof=lambda snippets: sum(len(snippet) for snippet in snippets)
+        )
+        self._journal_versions: Dict[int, int] = {}
         
-        # Get or create collection
-        self.collection = self.chroma_client.get_or_create_collection(
-            name="journal_entries",
-            metadata={"hnsw:space": "cosine"}
+        # LLM replies reused for near-paraphrases with the same context, dropped when the journal changes
+        self.response_cache = SemanticCache(
+            threshold=float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.92")),
+            max_entries_per_user=int(os.getenv("RESPONSE_CACHE_SIZE", "64")),
+            max_users=int(os.getenv("RESPONSE_CACHE_MAX_USERS", "1024")),
+            ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
         )
         
-        # Initialize OpenAI client (optional)
-        self.openai_client = None
+        # Shared OpenAI client with pooling, concurrency cap and deadlines (optional)
+        self.llm_gateway = None
         if os.getenv("OPENAI_API_KEY"):
-            self.openai_client = True  # Just flag that we have an API key
+            self.llm_gateway = LLMGateway()
         
         # System prompt template
         self.system_prompt = """You are Mudi, a friendly adolescent companion designed to support mental health and emotional well-being. 
@@ -45,77 +161,230 @@ Recent Journal Context:
 
 Remember: You are a supportive companion, not a therapist. Your role is to listen, validate, and offer gentle guidance based on the user's own reflections."""
 
-    async def add_entry_to_vector_db(self, entry: JournalEntry, db: Session):
-        """Add a journal entry to the vector database"""
+    def sync_entries(self, changes: List[Tuple[str, int, int]], db: Session):
+        """Apply (operation, entry_id, user_id) changes to the vector store in one batch
+
+        Upserts re-embed only entries whose text changed; deletes remove the
+        vectors recorded in EmbeddingMetadata from every collection, including
+        one reindex.py is still building. Everything commits together.
+        """
+        if not changes:
+            return
+        self.check_active_collection()
+        vector_store = self.vector_store
+        
+        # Only the latest change per entry matters
+        latest: Dict[int, Tuple[str, int]] = {}
+        for operation, entry_id, user_id in changes:
+            latest[entry_id] = (operation, user_id)
+        
         try:
-            # Generate embedding
-            embedding = self.embedding_model.encode(entry.text)
-            
-            # Create unique ID
-            vector_id = str(uuid.uuid4())
-            
-            # Add to Chroma collection
-            self.collection.add(
-                embeddings=[embedding.tolist()],
-                documents=[entry.text],
-                metadatas=[{
-                    "entry_id": entry.id,
-                    "user_id": entry.user_id,
-                    "mood_tag": entry.mood_tag or "",
-                    "created_at": entry.created_at.isoformat()
-                }],
-                ids=[vector_id]
-            )
+            entries = {
+                row.id: row for row in db.query(
+                    JournalEntry.id,
+                    JournalEntry.user_id,
+                    JournalEntry.text,
+                    JournalEntry.mood_tag,
+                    JournalEntry.created_at
+                ).filter(JournalEntry.id.in_(list(latest)))
+            }
+            metadata_rows = db.execute(embedding_metadata_query(list(latest))).scalars().all()
+            current_metadata = {
+                row.entry_id: row for row in metadata_rows
+                if (row.collection or DEFAULT_COLLECTION) == vector_store.collection_name
+            }
+            
+            # Deleted entries, including upserts whose entry has since been deleted
+            deleted_ids = [
+                entry_id for entry_id, (operation, _) in latest.items()
+                if operation == "delete" or entry_id not in entries
+            ]
+            vector_ids_by_collection: Dict[Tuple[str, int], List[str]] = {}
+            for row in metadata_rows:
+                if row.entry_id in deleted_ids:
+                    key = (row.collection or DEFAULT_COLLECTION, latest[row.entry_id][1])
+                    vector_ids_by_collection.setdefault(key, []).append(row.vector_id)
+                    db.delete(row)
+            stores = {vector_store.collection_name: vector_store}
+            for (collection, user_id), vector_ids in vector_ids_by_collection.items():
+                if collection not in stores:
+                    stores[collection] = create_vector_store(collection)
+                stores[collection].delete(vector_ids, user_id)
+            
+            # Changed or new entries; unchanged text only refreshes the metadata
+            to_embed = []
+            to_retag = []
+            for entry_id, entry in entries.items():
+                if entry_id in deleted_ids:
+                    continue
+                metadata = current_metadata.get(entry_id)
+                if metadata is not None and metadata.text_hash == text_hash(entry.text):
+                    if metadata.mood_tag != entry.mood_tag:
+                        to_retag.append(entry)
+                else:
+                    to_embed.append(entry)
+            
+            if to_embed:
+                # Generate all embeddings in a single forward pass
+                embeddings = self.embedding_model.encode([entry.text for entry in to_embed])
+                vector_ids = [
+                    current_metadata[entry.id].vector_id if entry.id in current_metadata else f"entry-{entry.id}"
+                    for entry in to_embed
+                ]
+                vector_store.upsert(
+                    ids=vector_ids,
+                    embeddings=embeddings,
+                    documents=[entry.text for entry in to_embed],
+                    metadatas=[vector_metadata(entry) for entry in to_embed]
+                )
+            
+            if to_retag:
+                vector_store.update_metadata(
+                    ids=[current_metadata[entry.id].vector_id for entry in to_retag],
+                    metadatas=[vector_metadata(entry) for entry in to_retag]
+                )
             
             # Store metadata in SQL database
-            embedding_metadata = EmbeddingMetadata(
-                entry_id=entry.id,
-                vector_id=vector_id,
-                mood_tag=entry.mood_tag
-            )
-            db.add(embedding_metadata)
+            for entry in to_embed + to_retag:
+                metadata = current_metadata.get(entry.id)
+                if metadata is None:
+                    db.add(EmbeddingMetadata(
+                        entry_id=entry.id,
+                        vector_id=f"entry-{entry.id}",
+                        collection=vector_store.collection_name,
+                        text_hash=text_hash(entry.text),
+                        mood_tag=entry.mood_tag
+                    ))
+                else:
+                    metadata.text_hash = text_hash(entry.text)
+                    metadata.mood_tag = entry.mood_tag
             db.commit()
             
-            print(f"Added entry {entry.id} to vector database")
+            for user_id in {user_id for _, user_id in latest.values()}:
+                self.invalidate_user(user_id)
+            
+            print(
+                f"Vector sync: {len(to_embed)} embedded, {len(to_retag)} retagged, "
+                f"{len(deleted_ids)} deleted"
+            )
             
         except Exception as e:
-            print(f"Error adding entry to vector DB: {e}")
+            db.rollback()
+            print(f"Error syncing entries to vector DB: {e}")
             raise
 
     async def retrieve_relevant_context(self, query: str, user_id: int, k: int = 4) -> List[str]:
         """Retrieve relevant journal entries for the given query"""
+        self.check_active_collection()
         try:
-            # Generate embedding for the query
-            query_embedding = self.embedding_model.encode(query)
-            
-            # Search in Chroma
-            results = self.collection.query(
-                query_embeddings=[query_embedding.tolist()],
-                n_results=k,
-                where={"user_id": user_id}
+            normalized_query = normalize_text(query)
+            context_key = (user_id, normalized_query, k)
+            cached_snippets = self.context_cache.get(context_key)
+            if cached_snippets is not None:
+                return list(cached_snippets)
+            journal_version = self._journal_versions.get(user_id, 0)
+            
+            query_embedding = await self._embed_query(normalized_query)
+            
+            # Search the user's vectors
+            hits = await self.retrieval_executor.run(
+                self.vector_store.query, query_embedding, user_id, k
             )
             
             # Format results
             context_snippets = []
-            if results["documents"]:
-                for i, doc in enumerate(results["documents"][0]):
-                    metadata = results["metadatas"][0][i]
-                    created_at = metadata.get("created_at", "")
-                    mood = metadata.get("mood_tag", "")
-                    
-                    # Create a snippet
-                    snippet = f"[{created_at[:10]}] {doc[:200]}..."
-                    if mood:
-                        snippet = f"[{created_at[:10]}, feeling {mood}] {doc[:200]}..."
-                    
-                    context_snippets.append(snippet)
-            
-            return context_snippets
+            for hit in hits:
+                doc = hit["document"]
+                created_at = hit["metadata"].get("created_at", "")
+                mood = hit["metadata"].get("mood_tag", "")
+                
+                # Create a snippet
+                snippet = f"[{created_at[:10]}] {doc[:200]}..."
+                if mood:
+                    snippet = f"[{created_at[:10]}, feeling {mood}] {doc[:200]}..."
+                
+                context_snippets.append(snippet)
+            
+            # Skip caching if the journal changed while the query was running
+            if self._journal_versions.get(user_id, 0) == journal_version:
+                self.context_cache.set(context_key, context_snippets)
             
+            return list(context_snippets)
+            
+        except RetrievalOverloaded:
+            print("Retrieval queue full, answering without journal context")
+            return []
         except Exception as e:
             print(f"Error retrieving context: {e}")
             return []
 
+    async def _embed_query(self, normalized_query: str):
+        """Embed a normalized query (batched with concurrent queries and cached)"""
+        embedding_key = (self.model_name, normalized_query)
+        query_embedding = self.query_embedding_cache.get(embedding_key)
+        if query_embedding is None:
+            query_embedding = await self.retrieval_executor.encode(normalized_query)
+            self.query_embedding_cache.set(embedding_key, query_embedding)
+        return query_embedding
+
+    def check_active_collection(self):
+        """Pick up a collection switched in by reindex.py without blocking requests"""
+        now = time.monotonic()
+        if self._switching_collection or now - self._active_collection_checked < 1:
+            return
+        self._active_collection_checked = now
+        
+        mtime = _mtime(ACTIVE_COLLECTION_PATH)
+        if mtime == self._active_collection_mtime:
+            return
+        self._active_collection_mtime = mtime
+        self._switching_collection = True
+        threading.Thread(target=self._switch_collection, daemon=True).start()
+
+    def _switch_collection(self):
+        try:
+            active = read_active_collection()
+            
+            # Load everything for the new collection before touching the live references
+            embedding_model = self.embedding_model
+            if active["model"] != self.model_name:
+                embedding_model = load_embedding_model(active["model"])
+            vector_store = create_vector_store(active["collection"])
+            
+            self.embedding_model = embedding_model
+            self.retrieval_executor.embedding_model = embedding_model
+            self.model_name = active["model"]
+            self.vector_store = vector_store
+            self.context_cache.clear()
+            self.response_cache.clear()
+            write_collection_ack(active["collection"])
+            print(f"Switched to vector collection {active['collection']} ({active['model']})")
+            
+        except Exception as e:
+            print(f"Error switching vector collection: {e}")
+        finally:
+            self._switching_collection = False
+
+    def invalidate_user(self, user_id: int):
+        """Drop cached retrieval results and replies after the user's journal changes"""
+        self._journal_versions[user_id] = self._journal_versions.get(user_id, 0) + 1
+        self.context_cache.invalidate(lambda key: key[0] == user_id)
+        self.response_cache.invalidate_user(user_id)
+
+    def retrieval_stats(self) -> Dict[str, dict]:
+        """Retrieval pool and cache statistics"""
+        return {
+            "executor": self.retrieval_executor.stats(),
+            "query_embedding_cache": self.query_embedding_cache.stats(),
+            "context_cache": self.context_cache.stats()
+        }
+
+    def llm_stats(self) -> Dict[str, object]:
+        """LLM gateway and response cache statistics"""
+        stats = self.llm_gateway.stats() if self.llm_gateway else {"enabled": False}
+        stats["response_cache"] = self.response_cache.stats()
+        return stats
+
     async def get_companion_response(
         self, 
         user_message: str, 
@@ -126,24 +395,20 @@ Remember: You are a supportive companion, not a therapist. Your role is to liste
     ) -> ChatResponse:
         """Generate AI companion response using RAG"""
         try:
-            # Retrieve relevant context
-            context_snippets = await self.retrieve_relevant_context(user_message, user_id)
-            
-            # Format context
-            context_text = "\n".join(context_snippets) if context_snippets else "No previous journal entries found."
-            
-            # Determine honesty mode text
-            honesty_mode_text = "Be practical and direct in your responses." if honesty_mode else "Be gentle and supportive in your responses."
+            context_snippets, system_prompt = await self._build_prompt(user_message, user_id, honesty_mode)
             
-            # Build system prompt
-            system_prompt = self.system_prompt.format(
-                context=context_text,
-                honesty_mode_text=honesty_mode_text
-            )
-            
-            # Generate response using OpenAI or fallback
-            if self.openai_client:
-                response_text = await self._generate_openai_response(system_prompt, user_message)
+            # Generate response using a cached reply, OpenAI or fallback
+            cache_lookup = await self._response_cache_lookup(user_message, user_id, context_snippets, mode, honesty_mode)
+            cached_text = self._cached_response(cache_lookup)
+            if cached_text is not None:
+                response_text = cached_text
+            elif self.llm_gateway:
+                try:
+                    response_text = await self._generate_openai_response(system_prompt, user_message)
+                    self._store_response(cache_lookup, response_text)
+                except LLMUnavailable as e:
+                    print(f"OpenAI unavailable, using fallback response: {e}")
+                    response_text = await self._generate_fallback_response(user_message, context_snippets, honesty_mode)
             else:
                 response_text = await self._generate_fallback_response(user_message, context_snippets, honesty_mode)
             
@@ -159,79 +424,135 @@ Remember: You are a supportive companion, not a therapist. Your role is to liste
                 context_used=[]
             )
 
-    async def _generate_openai_response(self, system_prompt: str, user_message: str) -> str:
-        """Generate response using OpenAI API"""
+    async def stream_companion_response(
+        self,
+        user_message: str,
+        user_id: int,
+        mode: str = "supportive",
+        honesty_mode: bool = False
+    ) -> AsyncIterator[Tuple[str, object]]:
+        """Yield ("context", snippets) first, then ("token", text) pieces, then ("done", None)
+
+        Closing the generator (e.g. when the client disconnects) closes the
+        upstream OpenAI stream as well.
+        """
         try:
-            from openai import AsyncOpenAI
-            
-            # Initialize client with API key
-            client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            
-            response = await client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                max_tokens=200,
-                temperature=0.7
-            )
-            
-            return response.choices[0].message.content.strip()
-            
+            context_snippets, system_prompt = await self._build_prompt(user_message, user_id, honesty_mode)
         except Exception as e:
-            print(f"OpenAI API error: {e}")
-            raise
+            print(f"Error preparing companion response: {e}")
+            context_snippets, system_prompt = [], None
+        
+        yield "context", [snippet[:100] + "..." for snippet in context_snippets[:3]]
+        
+        streamed_any = False
+        cache_lookup = None
+        if system_prompt is not None:
+            cache_lookup = await self._response_cache_lookup(user_message, user_id, context_snippets, mode, honesty_mode)
+        cached_text = self._cached_response(cache_lookup)
+        if cached_text is not None:
+            async for token in stream_text(cached_text):
+                streamed_any = True
+                yield "token", token
+        elif self.llm_gateway and system_prompt is not None:
+            tokens = []
+            try:
+                async for token in self._stream_openai_response(system_prompt, user_message):
+                    streamed_any = True
+                    tokens.append(token)
+                    yield "token", token
+                self._store_response(cache_lookup, "".join(tokens).strip())
+            except Exception as e:
+                print(f"OpenAI streaming error: {e}")
+                if streamed_any:
+                    yield "error", "The response was interrupted."
+                    return
+        
+        if not streamed_any:
+            response_text = await self._generate_fallback_response(user_message, context_snippets, honesty_mode)
+            async for token in stream_text(response_text):
+                yield "token", token
+        
+        yield "done", None
 
-    async def _generate_fallback_response(self, user_message: str, context_snippets: List[str], honesty_mode: bool) -> str:
-        """Generate a rule-based fallback response"""
-        # Simple rule-based responses based on keywords and context
-        user_lower = user_message.lower()
-        
-        # Check for concerning content
-        concerning_keywords = ["hurt", "harm", "suicide", "die", "kill", "end it"]
-        if any(keyword in user_lower for keyword in concerning_keywords):
-            return "I'm really concerned about what you're sharing. Please reach out to a mental health professional, a trusted friend, or a crisis helpline. You're not alone, and there are people who want to help. In the US, you can contact the National Suicide Prevention Lifeline at 988."
-        
-        # Mood-based responses
-        positive_keywords = ["happy", "good", "great", "excited", "joy"]
-        negative_keywords = ["sad", "upset", "angry", "frustrated", "down", "depressed"]
-        anxiety_keywords = ["anxious", "worried", "stress", "nervous", "panic"]
-        
-        if any(keyword in user_lower for keyword in positive_keywords):
-            if context_snippets:
-                return "It's wonderful to hear you're feeling positive! I noticed in your recent entries that you've been working through some things. What's contributing to this good feeling today?"
-            else:
-                return "That's great to hear! What's been bringing you joy lately? It's important to celebrate these positive moments."
+    async def _response_cache_lookup(
+        self,
+        user_message: str,
+        user_id: int,
+        context_snippets: List[str],
+        mode: str,
+        honesty_mode: bool
+    ) -> Optional[tuple]:
+        """Build the response cache key, or None when the reply must not be cached"""
+        if not self.llm_gateway or self.safety_check(user_message):
+            return None
+        try:
+            query_embedding = await self._embed_query(normalize_text(user_message))
+        except RetrievalOverloaded:
+            return None
+        except Exception as e:
+            # A failed lookup only costs the cache; the reply is still generated
+            print(f"Response cache lookup failed: {e}")
+            return None
         
-        elif any(keyword in user_lower for keyword in anxiety_keywords):
-            response = "I can hear that you're feeling anxious right now, and that's completely valid. "
-            if honesty_mode:
-                response += "Try focusing on what you can control today. What's one small action you can take right now?"
-            else:
-                response += "Take a deep breath with me. What usually helps you feel more grounded?"
-            return response
+        # Replies depend on the retrieved context, so it is part of the key
+        key = (text_hash("\n".join(context_snippets)), mode, honesty_mode)
+        return user_id, query_embedding, key, self._journal_versions.get(user_id, 0)
+
+    def _cached_response(self, cache_lookup: Optional[tuple]) -> Optional[str]:
+        if cache_lookup is None:
+            return None
+        user_id, query_embedding, key, _ = cache_lookup
+        return self.response_cache.get(user_id, query_embedding, key)
+
+    def _store_response(self, cache_lookup: Optional[tuple], response_text: str):
+        if cache_lookup is None or not response_text:
+            return
+        user_id, query_embedding, key, journal_version = cache_lookup
+        # Skip caching if the journal changed while the reply was generated
+        if self._journal_versions.get(user_id, 0) == journal_version:
+            self.response_cache.set(user_id, query_embedding, key, response_text)
+
+    async def _build_prompt(self, user_message: str, user_id: int, honesty_mode: bool) -> Tuple[List[str], str]:
+        """Retrieve context and build the system prompt"""
+        # Retrieve relevant context
+        context_snippets = await self.retrieve_relevant_context(user_message, user_id)
         
-        elif any(keyword in user_lower for keyword in negative_keywords):
-            response = "I'm sorry you're going through a difficult time. Your feelings are completely valid. "
-            if context_snippets:
-                response += "Looking at your recent entries, it seems like you've been processing a lot. What feels most heavy right now?"
-            else:
-                response += "Would you like to share what's been weighing on your mind?"
-            return response
+        # Format context
+        context_text = "\n".join(context_snippets) if context_snippets else "No previous journal entries found."
         
-        # Default supportive response
-        if context_snippets:
-            return "Thank you for sharing with me. I can see from your recent entries that you've been reflecting on important things. What's on your mind today?"
-        else:
-            return "I'm here to listen and support you. What would you like to talk about today? Sometimes it helps to just put your thoughts into words."
+        # Determine honesty mode text
+        honesty_mode_text = "Be practical and direct in your responses." if honesty_mode else "Be gentle and supportive in your responses."
+        
+        # Build system prompt
+        system_prompt = self.system_prompt.format(
+            context=context_text,
+            honesty_mode_text=honesty_mode_text
+        )
+        return context_snippets, system_prompt
+
+    async def _stream_openai_response(self, system_prompt: str, user_message: str) -> AsyncIterator[str]:
+        """Stream response tokens from the OpenAI API"""
+        stream = self.llm_gateway.stream(self._chat_messages(system_prompt, user_message))
+        try:
+            async for token in stream:
+                yield token
+        finally:
+            await stream.aclose()
+
+    async def _generate_openai_response(self, system_prompt: str, user_message: str) -> str:
+        """Generate response using OpenAI API"""
+        return await self.llm_gateway.complete(self._chat_messages(system_prompt, user_message))
+
+    def _chat_messages(self, system_prompt: str, user_message: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
+        ]
+
+    async def _generate_fallback_response(self, user_message: str, context_snippets: List[str], honesty_mode: bool) -> str:
+        """Generate a rule-based fallback response"""
+        return fallback_response(user_message, context_snippets, honesty_mode)
 
     def safety_check(self, text: str) -> bool:
         """Check if text contains concerning content"""
-        concerning_patterns = [
-            "kill myself", "end my life", "want to die", "suicide", 
-            "hurt myself", "self harm", "cut myself"
-        ]
-        
-        text_lower = text.lower()
-        return any(pattern in text_lower for pattern in concerning_patterns)
\ No newline at end of file
+        return analyze(text).concerning
\ No newline at end of file
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from models import JournalEntry, EmbeddingMetadata, ChatResponse
 import uuid
 from datetime import datetime
+from text_signals import analyze
 
 class RAGService:
     def __init__(self):
@@ -50,25 +51,24 @@ class RAGService:
         """Generate a supportive response without external AI"""
         try:
             # Simple rule-based responses
-            user_lower = user_message.lower()
+            signals = analyze(user_message)
             
             # Check for concerning content
-            concerning_keywords = ["hurt", "harm", "suicide", "die", "kill", "end it"]
-            if any(keyword in user_lower for keyword in concerning_keywords):
+            if signals.crisis:
                 return ChatResponse(
                     response="I'm really concerned about what you're sharing. Please reach out to a mental health professional, a trusted friend, or a crisis helpline. You're not alone, and there are people who want to help. In the US, you can contact the National Suicide Prevention Lifeline at 988.",
                     context_used=[]
                 )
             
             # Mood-based responses
-            if any(word in user_lower for word in ["happy", "good", "great", "excited", "joy"]):
+            if signals.sentiment == "positive":
                 response = "It's wonderful to hear you're feeling positive! What's been contributing to this good feeling today? It's important to celebrate these positive moments."
-            elif any(word in user_lower for word in ["anxious", "worried", "stress", "nervous", "panic"]):
+            elif signals.sentiment == "anxious":
                 if honesty_mode:
                     response = "I can hear that you're feeling anxious right now. Try focusing on what you can control today. What's one small action you can take right now?"
                 else:
                     response = "I can hear that you're feeling anxious right now, and that's completely valid. Take a deep breath with me. What usually helps you feel more grounded?"
-            elif any(word in user_lower for word in ["sad", "upset", "down", "depressed"]):
+            elif signals.sentiment == "negative":
                 response = "I'm sorry you're going through a difficult time. Your feelings are completely valid. Would you like to share what's been weighing on your mind?"
             else:
                 response = "Thank you for sharing with me. I'm here to listen and support you. What would you like to talk about today? Sometimes it helps to just put your thoughts into words."
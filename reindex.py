@@ -0,0 +1,340 @@
+"""Bulk re-embed every journal entry into a fresh, versioned vector collection.
+
+Entries are streamed in id order, embedded in large batches across a process
+pool and upserted into the new collection. Progress is checkpointed after
+every batch, so an interrupted run picks up where it stopped. When all
+entries are done, edits made during the run are replayed into the new
+collection, the active-collection pointer is switched atomically, and the
+run waits until every API process reports that it serves the new collection
+before catching up once more on entries written during the switch.
+
+    python reindex.py                          # new version with the current model
+    python reindex.py --model all-mpnet-base-v2
+    python reindex.py --resume                 # continue an interrupted run
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from database import SessionLocal, init_db
+from embedding_pipeline import embedding_metadata_query
+from models import EmbeddingMetadata, JournalEntry
+from rag_service import text_hash, vector_metadata
+from vector_store import (
+    DEFAULT_COLLECTION,
+    create_vector_store,
+    read_active_collection,
+    read_collection_acks,
+    write_active_collection,
+)
+
+CHECKPOINT_PATH = "./data/reindex_checkpoint.json"
+
+# updated_at comes from the API hosts' clocks
+CLOCK_SKEW = timedelta(minutes=1)
+
+# Embedding model loaded once per worker process
+_worker_model = None
+
+def _init_worker(model_name: str, threads: int):
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    _worker_model = SentenceTransformer(model_name)
+
+def _encode(texts: List[str]):
+    return _worker_model.encode(texts, batch_size=64, convert_to_numpy=True)
+
+def _create_pool(model_name: str, workers: int) -> ProcessPoolExecutor:
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    # spawn: forking a process that holds model threads and DB connections is unsafe
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_name, threads)
+    )
+
+def next_collection_name(current: str) -> str:
+    """journal_entries -> journal_entries_v2 -> journal_entries_v3 ..."""
+    match = re.match(r"^(.*)_v(\d+)$", current)
+    if match:
+        return f"{match.group(1)}_v{int(match.group(2)) + 1}"
+    return f"{current}_v2"
+
+def load_checkpoint() -> Optional[Dict]:
+    if os.path.exists(CHECKPOINT_PATH):
+        with open(CHECKPOINT_PATH) as f:
+            return json.load(f)
+    return None
+
+def save_checkpoint(checkpoint: Dict):
+    tmp_path = CHECKPOINT_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, CHECKPOINT_PATH)
+
+def fetch_batch(db, collection: str, after_id: int, batch_size: int) -> List[Dict]:
+    """Next batch of entries by id, without the ones already embedded into the collection"""
+    rows = db.query(
+        JournalEntry.id,
+        JournalEntry.user_id,
+        JournalEntry.text,
+        JournalEntry.mood_tag,
+        JournalEntry.created_at
+    ).filter(JournalEntry.id > after_id).order_by(JournalEntry.id).limit(batch_size).all()
+    if not rows:
+        return []
+
+    done = {
+        row.entry_id for row in db.execute(
+            embedding_metadata_query([row.id for row in rows], collection)
+        ).scalars()
+    }
+    return [
+        {
+            "id": row.id,
+            "user_id": row.user_id,
+            "text": row.text,
+            "mood_tag": row.mood_tag,
+            "created_at": row.created_at,
+            "skip": row.id in done
+        }
+        for row in rows
+    ]
+
+def write_batch(db, vector_store, entries: List[Dict], embeddings):
+    # Deterministic ids make a retried batch an overwrite instead of a duplicate
+    vector_ids = [f"entry-{entry['id']}" for entry in entries]
+    vector_store.upsert(
+        ids=vector_ids,
+        embeddings=embeddings,
+        documents=[entry["text"] for entry in entries],
+        metadatas=[{
+            "entry_id": entry["id"],
+            "user_id": entry["user_id"],
+            "mood_tag": entry["mood_tag"] or "",
+            "created_at": entry["created_at"].isoformat()
+        } for entry in entries]
+    )
+    db.add_all([
+        EmbeddingMetadata(
+            entry_id=entry["id"],
+            vector_id=vector_id,
+            collection=vector_store.collection_name,
+            text_hash=text_hash(entry["text"]),
+            mood_tag=entry["mood_tag"]
+        )
+        for entry, vector_id in zip(entries, vector_ids)
+    ])
+    db.commit()
+
+    # An entry deleted while its batch was encoding: the outbox found no
+    # metadata for it in this collection yet, so take back what was written.
+    # Deletes committed after this check see the metadata and clean up themselves
+    remaining = {
+        entry_id for (entry_id,) in db.query(JournalEntry.id).filter(
+            JournalEntry.id.in_([entry["id"] for entry in entries])
+        )
+    }
+    gone = [entry for entry in entries if entry["id"] not in remaining]
+    if gone:
+        vector_ids_by_user: Dict[int, List[str]] = {}
+        for entry in gone:
+            vector_ids_by_user.setdefault(entry["user_id"], []).append(f"entry-{entry['id']}")
+        for user_id, gone_ids in vector_ids_by_user.items():
+            vector_store.delete(gone_ids, user_id)
+        db.query(EmbeddingMetadata).filter(
+            EmbeddingMetadata.collection == vector_store.collection_name,
+            EmbeddingMetadata.entry_id.in_([entry["id"] for entry in gone])
+        ).delete(synchronize_session=False)
+        db.commit()
+
+def reindex(checkpoint: Dict, batch_size: int, workers: int) -> int:
+    """Embed everything after the checkpoint; returns the number of entries written"""
+    collection = checkpoint["collection"]
+    vector_store = create_vector_store(collection)
+    written = 0
+    started = time.perf_counter()
+
+    db = SessionLocal()
+    try:
+        with _create_pool(checkpoint["model"], workers) as pool:
+            in_flight = deque()
+            cursor = checkpoint["last_entry_id"]
+
+            while True:
+                # Keep every worker busy with one batch and one queued behind it
+                while len(in_flight) < workers * 2:
+                    batch = fetch_batch(db, collection, cursor, batch_size)
+                    if not batch:
+                        break
+                    cursor = batch[-1]["id"]
+                    pending = [entry for entry in batch if not entry["skip"]]
+                    future = pool.submit(_encode, [entry["text"] for entry in pending]) if pending else None
+                    in_flight.append((cursor, pending, future))
+
+                if not in_flight:
+                    break
+
+                # Batches are written in id order so the checkpoint only ever moves forward
+                last_id, pending, future = in_flight.popleft()
+                if future is not None:
+                    write_batch(db, vector_store, pending, future.result())
+                    written += len(pending)
+
+                checkpoint["last_entry_id"] = last_id
+                save_checkpoint(checkpoint)
+                rate = written / max(time.perf_counter() - started, 1e-6)
+                print(f"[{collection}] up to entry {last_id}, {written} embedded ({rate:.0f}/s)")
+    finally:
+        db.close()
+
+    return written
+
+def reconcile(checkpoint: Dict, since: datetime, batch_size: int) -> int:
+    """Replay entries edited since `since` into the collection; returns how many changed
+
+    The API's outbox worker re-embeds edits into the active collection only,
+    so text and mood changes made during a run are applied here by comparing
+    each edited entry with the collection's EmbeddingMetadata. Deletes need
+    no replay: the outbox removes vectors from every collection.
+    """
+    collection = checkpoint["collection"]
+    vector_store = create_vector_store(collection)
+    since = since - CLOCK_SKEW
+    changed = 0
+    pool = None
+
+    db = SessionLocal()
+    try:
+        cursor = 0
+        while True:
+            rows = db.query(
+                JournalEntry.id,
+                JournalEntry.user_id,
+                JournalEntry.text,
+                JournalEntry.mood_tag,
+                JournalEntry.created_at
+            ).filter(
+                JournalEntry.updated_at >= since,
+                JournalEntry.id > cursor
+            ).order_by(JournalEntry.id).limit(batch_size).all()
+            if not rows:
+                break
+            cursor = rows[-1].id
+
+            metadata = {
+                row.entry_id: row for row in db.execute(
+                    embedding_metadata_query([row.id for row in rows], collection)
+                ).scalars()
+            }
+            stale = [row for row in rows if row.id not in metadata or metadata[row.id].text_hash != text_hash(row.text)]
+            stale_ids = {row.id for row in stale}
+            retag = [row for row in rows if row.id not in stale_ids and metadata[row.id].mood_tag != row.mood_tag]
+
+            if retag:
+                vector_store.update_metadata(
+                    ids=[metadata[row.id].vector_id for row in retag],
+                    metadatas=[vector_metadata(row) for row in retag]
+                )
+                for row in retag:
+                    metadata[row.id].mood_tag = row.mood_tag
+                db.commit()
+
+            if stale:
+                # Usually a handful of entries, so one worker is enough
+                pool = pool or _create_pool(checkpoint["model"], 1)
+                embeddings = pool.submit(_encode, [row.text for row in stale]).result()
+                for row in stale:
+                    if row.id in metadata:
+                        db.delete(metadata[row.id])
+                db.flush()
+                write_batch(db, vector_store, [row._asdict() for row in stale], embeddings)
+
+            changed += len(stale) + len(retag)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        db.close()
+
+    print(f"[{collection}] replayed {changed} entries edited since {since:%Y-%m-%d %H:%M:%S}")
+    return changed
+
+def wait_for_switch(collection: str, timeout: float) -> bool:
+    """Wait until every API process that has loaded a collection serves this one"""
+    deadline = time.monotonic() + timeout
+    while True:
+        behind = [ack for ack in read_collection_acks() if ack["collection"] != collection]
+        if not behind:
+            return True
+        if time.monotonic() >= deadline:
+            print(
+                f"Still serving the old collection after {timeout:.0f}s: "
+                + ", ".join(f"{ack['host']}:{ack['pid']}" for ack in behind)
+            )
+            return False
+        time.sleep(0.5)
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-embed journal entries into a new vector collection")
+    parser.add_argument("--model", help="embedding model (defaults to the active one)")
+    parser.add_argument("--collection", help="target collection name (defaults to the next version)")
+    parser.add_argument("--resume", action="store_true", help="continue the interrupted run")
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--no-switch", action="store_true", help="build the collection without activating it")
+    parser.add_argument("--switch-timeout", type=float, default=300, help="seconds to wait for API processes to switch")
+    args = parser.parse_args()
+
+    init_db()
+    active = read_active_collection()
+    checkpoint = load_checkpoint()
+
+    if args.resume:
+        if checkpoint is None:
+            parser.error(f"No interrupted run found at {CHECKPOINT_PATH}")
+        print(f"Resuming {checkpoint['collection']} after entry {checkpoint['last_entry_id']}")
+    else:
+        if checkpoint is not None:
+            parser.error(
+                f"An interrupted run into {checkpoint['collection']} exists; "
+                f"pass --resume or delete {CHECKPOINT_PATH}"
+            )
+        checkpoint = {
+            "collection": args.collection or next_collection_name(active.get("collection", DEFAULT_COLLECTION)),
+            "model": args.model or active["model"],
+            "last_entry_id": 0,
+            "started_at": datetime.utcnow().isoformat()
+        }
+        save_checkpoint(checkpoint)
+
+    reindex(checkpoint, args.batch_size, args.workers)
+    # Checkpoints from older runs have no start time: compare every entry
+    started_at = datetime.fromisoformat(checkpoint["started_at"]) if "started_at" in checkpoint else datetime.min + CLOCK_SKEW
+    replayed_at = datetime.utcnow()
+    reconcile(checkpoint, started_at, args.batch_size)
+
+    if args.no_switch:
+        print(f"Built {checkpoint['collection']}; active collection left at {active['collection']}")
+    else:
+        write_active_collection(checkpoint["collection"], checkpoint["model"])
+        wait_for_switch(checkpoint["collection"], args.switch_timeout)
+        # New entries and edits the outbox applied to the old collection while the switch propagated
+        reindex(checkpoint, args.batch_size, args.workers)
+        reconcile(checkpoint, replayed_at, args.batch_size)
+        print(f"Active collection is now {checkpoint['collection']} ({checkpoint['model']})")
+
+    os.remove(CHECKPOINT_PATH)
+
+if __name__ == "__main__":
+    main()
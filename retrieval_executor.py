@@ -0,0 +1,109 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+class RetrievalOverloaded(Exception):
+    """Raised when the retrieval wait queue is full"""
+
+class RetrievalExecutor:
+    """Bounded worker pool for query encoding and vector search on the /chat path"""
+
+    def __init__(
+        self,
+        embedding_model,
+        max_workers: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+        batch_window_ms: Optional[float] = None,
+        max_batch_size: Optional[int] = None
+    ):
+        self.embedding_model = embedding_model
+
+        self.max_workers = max_workers or int(os.getenv("RETRIEVAL_WORKERS", "2"))
+        self.max_queue_size = max_queue_size or int(os.getenv("RETRIEVAL_QUEUE_SIZE", "64"))
+        self.batch_window = (batch_window_ms or float(os.getenv("RETRIEVAL_BATCH_WINDOW_MS", "5"))) / 1000
+        self.max_batch_size = max_batch_size or int(os.getenv("RETRIEVAL_BATCH_SIZE", "16"))
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="retrieval"
+        )
+
+        # Queries waiting to be encoded together
+        self._pending_queries: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+        # Stats
+        self.in_flight = 0
+        self.rejected = 0
+        self.encode_batches = 0
+        self.encoded_queries = 0
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking call on the pool, rejecting it if the wait queue is full"""
+        if self.in_flight >= self.max_workers + self.max_queue_size:
+            self.rejected += 1
+            raise RetrievalOverloaded("Retrieval queue is full")
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+        finally:
+            self.in_flight -= 1
+
+    async def encode(self, query: str):
+        """Encode a query, batching it with others that arrive within the batch window"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending_queries.append((query, future))
+
+        if len(self._pending_queries) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+
+        return await future
+
+    def stats(self) -> Dict[str, float]:
+        """Pool utilisation and batching statistics"""
+        return {
+            "workers": self.max_workers,
+            "max_queue_size": self.max_queue_size,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+            "encode_batches": self.encode_batches,
+            "encoded_queries": self.encoded_queries,
+            "average_encode_batch_size": (
+                round(self.encoded_queries / self.encode_batches, 2)
+                if self.encode_batches else 0
+            )
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending_queries = self._pending_queries, []
+        if batch:
+            asyncio.ensure_future(self._encode_batch(batch))
+
+    async def _encode_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        try:
+            embeddings = await self.run(self.embedding_model.encode, [query for query, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.encode_batches += 1
+        self.encoded_queries += len(batch)
+        for (_, future), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+class LazyService:
+    """Builds a service on first use, or earlier from the background warmup"""
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._instance is not None
+
+    @property
+    def instance(self):
+        """The service if it has been built, otherwise None (never blocks)"""
+        return self._instance
+
+    def get(self):
+        """Return the service, building it in the calling thread if needed"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    start = time.perf_counter()
+                    try:
+                        self._instance = self._factory()
+                        self.error = None
+                    except Exception as e:
+                        self.error = str(e)
+                        raise
+                    self.load_seconds = round(time.perf_counter() - start, 3)
+                    print(f"{self.name} service ready in {self.load_seconds}s")
+        return self._instance
+
+    async def aget(self):
+        """Return the service without blocking the event loop while it builds"""
+        if self._instance is not None:
+            return self._instance
+        return await asyncio.to_thread(self.get)
+
+    def status(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "load_seconds": self.load_seconds, "error": self.error}
+
+async def warm_up(services: List[LazyService]):
+    """Build services one after another in a worker thread"""
+    for service in services:
+        try:
+            await service.aget()
+        except Exception as e:
+            print(f"Warmup of {service.name} service failed: {e}")
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react'
 import axios from 'axios'
-import { format, subDays } from 'date-fns'
+import { format, parseISO, subDays } from 'date-fns'
 
 export default function AIInsightsPanel() {
   const [insights, setInsights] = useState(null)
@@ -13,15 +13,11 @@ export default function AIInsightsPanel() {
 
   const fetchInsights = async () => {
     try {
-      const [calendarRes, journalRes] = await Promise.all([
-        axios.get('/calendar'),
-        axios.get('/journal')
-      ])
-
-      const moodData = calendarRes.data
-      const journalEntries = journalRes.data
-
-      generateInsights(moodData, journalEntries)
+      // The server analyses the last 7 days (today included) in one request
+      const response = await axios.get('/analytics/moods', {
+        params: { start: format(subDays(new Date(), 6), 'yyyy-MM-dd'), keywords: true }
+      })
+      generateInsights(response.data)
     } catch (err) {
       console.error('Error fetching insights:', err)
     } finally {
@@ -29,151 +25,50 @@ export default function AIInsightsPanel() {
     }
   }
 
-  const generateInsights = (moodData, entries) => {
-    // Analyze recent week
-    const today = new Date()
-    const weekAgo = subDays(today, 7)
-    
-    const recentEntries = entries.filter(entry => 
-      new Date(entry.created_at) >= weekAgo
-    )
-
+  const generateInsights = (analytics) => {
     // Most common moods this week
-    const weekMoods = {}
-    recentEntries.forEach(entry => {
-      if (entry.mood_tag) {
-        weekMoods[entry.mood_tag] = (weekMoods[entry.mood_tag] || 0) + 1
-      }
-    })
-
-    const topMoods = Object.entries(weekMoods)
+    const topMoods = Object.entries(analytics.mood_counts)
       .sort(([,a], [,b]) => b - a)
       .slice(0, 3)
 
-    // Detect patterns
-    const patterns = detectPatterns(recentEntries)
-    
-    // Mood triggers analysis
-    const triggers = analyzeTriggers(entries)
-    
-    // Positive reinforcements
-    const boosters = analyzePositiveFactors(entries)
-
     setInsights({
       topMoods,
-      patterns,
-      triggers,
-      boosters,
-      totalEntries: recentEntries.length,
-      averageMoodScore: calculateAverageMood(recentEntries)
+      patterns: detectPatterns(analytics),
+      triggers: analytics.keywords?.negative || [],
+      boosters: analytics.keywords?.positive || [],
+      totalEntries: analytics.total_entries,
+      averageMoodScore: analytics.average_mood_score ?? 3
     })
 
-    // Generate week data for mini chart
-    const weekChart = generateWeekChart(recentEntries)
-    setWeekData(weekChart)
+    // Week data for mini chart
+    setWeekData(analytics.rolling_weekly.map(point => ({
+      day: format(parseISO(point.day), 'EEE'),
+      count: point.entries,
+      avgMood: point.average_mood_score ?? 3
+    })))
   }
 
-  const detectPatterns = (entries) => {
+  const detectPatterns = (analytics) => {
     const patterns = []
-    
-    // Check for time-based patterns
-    const timeOfDay = {}
-    entries.forEach(entry => {
-      const hour = new Date(entry.created_at).getHours()
-      const period = hour < 6 ? 'night' : hour < 12 ? 'morning' : hour < 18 ? 'afternoon' : 'evening'
-      timeOfDay[period] = (timeOfDay[period] || 0) + 1
-    })
 
-    const mostActiveTime = Object.entries(timeOfDay).sort(([,a], [,b]) => b - a)[0]
+    // Time-based patterns
+    const mostActiveTime = Object.entries(analytics.time_of_day)
+      .filter(([, count]) => count > 0)
+      .sort(([,a], [,b]) => b - a)[0]
     if (mostActiveTime) {
       patterns.push(`Most reflective during ${mostActiveTime[0]}`)
     }
 
-    // Check for writing streaks
-    if (entries.length >= 3) {
-      patterns.push(`${entries.length} entries this week - great consistency! 🔥`)
+    // Writing streaks
+    if (analytics.streaks.current_days >= 3) {
+      patterns.push(`${analytics.streaks.current_days}-day writing streak - great consistency! 🔥`)
+    } else if (analytics.total_entries >= 3) {
+      patterns.push(`${analytics.total_entries} entries this week - great consistency! 🔥`)
     }
 
     return patterns
   }
 
-  const analyzeTriggers = (entries) => {
-    // Simple keyword analysis for negative moods
-    const negativeEntries = entries.filter(entry => 
-      ['sad', 'anxious', 'frustrated', 'angry', 'overwhelmed', 'lonely'].includes(entry.mood_tag)
-    )
-
-    const commonWords = {}
-    negativeEntries.forEach(entry => {
-      const words = entry.text.toLowerCase().split(/\s+/)
-      words.forEach(word => {
-        if (word.length > 4) { // Only consider longer words
-          commonWords[word] = (commonWords[word] || 0) + 1
-        }
-      })
-    })
-
-    return Object.entries(commonWords)
-      .filter(([word, count]) => count > 1)
-      .sort(([,a], [,b]) => b - a)
-      .slice(0, 3)
-      .map(([word]) => word)
-  }
-
-  const analyzePositiveFactors = (entries) => {
-    const positiveEntries = entries.filter(entry =>
-      ['happy', 'excited', 'grateful', 'confident', 'peaceful', 'hopeful', 'content'].includes(entry.mood_tag)
-    )
-
-    const commonWords = {}
-    positiveEntries.forEach(entry => {
-      const words = entry.text.toLowerCase().split(/\s+/)
-      words.forEach(word => {
-        if (word.length > 4) {
-          commonWords[word] = (commonWords[word] || 0) + 1
-        }
-      })
-    })
-
-    return Object.entries(commonWords)
-      .filter(([word, count]) => count > 1)
-      .sort(([,a], [,b]) => b - a)
-      .slice(0, 3)
-      .map(([word]) => word)
-  }
-
-  const calculateAverageMood = (entries) => {
-    const moodScores = {
-      'happy': 5, 'excited': 5, 'grateful': 5, 'confident': 5, 'peaceful': 4,
-      'hopeful': 4, 'content': 4, 'energetic': 4, 'calm': 3,
-      'tired': 2, 'lonely': 2, 'sad': 1, 'anxious': 1, 'frustrated': 1,
-      'angry': 1, 'overwhelmed': 1
-    }
-
-    const scores = entries
-      .filter(entry => entry.mood_tag && moodScores[entry.mood_tag])
-      .map(entry => moodScores[entry.mood_tag])
-
-    return scores.length > 0 ? (scores.reduce((sum, score) => sum + score, 0) / scores.length) : 3
-  }
-
-  const generateWeekChart = (entries) => {
-    const days = []
-    for (let i = 6; i >= 0; i--) {
-      const date = subDays(new Date(), i)
-      const dayEntries = entries.filter(entry => 
-        format(new Date(entry.created_at), 'yyyy-MM-dd') === format(date, 'yyyy-MM-dd')
-      )
-      
-      days.push({
-        day: format(date, 'EEE'),
-        count: dayEntries.length,
-        avgMood: calculateAverageMood(dayEntries)
-      })
-    }
-    return days
-  }
-
   const getMoodColor = (score) => {
     if (score >= 4.5) return 'bg-green-500'
     if (score >= 3.5) return 'bg-yellow-500'
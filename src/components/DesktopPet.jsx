@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react'
+import React, { useState, useEffect, useRef } from 'react'
 import axios from 'axios'
 
 const PET_STATES = {
@@ -104,16 +104,31 @@ export default function DesktopPet() {
   const [interactionMode, setInteractionMode] = useState('casual')
   const [lastInteraction, setLastInteraction] = useState(null)
   const [petEnergy, setPetEnergy] = useState(100)
+  const moodEtag = useRef(null)
 
   useEffect(() => {
-    fetchMoodData()
-    const interval = setInterval(fetchMoodData, 30000) // Update every 30 seconds
-    return () => clearInterval(interval)
+    // The server pushes journal changes instead of us polling. EventSource
+    // cannot send headers, so the token goes in the query string; it
+    // reconnects on its own, and each (re)connect starts with "ready"
+    const token = localStorage.getItem('token')
+    if (!token) {
+      fetchMoodData()
+      return
+    }
+    const events = new EventSource(`${axios.defaults.baseURL}/events?token=${encodeURIComponent(token)}`)
+    events.addEventListener('ready', fetchMoodData)
+    events.addEventListener('journal', fetchMoodData)
+    return () => events.close()
   }, [])
 
   const fetchMoodData = async () => {
     try {
+      // The browser revalidates with If-None-Match; an unchanged ETag means
+      // the server answered 304 and there is nothing to recompute
       const response = await axios.get('/calendar')
+      const etag = response.headers['etag']
+      if (etag && etag === moodEtag.current) return
+      moodEtag.current = etag
       setMoodData(response.data)
       calculatePetState(response.data)
     } catch (err) {
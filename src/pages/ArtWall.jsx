@@ -16,6 +16,7 @@ const ART_STYLES = [
 export default function ArtWall() {
   const [journalEntries, setJournalEntries] = useState([])
   const [sharedArt, setSharedArt] = useState([])
+  const [wallCursor, setWallCursor] = useState(null)
   const [loading, setLoading] = useState(true)
   const [generatingArt, setGeneratingArt] = useState(null)
   const [selectedEntry, setSelectedEntry] = useState(null)
@@ -32,22 +33,36 @@ export default function ArtWall() {
 
   const fetchJournalEntries = async () => {
     try {
-      const response = await axios.get('/journal')
+      // Excerpts are enough to pick an entry
+      const response = await axios.get('/journal', { params: { fields: 'summary', limit: 50 } })
       setJournalEntries(response.data)
     } catch (err) {
       console.error('Error fetching journal entries:', err)
     }
   }
 
-  const fetchSharedArt = async () => {
+  const fetchSharedArt = async (cursor = null) => {
     try {
-      const response = await axios.get('/art/wall')
-      setSharedArt(response.data)
+      // Pages continue from the cursor in the X-Next-Cursor header
+      const response = await axios.get('/art/wall', { params: cursor ? { cursor } : {} })
+      setSharedArt(previous => cursor ? [...previous, ...response.data] : response.data)
+      setWallCursor(response.headers['x-next-cursor'] || null)
     } catch (err) {
       console.error('Error fetching shared art:', err)
     }
   }
 
+  const waitForArtJob = async (jobId) => {
+    // Poll until the job finishes
+    while (true) {
+      const response = await axios.get(`/art/jobs/${jobId}`)
+      if (response.data.status === 'succeeded' || response.data.status === 'failed') {
+        return response.data
+      }
+      await new Promise(resolve => setTimeout(resolve, 1000))
+    }
+  }
+
   const generateArt = async () => {
     if (!selectedEntry) {
       setError('Please select a journal entry first')
@@ -58,13 +73,20 @@ export default function ArtWall() {
     setError('')
 
     try {
+      // The server queues the job (202) and renders it in the background
       const response = await axios.post('/art', {
         entry_id: selectedEntry.id,
         style: selectedStyle
       })
+      const job = await waitForArtJob(response.data.job_id)
+      if (job.status !== 'succeeded') {
+        throw new Error(job.error || 'Art job failed')
+      }
       
-      // Show success message
-      alert('Art generated successfully! It may take a moment to appear.')
+      // Show success message and offer to share
+      if (window.confirm('Art generated successfully! Share it anonymously on the community wall?')) {
+        await axios.put(`/art/${job.art.id}/share`, { shared: true })
+      }
       
       // Reset form
       setSelectedEntry(null)
@@ -181,7 +203,7 @@ export default function ArtWall() {
                         )}
                       </div>
                       <p className="text-sm text-gray-800 line-clamp-2">
-                        {entry.text.substring(0, 120)}...
+                        {entry.excerpt}
                       </p>
                     </button>
                   ))}
@@ -263,7 +285,10 @@ export default function ArtWall() {
                   <div key={art.id} className="card group hover:shadow-lg transition-shadow">
                     <div className="aspect-square bg-gray-100 rounded-lg mb-3 overflow-hidden">
                       <img
-                        src={art.art_url}
+                        src={art.medium_url || art.art_url}
+                        srcSet={art.thumbnail_url ? `${art.thumbnail_url} 128w, ${art.medium_url} 320w, ${art.art_url} 512w` : undefined}
+                        sizes="(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
+                        loading="lazy"
                         alt={`${art.style} art`}
                         className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-300"
                         onError={(e) => {
@@ -283,6 +308,14 @@ export default function ArtWall() {
                   </div>
                 ))}
               </div>
+
+              {wallCursor && (
+                <div className="text-center">
+                  <button onClick={() => fetchSharedArt(wallCursor)} className="btn-secondary">
+                    Load More
+                  </button>
+                </div>
+              )}
             </>
           )}
         </>
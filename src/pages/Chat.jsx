@@ -72,26 +72,79 @@ export default function Chat() {
     setIsLoading(true)
     setError('')
 
+    const assistantId = Date.now() + 1
+    let receivedTokens = false
+
     try {
-      const response = await axios.post('/chat', {
-        message: userMessage.content,
-        mode: currentMode
+      // Stream the reply so it appears as it is generated
+      const response = await fetch(`${axios.defaults.baseURL}/chat/stream`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          Authorization: axios.defaults.headers.common['Authorization']
+        },
+        body: JSON.stringify({
+          message: userMessage.content,
+          mode: currentMode
+        })
       })
 
-      const assistantMessage = {
-        id: Date.now() + 1,
+      if (!response.ok || !response.body) {
+        throw new Error(`Chat stream failed with status ${response.status}`)
+      }
+
+      setMessages(prev => [...prev, {
+        id: assistantId,
         type: 'assistant',
-        content: response.data.response,
+        content: '',
         timestamp: new Date(),
-        contextUsed: response.data.context_used || []
+        contextUsed: []
+      }])
+
+      const updateAssistant = (update) => {
+        setMessages(prev => prev.map(message =>
+          message.id === assistantId ? { ...message, ...update(message) } : message
+        ))
+      }
+
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ''
+
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+
+        buffer += decoder.decode(value, { stream: true })
+        const events = buffer.split('\n\n')
+        buffer = events.pop()
+
+        for (const rawEvent of events) {
+          const lines = rawEvent.split('\n')
+          const eventName = lines.find(line => line.startsWith('event: '))?.slice(7)
+          const dataLine = lines.find(line => line.startsWith('data: '))
+          const data = dataLine ? JSON.parse(dataLine.slice(6)) : null
+
+          if (eventName === 'context') {
+            updateAssistant(() => ({ contextUsed: data || [] }))
+          } else if (eventName === 'token') {
+            receivedTokens = true
+            updateAssistant(message => ({ content: message.content + data }))
+          } else if (eventName === 'error') {
+            setError(data)
+          }
+        }
       }
 
-      setMessages(prev => [...prev, assistantMessage])
+      if (!receivedTokens) {
+        throw new Error('Chat stream ended without a reply')
+      }
     } catch (err) {
       setError('Failed to get response from Mudi. Please try again.')
       console.error('Chat error:', err)
       
       // Add fallback message
+      setMessages(prev => prev.filter(message => message.id !== assistantId))
       const fallbackMessage = {
         id: Date.now() + 1,
         type: 'assistant',
@@ -20,6 +20,7 @@ const JOURNAL_CATEGORIES = [
 
 export default function Journal() {
   const [entries, setEntries] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
   const [loading, setLoading] = useState(true)
   const [isWriting, setIsWriting] = useState(false)
   const [editingId, setEditingId] = useState(null)
@@ -34,10 +35,14 @@ export default function Journal() {
     fetchEntries()
   }, [])
 
-  const fetchEntries = async () => {
+  const fetchEntries = async (cursor = null) => {
     try {
-      const response = await axios.get('/journal')
-      setEntries(response.data)
+      // Newest entries a page at a time; X-Next-Cursor continues the list
+      const response = await axios.get('/journal', {
+        params: cursor ? { limit: 20, cursor } : { limit: 20 }
+      })
+      setEntries(previous => cursor ? [...previous, ...response.data] : response.data)
+      setNextCursor(response.headers['x-next-cursor'] || null)
     } catch (err) {
       setError('Failed to load journal entries')
       console.error('Error fetching entries:', err)
@@ -326,6 +331,14 @@ export default function Journal() {
             </div>
           ))
         )}
+
+        {nextCursor && (
+          <div className="text-center">
+            <button onClick={() => fetchEntries(nextCursor)} className="btn-secondary">
+              Load Older Entries
+            </button>
+          </div>
+        )}
       </div>
     </div>
   )
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import uuid
+import zlib
+
+import numpy as np
+import pytest
+
+# Point the app at a throwaway database before anything imports database.py
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
+
+class FakeEmbeddingModel:
+    """Bag-of-words vectors, so texts sharing words score as similar; stands in for sentence-transformers"""
+
+    dim = 64
+
+    def encode(self, texts, **kwargs):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        vectors = np.zeros((len(batch), self.dim), dtype=np.float32)
+        for row, text in enumerate(batch):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode()) % self.dim] += 1
+        return vectors[0] if single else vectors
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    from database import engine
+    from migrations import migrate
+    migrate(bind=engine)
+
+def _broken_model():
+    raise ImportError("No module named 'sentence_transformers'")
+
+@pytest.fixture
+def client(monkeypatch):
+    """App client signed in as a fresh user; the embedding model never loads, so chat uses the fallback"""
+    from fastapi.testclient import TestClient
+    import main
+    from services import LazyService
+    monkeypatch.setattr(main, "rag_service", LazyService("rag", _broken_model))
+    with TestClient(main.app) as test_client:
+        body = test_client.post("/auth/register", json={
+            "display_name": "test", "email": f"{uuid.uuid4().hex}@example.com", "password": "secret"
+        }).json()
+        test_client.headers["Authorization"] = f"Bearer {body['access_token']}"
+        test_client.user_id = body["user"]["id"]
+        yield test_client
+
+@pytest.fixture
+def rag(tmp_path, monkeypatch):
+    """RAGService on the numpy backend with the fake model; index and collection files live in tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("VECTOR_BACKEND", "numpy")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    import rag_service
+    monkeypatch.setattr(rag_service, "load_embedding_model", lambda model_name: FakeEmbeddingModel())
+    service = rag_service.RAGService()
+    yield service
+    service.retrieval_executor.shutdown()
@@ -0,0 +1,70 @@
+"""Batch art generation: one request queues many entries, validated up front.
+
+    python -m pytest tests
+"""
+import uuid
+
+import pytest
+
+import main
+from art_service import ArtService
+from database import SessionLocal
+from models import JournalEntry, User
+
+@pytest.fixture
+def art(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ART_DISABLE_DIFFUSION", "1")
+    return ArtService()
+
+def test_batch_render_matches_single_renders(art):
+    items = [("sunny walk", "abstract"), ("rainy day", "watercolor"), ("sunny walk", "abstract")]
+    urls = art.render_art_batch(items)
+    assert urls[0] == urls[2]
+    assert urls == [art.render_art(text, style) for text, style in items]
+
+@pytest.fixture
+def submitted(client, monkeypatch):
+    """What the endpoint hands to the job queue; jobs stay queued"""
+    calls = []
+
+    async def submit_batch(user_id, items):
+        calls.append((user_id, items))
+        return [main.art_jobs._new_job(user_id, entry_id, style) for entry_id, _, style in items]
+
+    monkeypatch.setattr(main.art_jobs, "submit_batch", submit_batch)
+    return calls
+
+def _entry(client, text: str) -> int:
+    return client.post("/journal", json={"text": text, "mood_tag": "calm"}).json()["id"]
+
+def test_batch_queues_every_item_in_order(client, submitted):
+    first, second = _entry(client, "sunny walk"), _entry(client, "rainy day")
+    response = client.post("/art/batch", json={"items": [
+        {"entry_id": second, "style": "watercolor"},
+        {"entry_id": first, "style": "abstract"},
+    ]})
+    assert response.status_code == 202
+    assert [job["status"] for job in response.json()["jobs"]] == ["queued", "queued"]
+    assert submitted == [(client.user_id, [(second, "rainy day", "watercolor"), (first, "sunny walk", "abstract")])]
+
+def test_batch_is_validated_before_anything_is_queued(client, submitted, monkeypatch):
+    db = SessionLocal()
+    other = User(display_name="other", email=f"{uuid.uuid4().hex}@example.com", hashed_password="x")
+    db.add(other)
+    db.flush()
+    foreign = JournalEntry(user_id=other.id, text="not yours")
+    db.add(foreign)
+    db.commit()
+    foreign_id = foreign.id
+    db.close()
+    own = _entry(client, "sunny walk")
+
+    assert client.post("/art/batch", json={"items": []}).status_code == 400
+    response = client.post("/art/batch", json={"items": [{"entry_id": own}, {"entry_id": foreign_id}]})
+    assert response.status_code == 404
+    assert str(foreign_id) in response.json()["detail"]
+
+    monkeypatch.setattr(main, "ART_BATCH_MAX_ITEMS", 2)
+    assert client.post("/art/batch", json={"items": [{"entry_id": own}] * 3}).status_code == 400
+    assert submitted == []
@@ -0,0 +1,78 @@
+"""WebP art derivatives and long-lived caching of art files.
+
+    python -m pytest tests
+"""
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+from sqlalchemy.orm import sessionmaker
+
+import art_gc
+from art_service import art_derivative_urls, save_art_image
+from database import create_db_engine
+from main import ArtStaticFiles
+from migrations import migrate
+from models import Art, JournalEntry, User
+
+@pytest.fixture
+def art_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "static" / "art"
+    path.mkdir(parents=True)
+    return str(path)
+
+def _save(art_dir: str, name: str, size=(512, 512)):
+    save_art_image(Image.new("RGB", size, (200, 120, 40)), os.path.join(art_dir, name))
+
+def test_derivatives_are_written_with_the_image(art_dir):
+    _save(art_dir, "art_abc.png", size=(512, 256))
+    assert sorted(os.listdir(art_dir)) == ["art_abc.png", "art_abc_medium.webp", "art_abc_thumb.webp"]
+    with Image.open(os.path.join(art_dir, "art_abc_thumb.webp")) as thumb:
+        assert (thumb.format, thumb.size) == ("WEBP", (128, 64))
+    with Image.open(os.path.join(art_dir, "art_abc_medium.webp")) as medium:
+        assert medium.size == (320, 160)
+
+def test_urls_fall_back_to_the_full_image(art_dir):
+    _save(art_dir, "art_abc.png")
+    assert art_derivative_urls("/static/art/art_abc.png") == {
+        "thumb": "/static/art/art_abc_thumb.webp",
+        "medium": "/static/art/art_abc_medium.webp",
+    }
+    os.remove(os.path.join(art_dir, "art_abc_medium.webp"))
+    assert art_derivative_urls("/static/art/art_abc.png")["medium"] == "/static/art/art_abc.png"
+    assert art_derivative_urls("/static/placeholder.png") == {"thumb": "/static/placeholder.png", "medium": "/static/placeholder.png"}
+
+def test_gc_writes_missing_derivatives_for_referenced_images(art_dir, tmp_path):
+    Image.new("RGB", (400, 400)).save(os.path.join(art_dir, "art_old.png"))
+    Image.new("RGB", (400, 400)).save(os.path.join(art_dir, "art_unused.png"))
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'art.db'}")
+    migrate(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user = User(display_name="test", email="art@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    entry = JournalEntry(user_id=user.id, text="a day")
+    db.add(entry)
+    db.flush()
+    db.add(Art(owner_user_id=user.id, source_entry_id=entry.id, art_url="/static/art/art_old.png"))
+    db.commit()
+
+    assert art_gc.write_missing_derivatives(db, art_dir) == 1
+    assert art_gc.write_missing_derivatives(db, art_dir) == 0
+    assert sorted(os.listdir(art_dir)) == ["art_old.png", "art_old_medium.webp", "art_old_thumb.webp", "art_unused.png"]
+    db.close()
+    engine.dispose()
+
+def test_art_files_are_cached_immutably_and_revalidated(art_dir):
+    _save(art_dir, "art_abc.png")
+    app = FastAPI()
+    app.mount("/static/art", ArtStaticFiles(directory=art_dir), name="art")
+    client = TestClient(app)
+
+    response = client.get("/static/art/art_abc_thumb.webp")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert client.get("/static/art/art_abc_thumb.webp", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
@@ -0,0 +1,116 @@
+"""ArtJobQueue: shared renders, capacity, and callbacks on the event loop.
+
+    python -m pytest tests
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from art_jobs import ArtJobQueue, ArtQueueFull
+
+class FakeArtJobQueue(ArtJobQueue):
+    """Renders are futures the test resolves from another thread, like the pool's management thread"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.renders = []
+        self.forgotten_on = []
+
+    def _submit_render(self, text, style, entry_id):
+        future = Future()
+        self.renders.append(future)
+        return future
+
+    def _submit_batch_render(self, items):
+        future = Future()
+        self.renders.append(future)
+        return future
+
+    def _save_art(self, job, art_url):
+        return 1
+
+    def _save_art_batch(self, rendered):
+        for job, _ in rendered:
+            job["art_id"] = 1
+
+    def _forget_render(self, render_key, future):
+        self.forgotten_on.append(threading.get_ident())
+        super()._forget_render(render_key, future)
+
+def _resolve_off_loop(future: Future, result):
+    thread = threading.Thread(target=future.set_result, args=(result,))
+    thread.start()
+    thread.join()
+
+async def _until(condition, timeout: float = 5):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline
+        await asyncio.sleep(0.01)
+
+def test_identical_jobs_share_one_render():
+    async def scenario():
+        queue = FakeArtJobQueue(max_workers=1, max_queue_size=4)
+        first = await queue.submit(1, 10, "same text", "abstract")
+        second = await queue.submit(1, 11, "same text", "abstract")
+        assert len(queue.renders) == 1
+        assert queue.shared == 1
+
+        _resolve_off_loop(queue.renders[0], "/static/art/a.png")
+        await _until(lambda: first["status"] == second["status"] == "succeeded")
+        await _until(lambda: not queue._in_flight)
+        assert first["art_url"] == second["art_url"] == "/static/art/a.png"
+        return queue
+
+    loop_thread = threading.get_ident()  # asyncio.run runs the loop in this thread
+    queue = asyncio.run(scenario())
+    assert queue.forgotten_on == [loop_thread]
+
+def test_batch_renders_are_forgotten_on_the_loop():
+    async def scenario():
+        queue = FakeArtJobQueue(max_workers=1, max_queue_size=4)
+        jobs = await queue.submit_batch(1, [(10, "one", "abstract"), (11, "two", "abstract"), (12, "one", "abstract")])
+        assert len(queue.renders) == 1
+        assert set(queue._in_flight) == {("one", "abstract"), ("two", "abstract")}
+
+        _resolve_off_loop(queue.renders[0], ["/static/art/1.png", "/static/art/2.png"])
+        await _until(lambda: all(job["status"] == "succeeded" for job in jobs))
+        await _until(lambda: not queue._in_flight)
+        assert [job["art_url"] for job in jobs] == ["/static/art/1.png", "/static/art/2.png", "/static/art/1.png"]
+        return queue
+
+    loop_thread = threading.get_ident()
+    queue = asyncio.run(scenario())
+    assert queue.forgotten_on == [loop_thread, loop_thread]
+
+def test_full_queue_rejects_new_renders_but_not_shared_ones():
+    async def scenario():
+        queue = FakeArtJobQueue(max_workers=1, max_queue_size=1)
+        await queue.submit(1, 10, "one", "abstract")
+        await queue.submit(1, 11, "two", "abstract")
+        with pytest.raises(ArtQueueFull):
+            await queue.submit(1, 12, "three", "abstract")
+        with pytest.raises(ArtQueueFull):
+            await queue.submit_batch(1, [(13, "four", "abstract")])
+
+        # Joining a render already in flight needs no capacity
+        await queue.submit(1, 14, "one", "abstract")
+        assert queue.rejected == 2
+        assert queue.shared == 1
+
+    asyncio.run(scenario())
+
+def test_render_finishing_after_the_loop_closes_is_ignored():
+    queue = FakeArtJobQueue(max_workers=1, max_queue_size=4)
+    called = []
+
+    async def scenario():
+        return queue._on_loop(called.append)
+
+    callback = asyncio.run(scenario())
+    # Like a worker finishing after app shutdown; the pool thread must not see an error
+    callback(Future())
+    assert called == []
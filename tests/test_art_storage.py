@@ -0,0 +1,94 @@
+"""Content-addressed art files: identical renders share a file, and art_gc folds and collects files.
+
+    python -m pytest tests
+"""
+import os
+import time
+
+import pytest
+from PIL import Image
+from sqlalchemy.orm import sessionmaker
+
+import art_gc
+from art_service import ArtService, art_content_key
+from database import create_db_engine
+from migrations import migrate
+from models import Art, JournalEntry, User
+
+@pytest.fixture
+def art(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ART_DISABLE_DIFFUSION", "1")
+    return ArtService()
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'art.db'}")
+    migrate(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+@pytest.fixture
+def art_dir(tmp_path):
+    path = tmp_path / "static" / "art"
+    path.mkdir(parents=True)
+    return str(path)
+
+def _art_rows(db, *names):
+    user = User(display_name="test", email="art@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    entry = JournalEntry(user_id=user.id, text="a day")
+    db.add(entry)
+    db.flush()
+    rows = [Art(owner_user_id=user.id, source_entry_id=entry.id, art_url=f"/static/art/{name}") for name in names]
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+def _image(art_dir: str, name: str, color=(10, 20, 30), age: float = 7200):
+    path = os.path.join(art_dir, name)
+    Image.new("RGB", (8, 8), color).save(path, format="PNG")
+    then = time.time() - age
+    os.utime(path, (then, then))
+    return path
+
+def test_identical_requests_share_one_file(art, monkeypatch):
+    first = art.render_art("a quiet walk", "dreamy")
+    rendered = []
+    monkeypatch.setattr(art, "_generate_placeholder_art", lambda *args, **kwargs: rendered.append(args))
+    assert art.render_art("a quiet walk", "dreamy") == first
+    assert rendered == []
+
+    assert art.render_art("a quiet walk", "surreal") != first
+    assert art_content_key("a quiet walk", "dreamy", "placeholder-1") != art_content_key("a quiet walk", "dreamy", "placeholder-2")
+
+def test_identical_files_are_folded_into_one(db, art_dir):
+    _image(art_dir, "art_a.png")
+    _image(art_dir, "art_b.png")
+    _image(art_dir, "art_c.png", color=(200, 0, 0))
+    rows = _art_rows(db, "art_a.png", "art_b.png", "art_c.png")
+
+    assert art_gc.dedupe_files(db, art_dir, dry_run=True) == 1
+    db.expire_all()
+    assert [row.art_url for row in rows] == ["/static/art/art_a.png", "/static/art/art_b.png", "/static/art/art_c.png"]
+
+    assert art_gc.dedupe_files(db, art_dir) == 1
+    db.expire_all()
+    assert [row.art_url for row in rows] == ["/static/art/art_a.png", "/static/art/art_a.png", "/static/art/art_c.png"]
+
+def test_unreferenced_old_files_are_collected(db, art_dir):
+    _image(art_dir, "art_kept.png")
+    _image(art_dir, "art_kept_thumb.webp")
+    _image(art_dir, "art_orphan.png")
+    _image(art_dir, "art_orphan_thumb.webp")
+    _image(art_dir, "art_just_rendered.png", age=0)
+    _art_rows(db, "art_kept.png")
+
+    assert art_gc.collect_garbage(db, art_dir, min_age=3600, dry_run=True) == 2
+    assert len(os.listdir(art_dir)) == 5
+
+    assert art_gc.collect_garbage(db, art_dir, min_age=3600) == 2
+    assert sorted(os.listdir(art_dir)) == ["art_just_rendered.png", "art_kept.png", "art_kept_thumb.webp"]
@@ -0,0 +1,98 @@
+"""Art wall feed: keyset pages over shared art, the cached first page, and ETags.
+
+    python -m pytest tests
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from art_wall import ArtWallFeed
+from database import create_db_engine
+from migrations import migrate
+from models import Art, JournalEntry, User
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'wall.db'}")
+    migrate(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+@pytest.fixture
+def add_art(db):
+    user = User(display_name="test", email="wall@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    entry = JournalEntry(user_id=user.id, text="a day")
+    db.add(entry)
+    db.commit()
+
+    def add(created_at: datetime, shared: bool = True) -> Art:
+        art = Art(owner_user_id=user.id, source_entry_id=entry.id, art_url="/static/art/a.png",
+                  style="abstract", shared_anonymized=shared, created_at=created_at)
+        db.add(art)
+        db.commit()
+        return art
+    return add
+
+def _ids(page):
+    return [item["id"] for item in json.loads(page.body)]
+
+def test_pages_cover_shared_art_without_duplicates_or_gaps(db, add_art):
+    noon = datetime(2024, 5, 1, 12)
+    shared = [add_art(noon) for _ in range(3)] + [add_art(noon - timedelta(hours=hour)) for hour in (1, 1, 2)]
+    add_art(noon, shared=False)
+    expected = [art.id for art in sorted(shared, key=lambda art: (art.created_at, art.id), reverse=True)]
+
+    feed = ArtWallFeed(page_size=2, max_page_size=10)
+    seen, cursor = [], None
+    while True:
+        page = feed.page(db, cursor)
+        seen += _ids(page)
+        cursor = page.next_cursor
+        if not cursor:
+            break
+    assert seen == expected
+
+    assert _ids(feed.page(db, limit=6)) == expected
+    assert feed.page(db, limit=6).next_cursor is None
+
+def test_first_page_is_cached_until_invalidated(db, add_art):
+    first = add_art(datetime(2024, 5, 1))
+    feed = ArtWallFeed(page_size=20, max_page_size=50)
+    page = feed.page(db)
+    assert feed.page(db) is page
+    assert feed.stats()["hits"] == 1
+
+    second = add_art(datetime(2024, 5, 2))
+    assert _ids(feed.page(db)) == [first.id]
+    feed.invalidate()
+    fresh = feed.page(db)
+    assert _ids(fresh) == [second.id, first.id]
+    assert fresh.etag != page.etag
+
+def test_page_built_across_an_invalidation_is_not_cached(db, add_art, monkeypatch):
+    add_art(datetime(2024, 5, 1))
+    feed = ArtWallFeed(page_size=20, max_page_size=50)
+    query = feed._query
+
+    def query_during_share(*args):
+        page = query(*args)
+        feed.invalidate()
+        return page
+
+    monkeypatch.setattr(feed, "_query", query_during_share)
+    feed.page(db)
+    assert feed.stats()["first_page_cached"] is False
+
+def test_wall_endpoint_answers_not_modified_for_matching_etag(client):
+    response = client.get("/art/wall")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert client.get("/art/wall", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/art/wall", headers={"If-None-Match": '"stale"'}).status_code == 200
+    assert client.get("/art/wall", params={"cursor": "garbage"}).status_code == 400
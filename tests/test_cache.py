@@ -0,0 +1,138 @@
+"""Query embedding, retrieval and reply caches: bounds, expiry and invalidation when the journal changes.
+
+    python -m pytest tests
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+import cache
+from cache import LRUCache, SemanticCache
+from conftest import FakeEmbeddingModel
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+def test_lru_evicts_least_recently_used_entry():
+    lru = LRUCache(max_entries=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+    assert (lru.get("a"), lru.get("b"), lru.get("c")) == (1, None, 3)
+    assert lru.stats()["evictions"] == 1
+
+def test_lru_stays_within_byte_budget():
+    lru = LRUCache(max_entries=100, max_bytes=10, sizeof=len)
+    lru.set("a", "xxxx")
+    lru.set("b", "xxxx")
+    lru.set("c", "xxxx")
+    assert (lru.get("a"), len(lru), lru.current_bytes) == (None, 2, 8)
+    # Values larger than the whole budget are never stored
+    lru.set("huge", "x" * 11)
+    assert (lru.get("huge"), len(lru)) == (None, 2)
+
+def test_lru_entries_expire(clock):
+    lru = LRUCache(ttl_seconds=60)
+    lru.set("a", 1)
+    clock[0] += 59
+    assert lru.get("a") == 1
+    clock[0] += 2
+    assert (lru.get("a"), len(lru)) == (None, 0)
+
+def test_lru_invalidate_by_predicate():
+    lru = LRUCache()
+    for key in [(1, "x"), (1, "y"), (2, "x")]:
+        lru.set(key, key)
+    assert lru.invalidate(lambda key: key[0] == 1) == 2
+    assert lru.get((2, "x")) == (2, "x")
+
+def _index(rag, user_id: int, entry_id: int, text: str):
+    rag.vector_store.upsert(
+        [f"entry-{entry_id}"],
+        np.stack([FakeEmbeddingModel().encode(text)]),
+        [text],
+        [{"user_id": user_id, "created_at": "2024-05-01T09:00:00", "mood_tag": "calm"}]
+    )
+
+def test_retrieval_is_cached_per_user_and_normalized_query(rag):
+    _index(rag, 1, 1, "walked the dog in the park")
+    first = asyncio.run(rag.retrieve_relevant_context("Dog  park", 1))
+    assert "walked the dog" in first[0]
+
+    encodes = rag.query_embedding_cache.stats()["misses"]
+    assert asyncio.run(rag.retrieve_relevant_context("dog park", 1)) == first
+    assert rag.context_cache.stats()["hits"] == 1
+    assert rag.query_embedding_cache.stats()["misses"] == encodes
+
+    # Another user shares the query embedding but never the retrieved snippets
+    assert asyncio.run(rag.retrieve_relevant_context("dog park", 2)) == []
+    assert rag.query_embedding_cache.stats()["hits"] == 1
+
+def test_journal_change_invalidates_only_that_user(rag):
+    _index(rag, 1, 1, "walked the dog in the park")
+    _index(rag, 2, 2, "walked the dog by the river")
+    asyncio.run(rag.retrieve_relevant_context("dog", 1))
+    asyncio.run(rag.retrieve_relevant_context("dog", 2))
+
+    _index(rag, 1, 3, "the dog chased a ball")
+    rag.invalidate_user(1)
+    assert len(asyncio.run(rag.retrieve_relevant_context("dog", 1))) == 2
+    assert rag.context_cache.get((2, "dog", 4)) is not None
+
+def test_results_from_before_a_journal_change_are_not_cached(rag, monkeypatch):
+    _index(rag, 1, 1, "walked the dog in the park")
+    query = rag.vector_store.query
+
+    def query_during_edit(*args):
+        hits = query(*args)
+        rag.invalidate_user(1)
+        return hits
+
+    monkeypatch.setattr(rag.vector_store, "query", query_during_edit)
+    assert asyncio.run(rag.retrieve_relevant_context("dog", 1))
+    assert rag.context_cache.get((1, "dog", 4)) is None
+
+def test_semantic_cache_reuses_replies_for_close_queries_with_same_key():
+    semantic = SemanticCache(threshold=0.9)
+    semantic.set(1, [1.0, 0.0], "ctx", "reply")
+    assert semantic.get(1, [0.95, 0.1], "ctx") == "reply"
+    assert semantic.get(1, [0.5, 0.5], "ctx") is None
+    # Different retrieved context or mode, or another user, never shares a reply
+    assert semantic.get(1, [1.0, 0.0], "other ctx") is None
+    assert semantic.get(2, [1.0, 0.0], "ctx") is None
+
+def test_semantic_cache_bounds_and_expiry(clock):
+    semantic = SemanticCache(threshold=0.99, max_entries_per_user=2, max_users=2, ttl_seconds=60)
+    semantic.set(1, [1.0, 0.0, 0.0], "k", "a")
+    semantic.set(1, [0.0, 1.0, 0.0], "k", "b")
+    semantic.set(1, [0.0, 0.0, 1.0], "k", "c")
+    assert semantic.get(1, [1.0, 0.0, 0.0], "k") is None
+    assert semantic.get(1, [0.0, 1.0, 0.0], "k") == "b"
+
+    semantic.set(2, [1.0, 0.0, 0.0], "k", "x")
+    semantic.set(3, [1.0, 0.0, 0.0], "k", "y")
+    assert semantic.stats()["users"] == 2
+    assert semantic.get(1, [0.0, 1.0, 0.0], "k") is None
+
+    clock[0] += 61
+    assert semantic.get(3, [1.0, 0.0, 0.0], "k") is None
+
+def test_reply_cache_is_dropped_when_the_journal_changes(rag):
+    rag.llm_gateway = object()
+    lookup = asyncio.run(rag._response_cache_lookup("how was my week", 1, ["[2024-05-01] walk"], "companion", False))
+    rag._store_response(lookup, "It sounds like a calm week.")
+    assert rag._cached_response(lookup) == "It sounds like a calm week."
+
+    rag.invalidate_user(1)
+    assert rag._cached_response(lookup) is None
+
+    # A reply generated across a journal change is not stored
+    stale = asyncio.run(rag._response_cache_lookup("how was my week", 1, ["[2024-05-01] walk"], "companion", False))
+    rag.invalidate_user(1)
+    rag._store_response(stale, "It sounds like a calm week.")
+    assert rag._cached_response(stale) is None
@@ -0,0 +1,35 @@
+"""/chat/stream degrades to the rule-based reply instead of failing.
+
+    python -m pytest tests
+"""
+import asyncio
+import json
+
+from rag_service import RAGService, fallback_response
+
+def _events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+def test_stream_falls_back_when_the_model_fails_to_load(client):
+    response = client.post("/chat/stream", json={"message": "I feel so happy today"})
+    assert response.status_code == 200
+
+    events = _events(response.text)
+    assert events[0] == ("context", [])
+    assert [event for event, _ in events[1:-1]] == ["token"] * (len(events) - 2)
+    assert "".join(data for _, data in events[1:-1]) == fallback_response("I feel so happy today", [], False)
+    assert events[-1] == ("done", None)
+
+def test_failed_cache_lookup_does_not_break_the_reply():
+    rag = RAGService.__new__(RAGService)
+    rag.llm_gateway = object()
+
+    async def broken_embed(text):
+        raise RuntimeError("encoder crashed")
+    rag._embed_query = broken_embed
+
+    assert asyncio.run(rag._response_cache_lookup("hello", 1, [], "supportive", False)) is None
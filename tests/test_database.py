@@ -0,0 +1,31 @@
+"""Sync and async engines reach the same database.
+
+    python -m pytest tests
+"""
+import asyncio
+
+from sqlalchemy import text
+
+from database import async_database_url, create_async_db_engine, create_db_engine
+
+def test_async_url_uses_asyncio_drivers():
+    assert async_database_url("sqlite:///./data/mudi.db") == "sqlite+aiosqlite:///./data/mudi.db"
+    assert async_database_url("postgresql://mudi:secret@db/mudi") == "postgresql+asyncpg://mudi:secret@db/mudi"
+    assert async_database_url("sqlite+aiosqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+
+def test_async_engine_sees_sync_writes(tmp_path):
+    url = f"sqlite:///{tmp_path / 'shared.db'}"
+    sync_engine = create_db_engine(url)
+    with sync_engine.begin() as conn:
+        conn.execute(text("CREATE TABLE notes (body TEXT)"))
+        conn.execute(text("INSERT INTO notes VALUES ('written sync')"))
+
+    async def read():
+        async_engine = create_async_db_engine(url)
+        async with async_engine.connect() as conn:
+            rows = (await conn.execute(text("SELECT body FROM notes"))).scalars().all()
+        await async_engine.dispose()
+        return rows
+
+    assert asyncio.run(read()) == ["written sync"]
+    sync_engine.dispose()
@@ -0,0 +1,119 @@
+"""Embedding pipeline: journal writes are embedded in micro-batches off the request path.
+
+    python -m pytest tests
+"""
+import asyncio
+import uuid
+
+import pytest
+
+from database import SessionLocal
+from embedding_pipeline import EmbeddingPipeline, queue_vector_sync
+from models import EmbeddingMetadata, JournalEntry, User, VectorOutbox
+from services import LazyService
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    session.query(VectorOutbox).delete()
+    session.commit()
+    yield session
+    session.close()
+
+@pytest.fixture
+def encode_calls(rag):
+    """Number of texts in each encode call the service makes"""
+    calls = []
+    encode = rag.embedding_model.encode
+
+    def counting_encode(texts, **kwargs):
+        calls.append(1 if isinstance(texts, str) else len(texts))
+        return encode(texts, **kwargs)
+
+    rag.embedding_model.encode = counting_encode
+    return calls
+
+def _ready(rag) -> LazyService:
+    service = LazyService("rag", lambda: rag)
+    service.get()
+    return service
+
+def _write_entries(db, count: int):
+    user = User(display_name="test", email=f"{uuid.uuid4().hex}@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    entries = [JournalEntry(user_id=user.id, text=f"day {index} was fine", mood_tag="calm") for index in range(count)]
+    db.add_all(entries)
+    db.flush()
+    for entry in entries:
+        queue_vector_sync(db, entry, "upsert")
+    db.commit()
+    return entries
+
+def test_queued_writes_are_embedded_together(db, rag, encode_calls):
+    entries = _write_entries(db, 10)
+    pipeline = EmbeddingPipeline(_ready(rag), max_batch_size=4)
+    while pipeline._process_batch():
+        pass
+
+    assert encode_calls == [4, 4, 2]
+    ids = [entry.id for entry in entries]
+    assert db.query(EmbeddingMetadata).filter(EmbeddingMetadata.entry_id.in_(ids)).count() == 10
+    assert pipeline.stats()["largest_batch_size"] == 4
+
+def test_repeated_changes_to_an_entry_collapse(db, rag, encode_calls):
+    kept, removed = _write_entries(db, 2)
+    for _ in range(2):
+        queue_vector_sync(db, kept, "upsert")
+    queue_vector_sync(db, removed, "delete")
+    db.delete(removed)
+    db.commit()
+
+    EmbeddingPipeline(_ready(rag))._process_batch()
+    # One embedding for the entry written three times, none for the deleted one
+    assert encode_calls == [1]
+    rows = db.query(EmbeddingMetadata).filter(EmbeddingMetadata.entry_id.in_([kept.id, removed.id])).all()
+    assert [row.entry_id for row in rows] == [kept.id]
+
+def test_unchanged_text_is_not_embedded_again(db, rag, encode_calls):
+    entry, = _write_entries(db, 1)
+    pipeline = EmbeddingPipeline(_ready(rag))
+    pipeline._process_batch()
+
+    queue_vector_sync(db, entry, "upsert")
+    db.commit()
+    pipeline._process_batch()
+    assert encode_calls == [1]
+
+def test_rows_wait_while_the_model_cannot_load(db):
+    _write_entries(db, 3)
+
+    def broken_model():
+        raise ImportError("No module named 'sentence_transformers'")
+
+    pipeline = EmbeddingPipeline(LazyService("rag", broken_model))
+    assert pipeline._process_batch() == 0
+    assert db.query(VectorOutbox).filter(VectorOutbox.attempts.isnot(None)).count() == 0
+    assert pipeline.stats()["queue_depth"] == 3
+
+def test_worker_flushes_a_burst_of_writes_in_few_batches(db, rag, encode_calls):
+    async def scenario():
+        pipeline = EmbeddingPipeline(_ready(rag), max_batch_size=32, max_delay_ms=200, poll_interval=30)
+        pipeline.start()
+        await asyncio.sleep(0.05)
+
+        # Writes arriving one by one within the batch delay
+        for _ in range(12):
+            _write_entries(db, 1)
+            pipeline.notify()
+            await asyncio.sleep(0.005)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + 10
+        while pipeline.stats()["queue_depth"]:
+            assert loop.time() < deadline
+            await asyncio.sleep(0.02)
+        await pipeline.stop()
+
+    asyncio.run(scenario())
+    assert sum(encode_calls) == 12
+    assert len(encode_calls) <= 2
@@ -0,0 +1,107 @@
+"""Per-user push events: EventBus delivery and the /events stream.
+
+    python -m pytest tests
+"""
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import main
+from events import EventBus, InProcessBroker
+
+async def _next(subscription, timeout: float = 5):
+    return await asyncio.wait_for(subscription.get(), timeout)
+
+def test_events_reach_only_the_users_subscribers():
+    async def scenario():
+        bus = EventBus()
+        bus.start()
+        async with bus.subscribe(1) as mine, bus.subscribe(1) as my_other_tab, bus.subscribe(2) as theirs:
+            bus.publish(1, "journal", {"entry_id": 7})
+            for subscription in (mine, my_other_tab):
+                message = await _next(subscription)
+                assert (message["event"], message["data"]) == ("journal", {"entry_id": 7})
+            assert theirs.empty()
+        assert bus.stats()["channels"] == 0
+        assert bus.stats()["delivered"] == 2
+
+    asyncio.run(scenario())
+
+def test_publish_from_a_worker_thread_is_delivered_on_the_loop():
+    async def scenario():
+        bus = EventBus()
+        bus.start()
+        async with bus.subscribe(1) as subscription:
+            thread = threading.Thread(target=bus.publish, args=(1, "art", {"status": "succeeded"}))
+            thread.start()
+            thread.join()
+            assert (await _next(subscription))["data"] == {"status": "succeeded"}
+
+    asyncio.run(scenario())
+
+def test_publish_before_start_or_after_the_loop_closes_is_dropped():
+    bus = EventBus()
+    bus.publish(1, "journal", {})
+
+    async def scenario():
+        bus.start()
+
+    asyncio.run(scenario())
+    bus.publish(1, "journal", {})
+    assert bus.stats()["published"] == 0
+
+def test_a_slow_subscriber_loses_its_oldest_messages():
+    async def scenario():
+        bus = EventBus(InProcessBroker(queue_size=2))
+        bus.start()
+        async with bus.subscribe(1) as subscription:
+            for n in range(3):
+                bus.publish(1, "journal", {"n": n})
+            assert [(await _next(subscription))["data"]["n"] for _ in range(2)] == [1, 2]
+        assert bus.stats()["dropped"] == 1
+
+    asyncio.run(scenario())
+
+def test_stream_sends_ready_heartbeats_and_events(monkeypatch):
+    bus = EventBus()
+    monkeypatch.setattr(main, "event_bus", bus)
+    monkeypatch.setattr(main, "EVENTS_HEARTBEAT", 0.01)
+
+    async def scenario():
+        bus.start()
+        response = await main.stream_events(current_user=SimpleNamespace(id=5))
+        stream = response.body_iterator
+        assert await stream.__anext__() == "retry: 5000\nevent: ready\ndata: {}\n\n"
+        assert await stream.__anext__() == ": keep-alive\n\n"
+        bus.publish(5, "journal", {"action": "created", "entry_id": 3})
+        chunk = await stream.__anext__()
+        while chunk == ": keep-alive\n\n":
+            chunk = await stream.__anext__()
+        assert chunk == 'event: journal\ndata: {"action": "created", "entry_id": 3}\n\n'
+        await stream.aclose()
+        # Disconnecting unsubscribes
+        assert bus.stats()["subscribers"] == 0
+
+    asyncio.run(scenario())
+
+class RecordingBus(EventBus):
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    def publish(self, user_id, event, data):
+        self.published.append((user_id, event, data))
+
+def test_journal_writes_publish_events(client, monkeypatch):
+    bus = RecordingBus()
+    monkeypatch.setattr(main, "event_bus", bus)
+    entry = client.post("/journal", json={"text": "morning walk", "mood_tag": "happy"}).json()
+    client.put(f"/journal/{entry['id']}", json={"mood_tag": "calm"})
+    client.delete(f"/journal/{entry['id']}")
+
+    assert [(user_id, event, data["action"], data["entry_id"]) for user_id, event, data in bus.published] == [
+        (client.user_id, "journal", "created", entry["id"]),
+        (client.user_id, "journal", "updated", entry["id"]),
+        (client.user_id, "journal", "deleted", entry["id"]),
+    ]
+    assert bus.published[1][2]["mood_tag"] == "calm"
@@ -0,0 +1,132 @@
+"""LLM gateway: concurrency cap, deadlines, retries and stream cleanup against a fake upstream.
+
+    python -m pytest tests
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+from llm_gateway import LLMGateway, LLMUnavailable
+
+def _completion(text: str) -> dict:
+    return {
+        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "test",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15}
+    }
+
+def _stream(tokens) -> str:
+    chunks = [
+        {"id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0, "model": "test",
+         "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+        for token in tokens
+    ]
+    return "".join(f"data: {json.dumps(chunk)}\n\n" for chunk in chunks) + "data: [DONE]\n\n"
+
+class FakeUpstream:
+    """Chat completions endpoint; each request takes the next scripted reply"""
+
+    def __init__(self, *replies, delay: float = 0):
+        self.replies = list(replies)
+        self.delay = delay
+        self.requests = 0
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        status, body = self.replies.pop(0) if len(self.replies) > 1 else self.replies[0]
+        if json.loads(request.content).get("stream"):
+            return httpx.Response(status, text=body, headers={"content-type": "text/event-stream"})
+        return httpx.Response(status, json=body)
+
+def _gateway(upstream: FakeUpstream, **kwargs) -> LLMGateway:
+    options = {"api_key": "test", "base_url": "http://llm.test/v1", "timeout": 2, "max_retries": 2, "backoff_base": 0.01}
+    options.update(kwargs)
+    gateway = LLMGateway(**options)
+    gateway.client = AsyncOpenAI(
+        api_key="test", base_url="http://llm.test/v1", max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+    )
+    return gateway
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+def test_completion_and_usage_are_recorded():
+    upstream = FakeUpstream((200, _completion("  Hi there.  ")))
+
+    async def scenario():
+        gateway = _gateway(upstream)
+        return await gateway.complete(MESSAGES), gateway.stats()
+
+    text, stats = asyncio.run(scenario())
+    assert text == "Hi there."
+    assert (stats["calls"], stats["prompt_tokens"], stats["completion_tokens"]) == (1, 12, 3)
+
+def test_concurrent_calls_are_capped():
+    upstream = FakeUpstream((200, _completion("ok")), delay=0.05)
+
+    async def scenario():
+        gateway = _gateway(upstream, max_concurrency=2)
+        return await asyncio.gather(*(gateway.complete(MESSAGES) for _ in range(6)))
+
+    assert asyncio.run(scenario()) == ["ok"] * 6
+    assert upstream.peak == 2
+
+def test_slow_upstream_hits_the_deadline():
+    upstream = FakeUpstream((200, _completion("late")), delay=5)
+
+    async def scenario():
+        gateway = _gateway(upstream, timeout=0.2)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with pytest.raises(LLMUnavailable):
+            await gateway.complete(MESSAGES)
+        return loop.time() - started, gateway.stats()
+
+    elapsed, stats = asyncio.run(scenario())
+    assert elapsed < 1
+    assert (stats["deadline_exceeded"], stats["in_flight"]) == (1, 0)
+
+def test_transient_errors_are_retried_but_client_errors_are_not():
+    flaky = FakeUpstream((503, {"error": {"message": "overloaded"}}), (200, _completion("recovered")))
+    rejected = FakeUpstream((400, {"error": {"message": "bad request"}}))
+
+    async def scenario():
+        gateway = _gateway(flaky)
+        text = await gateway.complete(MESSAGES)
+        with pytest.raises(LLMUnavailable):
+            await _gateway(rejected).complete(MESSAGES)
+        return text, gateway.stats()["retries"]
+
+    assert asyncio.run(scenario()) == ("recovered", 1)
+    assert (flaky.requests, rejected.requests) == (2, 1)
+
+def test_stream_yields_tokens_and_frees_the_slot_when_abandoned():
+    stream = (200, _stream(["Take ", "a ", "breath."]))
+    upstream = FakeUpstream(stream, stream, (200, _completion("ok")))
+
+    async def scenario():
+        gateway = _gateway(upstream, max_concurrency=1)
+        tokens = [token async for token in gateway.stream(MESSAGES)]
+
+        abandoned = gateway.stream(MESSAGES)
+        first = await abandoned.__anext__()
+        await abandoned.aclose()
+        # The only slot is free again, so another call goes through
+        again = await asyncio.wait_for(gateway.complete(MESSAGES), 1)
+        return tokens, first, again, gateway.stats()
+
+    tokens, first, again, stats = asyncio.run(scenario())
+    assert tokens == ["Take ", "a ", "breath."]
+    assert (first, again) == ("Take ", "ok")
+    assert (stats["cancelled_streams"], stats["in_flight"]) == (1, 0)
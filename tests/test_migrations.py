@@ -0,0 +1,52 @@
+"""Upgrading a database created by the first release.
+
+    python -m pytest tests
+"""
+import os
+import shutil
+
+import pytest
+from sqlalchemy import inspect, text
+
+from database import create_db_engine
+from migrations import MIGRATIONS, check_query_plans, migrate
+
+SHIPPED_DB = os.path.join(os.path.dirname(__file__), "..", "data", "mudi.db")
+
+@pytest.fixture
+def old_engine(tmp_path):
+    path = tmp_path / "old.db"
+    shutil.copy(SHIPPED_DB, path)
+    db_engine = create_db_engine(f"sqlite:///{path}")
+    yield db_engine
+    db_engine.dispose()
+
+def _columns(engine, table_name: str) -> set:
+    return {column["name"] for column in inspect(engine).get_columns(table_name)}
+
+def test_first_release_database_upgrades(old_engine):
+    with old_engine.begin() as conn:
+        entries = conn.execute(text("SELECT COUNT(*) FROM journal_entries")).scalar()
+        mood_days = conn.execute(text(
+            "SELECT COUNT(DISTINCT user_id || date(created_at)) FROM journal_entries WHERE mood_tag IS NOT NULL"
+        )).scalar()
+
+    assert migrate(bind=old_engine) == [version for version, _, _ in MIGRATIONS]
+    assert {"category"} <= _columns(old_engine, "journal_entries")
+    assert {"collection", "text_hash"} <= _columns(old_engine, "embedding_metadata")
+    assert {"journal_updated_at"} <= _columns(old_engine, "users")
+    assert check_query_plans(old_engine) == {}
+
+    with old_engine.begin() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM journal_entries")).scalar() == entries
+        assert conn.execute(text("SELECT COUNT(*) FROM daily_mood_rollups")).scalar() == mood_days
+    assert migrate(bind=old_engine) == []
+
+def test_migration_1_adds_only_its_frozen_columns(old_engine):
+    _, _, late_columns = MIGRATIONS[0]
+    with old_engine.begin() as conn:
+        late_columns(conn)
+    assert "category" in _columns(old_engine, "journal_entries")
+    assert {"collection", "text_hash"} <= _columns(old_engine, "embedding_metadata")
+    # Added by migration 3, not by migration 1 following the current models
+    assert "journal_updated_at" not in _columns(old_engine, "users")
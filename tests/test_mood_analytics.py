@@ -0,0 +1,108 @@
+"""Mood analytics on a small journal whose results are worked out by hand.
+
+    python -m pytest tests
+"""
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import mood_analytics
+from database import SessionLocal
+from models import JournalEntry, User
+from mood_analytics import analytics_range, load_entries
+
+ENTRIES = [
+    (datetime(2024, 4, 30, 23, 59), "happy", "general", "outside the range"),
+    (datetime(2024, 5, 1, 9), "happy", "general", "sunny walk sunny park"),
+    (datetime(2024, 5, 2, 20), "happy", "general", "dinner with friends"),
+    (datetime(2024, 5, 2, 21), "sad", "rant", "terrible meeting meeting today"),
+    (datetime(2024, 5, 4, 3), "sad", "rant", "meeting again terrible"),
+    (datetime(2024, 5, 5, 13), None, None, "no mood given"),
+    (datetime(2024, 5, 5, 14), "calm", "goals", "quiet evening"),
+    (datetime(2024, 5, 6), "sad", "rant", "outside the range"),
+]
+START, END = date(2024, 5, 1), date(2024, 5, 5)
+
+@pytest.fixture(scope="module")
+def user_id():
+    db = SessionLocal()
+    user = User(display_name="test", email=f"{uuid.uuid4().hex}@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    new_user_id = user.id
+    db.add_all([
+        JournalEntry(user_id=new_user_id, created_at=created_at, mood_tag=mood, category=category, text=text)
+        for created_at, mood, category, text in ENTRIES
+    ])
+    db.commit()
+    db.close()
+    return new_user_id
+
+def _analytics(user_id: int, with_text: bool = False) -> dict:
+    db = SessionLocal()
+    try:
+        return mood_analytics.mood_analytics(load_entries(db, user_id, START, END, with_text), START, END)
+    finally:
+        db.close()
+
+def test_totals_streaks_and_transitions(user_id):
+    result = _analytics(user_id)
+    assert result["total_entries"] == 6
+    assert result["mood_counts"] == {"happy": 2, "sad": 2, "calm": 1}
+    assert result["average_mood_score"] == 3.0
+    assert result["streaks"] == {
+        "current_days": 2,
+        "longest_days": 2,
+        "longest_start": date(2024, 5, 1),
+        "longest_end": date(2024, 5, 2),
+        "longest_mood_run": {"mood": "happy", "entries": 2},
+    }
+    assert result["transitions"] == {
+        "moods": ["calm", "happy", "sad"],
+        "counts": [[0, 0, 0], [0, 1, 1], [1, 0, 1]],
+        "probabilities": [[0.0, 0.0, 0.0], [0.0, 0.5, 0.5], [0.5, 0.0, 0.5]],
+    }
+
+def test_rolling_weekly_series(user_id):
+    assert _analytics(user_id)["rolling_weekly"] == [
+        {"day": date(2024, 5, 1), "entries": 1, "average_mood_score": 5.0, "weekly_distribution": {"happy": 1.0}},
+        {"day": date(2024, 5, 2), "entries": 2, "average_mood_score": 3.0, "weekly_distribution": {"happy": 0.667, "sad": 0.333}},
+        {"day": date(2024, 5, 3), "entries": 0, "average_mood_score": None, "weekly_distribution": {"happy": 0.667, "sad": 0.333}},
+        {"day": date(2024, 5, 4), "entries": 1, "average_mood_score": 1.0, "weekly_distribution": {"happy": 0.5, "sad": 0.5}},
+        {"day": date(2024, 5, 5), "entries": 2, "average_mood_score": 3.0, "weekly_distribution": {"calm": 0.2, "happy": 0.4, "sad": 0.4}},
+    ]
+
+def test_long_ranges_are_sampled(user_id, monkeypatch):
+    monkeypatch.setattr(mood_analytics, "ANALYTICS_MAX_POINTS", 3)
+    days = [point["day"] for point in _analytics(user_id)["rolling_weekly"]]
+    assert days == [date(2024, 5, 1), date(2024, 5, 3), date(2024, 5, 5)]
+
+def test_category_weekday_and_time_of_day_patterns(user_id):
+    result = _analytics(user_id)
+    assert result["category_by_mood"] == {"general": {"happy": 2}, "goals": {"calm": 1}, "rant": {"sad": 2}}
+    weekdays = {day["weekday"]: day for day in result["weekdays"]}
+    assert weekdays["Wednesday"] == {"weekday": "Wednesday", "entries": 1, "average_mood_score": 5.0, "top_mood": "happy"}
+    assert weekdays["Saturday"] == {"weekday": "Saturday", "entries": 1, "average_mood_score": 1.0, "top_mood": "sad"}
+    assert weekdays["Sunday"] == {"weekday": "Sunday", "entries": 2, "average_mood_score": 3.0, "top_mood": "calm"}
+    assert weekdays["Monday"] == {"weekday": "Monday", "entries": 0, "average_mood_score": None, "top_mood": None}
+    assert result["time_of_day"] == {"night": 1, "morning": 1, "afternoon": 2, "evening": 2}
+
+def test_keywords_only_when_text_is_loaded(user_id):
+    assert "keywords" not in _analytics(user_id)
+    assert _analytics(user_id, with_text=True)["keywords"] == {"negative": ["meeting", "terrible"], "positive": ["sunny"]}
+
+def test_range_defaults_and_validation():
+    days = mood_analytics.ANALYTICS_DEFAULT_DAYS
+    assert analytics_range(None, END) == (END - timedelta(days=days - 1), END)
+    assert analytics_range(START, END) == (START, END)
+    with pytest.raises(ValueError):
+        analytics_range(date(2024, 5, 2), date(2024, 5, 1))
+
+def test_endpoint_handles_an_empty_journal(client):
+    response = client.get("/analytics/moods", params={"start": "2024-05-01", "end": "2024-05-05"})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["total_entries"], body["mood_counts"], body["average_mood_score"]) == (0, {}, None)
+    assert len(body["rolling_weekly"]) == 5
+    assert client.get("/analytics/moods", params={"start": "2024-05-05", "end": "2024-05-01"}).status_code == 400
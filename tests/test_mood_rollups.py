@@ -0,0 +1,92 @@
+"""Daily mood rollups stay equal to a recount of the journal after every write.
+
+    python -m pytest tests
+"""
+import uuid
+from datetime import datetime, timedelta
+
+from database import SessionLocal
+from models import JournalEntry, User
+from mood_rollups import build_calendar, calendar_query, calendar_since, day_key, refresh_daily_mood
+
+def recount(db, user_id: int):
+    """What /calendar computed from the journal before rollups existed"""
+    since = datetime.strptime(calendar_since(), "%Y-%m-%d")
+    entries = db.query(JournalEntry)\
+        .filter(JournalEntry.user_id == user_id, JournalEntry.created_at >= since, JournalEntry.mood_tag.isnot(None))\
+        .order_by(JournalEntry.created_at, JournalEntry.id).all()
+    daily_moods, mood_counts = {}, {}
+    for entry in entries:
+        daily_moods[day_key(entry.created_at)] = entry.mood_tag
+        mood_counts[entry.mood_tag] = mood_counts.get(entry.mood_tag, 0) + 1
+    return daily_moods, mood_counts
+
+def rolled_up(db, user_id: int):
+    return build_calendar(db.execute(calendar_query(user_id, calendar_since())))
+
+def test_rollups_match_a_recount_after_creates_updates_and_deletes():
+    db = SessionLocal()
+    user = User(display_name="test", email=f"{uuid.uuid4().hex}@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+
+    def write(entry, delete=False):
+        if delete:
+            db.delete(entry)
+        else:
+            db.add(entry)
+        db.flush()
+        refresh_daily_mood(db, user, day_key(entry.created_at))
+        db.commit()
+
+    today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+    yesterday = today - timedelta(days=1)
+    entries = [
+        JournalEntry(user_id=user.id, text="a", mood_tag="happy", created_at=yesterday),
+        # Same timestamp: the later id is the day's latest mood
+        JournalEntry(user_id=user.id, text="b", mood_tag="sad", created_at=yesterday),
+        JournalEntry(user_id=user.id, text="c", mood_tag="calm", created_at=today - timedelta(hours=2)),
+        JournalEntry(user_id=user.id, text="d", mood_tag="happy", created_at=today),
+        JournalEntry(user_id=user.id, text="e", mood_tag=None, created_at=today + timedelta(minutes=1)),
+    ]
+    for entry in entries:
+        write(entry)
+    assert rolled_up(db, user.id) == recount(db, user.id)
+    assert rolled_up(db, user.id)[0] == {day_key(yesterday): "sad", day_key(today): "happy"}
+
+    entries[3].mood_tag = "anxious"
+    write(entries[3])
+    assert rolled_up(db, user.id) == recount(db, user.id)
+
+    write(entries[1], delete=True)
+    assert rolled_up(db, user.id) == recount(db, user.id)
+    assert rolled_up(db, user.id)[0][day_key(yesterday)] == "happy"
+
+    # Removing a day's last mood removes the day
+    write(entries[0], delete=True)
+    assert rolled_up(db, user.id) == recount(db, user.id)
+    assert day_key(yesterday) not in rolled_up(db, user.id)[0]
+    db.close()
+
+def test_calendar_follows_journal_writes_and_revalidates(client):
+    today = day_key(datetime.utcnow())
+    first = client.post("/journal", json={"text": "morning walk", "mood_tag": "happy"}).json()
+    second = client.post("/journal", json={"text": "long meeting", "mood_tag": "sad"}).json()
+
+    response = client.get("/calendar")
+    assert response.json() == {"daily_moods": {today: "sad"}, "mood_insights": {"happy": 1, "sad": 1}}
+    etag = response.headers["ETag"]
+    assert client.get("/calendar", headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(f"/journal/{first['id']}", json={"mood_tag": "calm"})
+    response = client.get("/calendar", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["mood_insights"] == {"calm": 1, "sad": 1}
+    etag = response.headers["ETag"]
+
+    client.delete(f"/journal/{second['id']}")
+    response = client.get("/calendar", headers={"If-None-Match": etag})
+    assert response.json() == {"daily_moods": {today: "calm"}, "mood_insights": {"calm": 1}}
+
+    client.delete(f"/journal/{first['id']}")
+    assert client.get("/calendar").json() == {"daily_moods": {}, "mood_insights": {}}
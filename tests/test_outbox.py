@@ -0,0 +1,125 @@
+"""Vector outbox: journal changes reach the vector store, failing rows are isolated.
+
+    python -m pytest tests
+"""
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import FakeEmbeddingModel
+from database import SessionLocal
+from embedding_pipeline import EmbeddingPipeline, queue_vector_sync
+from models import EmbeddingMetadata, JournalEntry, User, VectorOutbox
+from services import LazyService
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    session.query(VectorOutbox).delete()
+    session.commit()
+    yield session
+    session.close()
+
+def _user(db) -> User:
+    user = User(display_name="test", email=f"{uuid.uuid4().hex}@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+def _search(rag, user_id: int, text: str):
+    return rag.vector_store.query(FakeEmbeddingModel().encode(text), user_id, 5)
+
+def test_creates_edits_retags_and_deletes_reach_the_vector_store(db, rag):
+    service = LazyService("rag", lambda: rag)
+    service.get()
+    pipeline = EmbeddingPipeline(service)
+    user = _user(db)
+
+    entry = JournalEntry(user_id=user.id, text="walked the dog in the park", mood_tag="happy")
+    db.add(entry)
+    db.flush()
+    queue_vector_sync(db, entry, "upsert")
+    db.commit()
+    assert pipeline._process_batch() == 1
+    hits = _search(rag, user.id, "dog park")
+    assert [(hit["id"], hit["document"]) for hit in hits] == [(f"entry-{entry.id}", "walked the dog in the park")]
+
+    # An edit re-embeds the entry under the same vector id
+    entry.text = "baked bread all afternoon"
+    queue_vector_sync(db, entry, "upsert")
+    db.commit()
+    pipeline._process_batch()
+    hits = _search(rag, user.id, "baked bread")
+    assert [(hit["id"], hit["document"]) for hit in hits] == [(f"entry-{entry.id}", "baked bread all afternoon")]
+
+    # A mood change alone only updates the stored metadata
+    entry.mood_tag = "calm"
+    queue_vector_sync(db, entry, "upsert")
+    db.commit()
+    pipeline._process_batch()
+    assert _search(rag, user.id, "bread")[0]["metadata"]["mood_tag"] == "calm"
+    assert db.query(EmbeddingMetadata).filter(EmbeddingMetadata.entry_id == entry.id).one().mood_tag == "calm"
+
+    entry_id = entry.id
+    queue_vector_sync(db, entry, "delete")
+    db.delete(entry)
+    db.commit()
+    pipeline._process_batch()
+    assert _search(rag, user.id, "baked bread") == []
+    assert db.query(EmbeddingMetadata).filter(EmbeddingMetadata.entry_id == entry_id).count() == 0
+    assert db.query(VectorOutbox).count() == 0
+
+class FailingRag:
+    """Stands in for RAGService; syncing BAD_ENTRY always raises"""
+
+    BAD_ENTRY = 900013
+
+    def __init__(self):
+        self.synced = []
+
+    def check_active_collection(self):
+        pass
+
+    def sync_entries(self, changes, db):
+        if any(entry_id == self.BAD_ENTRY for _, entry_id, _ in changes):
+            raise RuntimeError("cannot embed this entry")
+        self.synced += [entry_id for _, entry_id, _ in changes]
+        db.commit()
+
+def test_failing_row_is_retried_with_backoff_then_dead_lettered(db, monkeypatch):
+    monkeypatch.setenv("EMBED_MAX_ATTEMPTS", "3")
+    monkeypatch.setenv("EMBED_RETRY_BASE_SECONDS", "10")
+    rag = FailingRag()
+    service = LazyService("rag", lambda: rag)
+    service.get()
+    pipeline = EmbeddingPipeline(service, max_batch_size=4)
+
+    entry_ids = [900010, 900011, 900012, FailingRag.BAD_ENTRY, 900014, 900015]
+    for entry_id in entry_ids:
+        db.add(VectorOutbox(entry_id=entry_id, user_id=1, operation="upsert"))
+    db.commit()
+
+    # The bad row no longer holds up the rows behind it
+    while pipeline._process_batch():
+        pass
+    assert sorted(rag.synced) == [entry_id for entry_id in entry_ids if entry_id != FailingRag.BAD_ENTRY]
+
+    row = db.query(VectorOutbox).one()
+    assert (row.entry_id, row.attempts, row.dead_at) == (FailingRag.BAD_ENTRY, 1, None)
+    assert "cannot embed" in row.last_error
+    assert row.next_attempt_at > datetime.utcnow() + timedelta(seconds=5)
+
+    # Backoff doubles per attempt; the last allowed attempt dead-letters the row
+    for attempts in (2, 3):
+        row.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+        pipeline._process_batch()
+        db.refresh(row)
+        assert row.attempts == attempts
+    assert row.dead_at is not None
+
+    # Dead rows stay for inspection but are no longer picked up or counted as queued
+    assert pipeline._process_batch() == 0
+    stats = pipeline.stats()
+    assert (stats["queue_depth"], stats["dead_letters"]) == (0, 1)
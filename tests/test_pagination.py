@@ -0,0 +1,90 @@
+"""Journal keyset pagination: cursors round-trip and pages never skip or repeat entries.
+
+    python -m pytest tests
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import SessionLocal
+from models import JournalEntry
+from pagination import InvalidCursor, decode_cursor, encode_cursor
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 9, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+    assert decode_cursor(encode_cursor(datetime(2024, 5, 1), 7)) == (datetime(2024, 5, 1), 7)
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "MjAyNC0wNS0wMQ", encode_cursor(datetime(2024, 5, 1), 1)[:-3] + "!!!"])
+def test_bad_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+def _add_entries(user_id: int, timestamps, mood: str = "calm"):
+    db = SessionLocal()
+    entries = [
+        JournalEntry(user_id=user_id, text=f"entry {index}", mood_tag=mood, created_at=created_at, updated_at=created_at)
+        for index, created_at in enumerate(timestamps)
+    ]
+    db.add_all(entries)
+    db.commit()
+    ids = [entry.id for entry in entries]
+    db.close()
+    return ids
+
+def _pages(client, limit: int, **params):
+    pages, cursor = [], None
+    while True:
+        query = {"limit": limit, **params, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/journal", params=query)
+        assert response.status_code == 200
+        pages.append(response)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+
+def test_pages_cover_tied_timestamps_without_duplicates_or_gaps(client):
+    noon = datetime(2024, 5, 1, 12)
+    # Three entries share one timestamp and two share another, so pages must break ties on id
+    timestamps = [noon, noon, noon, noon - timedelta(hours=1), noon - timedelta(hours=1), noon - timedelta(days=1), noon + timedelta(days=1)]
+    _add_entries(client.user_id, timestamps)
+    expected = [entry["id"] for entry in client.get("/journal").json()]
+    assert len(expected) == len(timestamps)
+
+    for limit in (1, 2, 3, 7):
+        pages = _pages(client, limit)
+        seen = [entry["id"] for page in pages for entry in page.json()]
+        assert seen == expected
+        assert all(len(page.json()) == limit for page in pages[:-1])
+        assert {page.headers["X-Total-Count"] for page in pages} == {"7"}
+
+def test_last_full_page_has_no_cursor(client):
+    _add_entries(client.user_id, [datetime(2024, 5, day) for day in range(1, 5)])
+    response = client.get("/journal", params={"limit": 4})
+    assert len(response.json()) == 4
+    assert "X-Next-Cursor" not in response.headers
+
+    first = client.get("/journal", params={"limit": 3})
+    rest = client.get("/journal", params={"limit": 3, "cursor": first.headers["X-Next-Cursor"]})
+    assert [entry["created_at"][:10] for entry in rest.json()] == ["2024-05-01"]
+    assert "X-Next-Cursor" not in rest.headers
+
+def test_new_entries_do_not_shift_later_pages(client):
+    _add_entries(client.user_id, [datetime(2024, 5, day) for day in range(1, 6)])
+    first = client.get("/journal", params={"limit": 2})
+    _add_entries(client.user_id, [datetime(2024, 6, 1)])
+    rest = _pages(client, 2, cursor=first.headers["X-Next-Cursor"])
+    seen = [entry["created_at"][:10] for page in [first] + rest for entry in page.json()]
+    assert seen == ["2024-05-05", "2024-05-04", "2024-05-03", "2024-05-02", "2024-05-01"]
+
+def test_filters_apply_to_every_page(client):
+    moods = ["happy", "sad"] * 4
+    for day, mood in enumerate(moods, start=1):
+        _add_entries(client.user_id, [datetime(2024, 5, day)], mood=mood)
+    pages = _pages(client, 3, mood="happy")
+    entries = [entry for page in pages for entry in page.json()]
+    assert [entry["mood_tag"] for entry in entries] == ["happy"] * 4
+    assert pages[0].headers["X-Total-Count"] == "4"
+
+def test_invalid_cursor_is_a_bad_request(client):
+    assert client.get("/journal", params={"cursor": "garbage"}).status_code == 400
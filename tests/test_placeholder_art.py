@@ -0,0 +1,52 @@
+"""Placeholder art: the vectorized gradient matches the old per-row drawing, backgrounds are cached.
+
+    python -m pytest tests
+"""
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from art_service import ArtService
+from text_signals import DEFAULT_MOOD_COLOR, MOOD_COLORS
+
+@pytest.fixture
+def art(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ART_DISABLE_DIFFUSION", "1")
+    return ArtService()
+
+def legacy_gradient(mood_color: tuple, style_color: tuple, size: int) -> Image.Image:
+    """One line per row, as the renderer drew it before"""
+    image = Image.new("RGB", (size, size), color=mood_color)
+    draw = ImageDraw.Draw(image)
+    for y in range(size):
+        factor = y / size
+        color = tuple(int(start + (end - start) * factor) for start, end in zip(mood_color, style_color))
+        draw.line([(0, y), (size, y)], fill=color)
+    return image
+
+STYLES = ["abstract", "realistic", "dreamy", "minimalist", "impressionist", "surreal", "watercolor", "digital", "unknown"]
+
+@pytest.mark.parametrize("mood_color", [color for color, _ in MOOD_COLORS] + [DEFAULT_MOOD_COLOR])
+def test_gradient_matches_row_by_row_drawing(art, mood_color):
+    for style in STYLES:
+        style_color = art._get_secondary_color(style)
+        for size in (512, 37):
+            rendered = np.asarray(art._render_background(mood_color, style_color, size))
+            expected = np.asarray(legacy_gradient(mood_color, style_color, size))
+            np.testing.assert_array_equal(rendered, expected)
+
+def test_cached_background_is_not_changed_by_drawing_on_a_copy(art):
+    first = art._render_background((255, 215, 0), (255, 165, 0), 64)
+    ImageDraw.Draw(first).rectangle([0, 0, 63, 63], fill=(0, 0, 0))
+    second = art._render_background((255, 215, 0), (255, 165, 0), 64)
+    assert second.getpixel((10, 10)) != (0, 0, 0)
+    assert art.background_cache.stats()["hits"] == 1
+
+def test_placeholder_is_a_512_png_over_the_gradient(art, tmp_path):
+    url = art.render_art("I felt calm by the lake", "watercolor")
+    path = tmp_path / url.lstrip("/")
+    with Image.open(path) as image:
+        assert (image.format, image.size) == ("PNG", (512, 512))
+        # Bottom rows fade to the style color
+        assert image.getpixel((5, 511)) == legacy_gradient((152, 251, 152), (176, 224, 230), 512).getpixel((5, 511))
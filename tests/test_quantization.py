@@ -0,0 +1,63 @@
+"""int8 storage and scoring in the numpy vector store.
+
+    python -m pytest tests
+"""
+import os
+
+import numpy as np
+import pytest
+
+from vector_store import NumpyVectorStore, quantize_int8
+
+def _corpus(count: int = 300, dim: int = 32):
+    rng = np.random.default_rng(3)
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"entry-{i}" for i in range(count)]
+    metadatas = [{"entry_id": i, "user_id": 1, "mood_tag": ""} for i in range(count)]
+    return ids, vectors, [f"text {i}" for i in range(count)], metadatas
+
+def _store(tmp_path, **kwargs):
+    ids, vectors, documents, metadatas = _corpus()
+    store = NumpyVectorStore("test", root=str(tmp_path), **kwargs)
+    store.add(ids, vectors, documents, metadatas)
+    return store, vectors
+
+def test_quantize_int8_error_is_within_half_a_step():
+    vectors = np.random.default_rng(0).standard_normal((50, 16)).astype(np.float32)
+    vectors[0] = 0  # all-zero rows must not divide by zero
+    qvectors, scales = quantize_int8(vectors)
+    assert qvectors.dtype == np.int8 and scales.dtype == np.float32
+    assert np.all(np.abs(qvectors.astype(np.float32) * scales[:, None] - vectors) <= scales[:, None] / 2 + 1e-6)
+
+def test_rescoring_returns_the_exact_float32_ranking(tmp_path):
+    exact, vectors = _store(tmp_path / "float32", quantization="none")
+    rescored, _ = _store(tmp_path / "int8", quantization="int8", rescore_candidates=32)
+
+    for seed in range(20):
+        query = np.random.default_rng(100 + seed).standard_normal(vectors.shape[1]).astype(np.float32)
+        expected = exact.query(query, 1, 5)
+        got = rescored.query(query, 1, 5)
+        assert [hit["id"] for hit in got] == [hit["id"] for hit in expected]
+        assert [hit["score"] for hit in got] == pytest.approx([hit["score"] for hit in expected], abs=1e-5)
+
+def test_int8_without_rescoring_drops_the_float32_file(tmp_path):
+    store, vectors = _store(tmp_path, quantization="int8", rescore_candidates=0)
+    files = os.listdir(store._user_dir(1))
+    assert any(name.startswith("qvectors_") for name in files)
+    assert not any(name.startswith("vectors_") for name in files)
+
+    # Approximate scores, but each vector still finds itself first
+    for row in (0, 17, 123):
+        hit = store.query(vectors[row], 1, 1)[0]
+        assert hit["id"] == f"entry-{row}"
+        assert hit["score"] == pytest.approx(1.0, abs=0.02)
+
+def test_quantized_store_survives_rewrites(tmp_path):
+    store, vectors = _store(tmp_path, quantization="int8", rescore_candidates=0)
+    # Deletes rewrite the index from dequantized vectors
+    store.delete(["entry-0", "entry-1"], 1)
+    store.update_metadata(["entry-2"], [{"entry_id": 2, "user_id": 1, "mood_tag": "calm"}])
+    hit = store.query(vectors[2], 1, 1)[0]
+    assert hit["id"] == "entry-2" and hit["metadata"]["mood_tag"] == "calm"
+    assert len(store.query(vectors[5], 1, 1000)) == 298
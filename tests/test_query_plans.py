@@ -0,0 +1,24 @@
+"""The hot endpoint queries must stay on indexes after every migration.
+
+    python -m pytest tests
+"""
+import pytest
+from sqlalchemy import text
+
+from database import create_db_engine
+from migrations import check_query_plans, migrate
+
+@pytest.fixture
+def engine(tmp_path):
+    db_engine = create_db_engine(f"sqlite:///{tmp_path / 'plans.db'}")
+    migrate(bind=db_engine)
+    yield db_engine
+    db_engine.dispose()
+
+def test_hot_queries_use_indexes(engine):
+    assert check_query_plans(engine) == {}
+
+def test_full_scan_is_reported(engine):
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_journal_entries_user_created"))
+    assert "GET /journal" in check_query_plans(engine)
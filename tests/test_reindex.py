@@ -0,0 +1,138 @@
+"""Bulk reindex: resumable from its checkpoint, writes each entry once, replays edits made during the run.
+
+    python -m pytest tests
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import reindex
+from conftest import FakeEmbeddingModel
+from database import create_db_engine
+from migrations import migrate
+from models import EmbeddingMetadata, JournalEntry, User
+
+class CountingModel(FakeEmbeddingModel):
+    def __init__(self):
+        self.texts = []
+
+    def encode(self, texts, **kwargs):
+        self.texts += texts
+        return super().encode(texts)
+
+@pytest.fixture
+def model(tmp_path, monkeypatch):
+    """Own database and index directory; workers are threads sharing a fake model"""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    monkeypatch.setenv("VECTOR_BACKEND", "numpy")
+
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'reindex.db'}")
+    migrate(bind=engine)
+    monkeypatch.setattr(reindex, "SessionLocal", sessionmaker(bind=engine))
+
+    counting = CountingModel()
+    monkeypatch.setattr(reindex, "_worker_model", counting)
+    monkeypatch.setattr(reindex, "_create_pool", lambda model_name, workers: ThreadPoolExecutor(workers))
+    yield counting
+    engine.dispose()
+
+def _seed(count: int) -> int:
+    db = reindex.SessionLocal()
+    user = User(display_name="test", email="reindex@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    db.add_all([JournalEntry(user_id=user.id, text=f"entry number {index}", mood_tag="calm") for index in range(count)])
+    db.commit()
+    user_id = user.id
+    db.close()
+    return user_id
+
+def _checkpoint(collection: str = "journal_entries_v2") -> dict:
+    return {"collection": collection, "model": "fake", "last_entry_id": 0, "started_at": datetime.utcnow().isoformat()}
+
+def _metadata(collection: str = "journal_entries_v2"):
+    db = reindex.SessionLocal()
+    rows = db.query(EmbeddingMetadata).filter(EmbeddingMetadata.collection == collection).all()
+    db.close()
+    return rows
+
+def _documents(user_id: int, collection: str = "journal_entries_v2"):
+    store = reindex.create_vector_store(collection)
+    return sorted(hit["document"] for hit in store.query(FakeEmbeddingModel().encode("entry number"), user_id, 100))
+
+def test_next_collection_name():
+    assert reindex.next_collection_name("journal_entries") == "journal_entries_v2"
+    assert reindex.next_collection_name("journal_entries_v2") == "journal_entries_v3"
+    assert reindex.next_collection_name("journal_entries_v10") == "journal_entries_v11"
+
+def test_interrupted_run_resumes_from_its_checkpoint(model, monkeypatch):
+    user_id = _seed(10)
+    checkpoint = _checkpoint()
+    reindex.save_checkpoint(checkpoint)
+
+    write_batch = reindex.write_batch
+    written = []
+
+    def crash_on_third_batch(db, vector_store, entries, embeddings):
+        if len(written) == 2:
+            raise KeyboardInterrupt
+        written.append(len(entries))
+        write_batch(db, vector_store, entries, embeddings)
+
+    monkeypatch.setattr(reindex, "write_batch", crash_on_third_batch)
+    with pytest.raises(KeyboardInterrupt):
+        reindex.reindex(checkpoint, batch_size=3, workers=1)
+    assert reindex.load_checkpoint()["last_entry_id"] == 6
+
+    monkeypatch.setattr(reindex, "write_batch", write_batch)
+    assert reindex.reindex(reindex.load_checkpoint(), batch_size=3, workers=1) == 4
+    assert sorted(row.entry_id for row in _metadata()) == list(range(1, 11))
+    assert _documents(user_id) == sorted(f"entry number {index}" for index in range(10))
+
+def test_entries_already_in_the_collection_are_skipped(model):
+    _seed(6)
+    reindex.reindex(_checkpoint(), batch_size=4, workers=2)
+    assert len(model.texts) == 6
+
+    # A restart from the beginning re-reads the entries but embeds none of them
+    reindex.reindex(_checkpoint(), batch_size=4, workers=2)
+    assert len(model.texts) == 6
+    assert len(_metadata()) == 6
+
+def test_edits_made_during_the_run_are_replayed(model):
+    user_id = _seed(4)
+    checkpoint = _checkpoint()
+    started_at = datetime.utcnow()
+    reindex.reindex(checkpoint, batch_size=10, workers=1)
+
+    db = reindex.SessionLocal()
+    edited, retagged = db.query(JournalEntry).order_by(JournalEntry.id).limit(2).all()
+    edited.text = "entry number rewritten"
+    retagged.mood_tag = "happy"
+    retagged_id = retagged.id
+    db.commit()
+    db.close()
+    encoded = len(model.texts)
+
+    assert reindex.reconcile(checkpoint, started_at, batch_size=10) == 2
+    assert model.texts[encoded:] == ["entry number rewritten"]
+    assert "entry number rewritten" in _documents(user_id)
+    assert {row.entry_id: row.mood_tag for row in _metadata()}[retagged_id] == "happy"
+    assert len(_metadata()) == 4
+
+def test_entry_deleted_while_its_batch_encodes_is_taken_back(model):
+    user_id = _seed(2)
+    db = reindex.SessionLocal()
+    batch = reindex.fetch_batch(db, "journal_entries_v2", 0, 10)
+    embeddings = FakeEmbeddingModel().encode([entry["text"] for entry in batch])
+    db.query(JournalEntry).filter(JournalEntry.id == batch[0]["id"]).delete()
+    db.commit()
+
+    reindex.write_batch(db, reindex.create_vector_store("journal_entries_v2"), batch, embeddings)
+    db.close()
+    assert [row.entry_id for row in _metadata()] == [batch[1]["id"]]
+    assert _documents(user_id) == [batch[1]["text"]]
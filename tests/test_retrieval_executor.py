@@ -0,0 +1,112 @@
+"""Retrieval executor: /chat encoding and search run on a bounded pool, batched, never on the loop.
+
+    python -m pytest tests
+"""
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from conftest import FakeEmbeddingModel
+from retrieval_executor import RetrievalExecutor, RetrievalOverloaded
+
+class CountingModel(FakeEmbeddingModel):
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, **kwargs):
+        self.batches.append(list(texts))
+        return super().encode(texts, **kwargs)
+
+def _executor(model, **kwargs) -> RetrievalExecutor:
+    options = {"max_workers": 2, "max_queue_size": 4, "batch_window_ms": 20, "max_batch_size": 16}
+    options.update(kwargs)
+    return RetrievalExecutor(model, **options)
+
+def test_concurrent_queries_are_encoded_in_one_batch():
+    model = CountingModel()
+    executor = _executor(model)
+    queries = ["how was my week", "why am i tired", "what made me happy"]
+
+    async def scenario():
+        return await asyncio.gather(*(executor.encode(query) for query in queries))
+
+    embeddings = asyncio.run(scenario())
+    executor.shutdown()
+    assert model.batches == [queries]
+    for query, embedding in zip(queries, embeddings):
+        np.testing.assert_array_equal(embedding, FakeEmbeddingModel().encode(query))
+    assert executor.stats()["average_encode_batch_size"] == 3
+
+def test_full_batch_is_encoded_without_waiting_for_the_window():
+    model = CountingModel()
+    executor = _executor(model, batch_window_ms=10_000, max_batch_size=2)
+
+    async def scenario():
+        return await asyncio.wait_for(asyncio.gather(*(executor.encode(f"q{index}") for index in range(4))), 5)
+
+    asyncio.run(scenario())
+    executor.shutdown()
+    assert model.batches == [["q0", "q1"], ["q2", "q3"]]
+
+def test_encode_failure_reaches_every_waiting_query():
+    class BrokenModel:
+        def encode(self, texts, **kwargs):
+            raise RuntimeError("encoder crashed")
+
+    executor = _executor(BrokenModel())
+
+    async def scenario():
+        return await asyncio.gather(executor.encode("a"), executor.encode("b"), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    executor.shutdown()
+    assert [str(result) for result in results] == ["encoder crashed", "encoder crashed"]
+
+def test_blocking_search_does_not_block_the_event_loop():
+    executor = _executor(CountingModel())
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        thread_name = await executor.run(lambda: (time.sleep(0.2), threading.current_thread().name)[1])
+        task.cancel()
+        return ticks, thread_name
+
+    ticks, thread_name = asyncio.run(scenario())
+    executor.shutdown()
+    assert ticks >= 5
+    assert thread_name.startswith("retrieval")
+
+def test_calls_beyond_workers_and_queue_are_rejected():
+    executor = _executor(CountingModel(), max_workers=1, max_queue_size=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(RetrievalOverloaded):
+            await executor.run(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+
+    asyncio.run(scenario())
+    executor.shutdown()
+    assert executor.stats()["rejected"] == 1
+    assert executor.stats()["in_flight"] == 0
+
+def test_overloaded_retrieval_answers_without_context(rag, monkeypatch):
+    async def overloaded(*args, **kwargs):
+        raise RetrievalOverloaded("Retrieval queue is full")
+
+    monkeypatch.setattr(rag.retrieval_executor, "run", overloaded)
+    assert asyncio.run(rag.retrieve_relevant_context("how was my week", 1)) == []
@@ -0,0 +1,89 @@
+"""Lazy service startup: cheap imports, one build per service, and the readiness probe.
+
+    python -m pytest tests
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import main
+from services import LazyService, warm_up
+
+REPO = os.path.join(os.path.dirname(__file__), "..")
+
+def test_importing_the_app_does_not_load_models(tmp_path):
+    heavy = ["torch", "sentence_transformers", "chromadb", "diffusers", "transformers"]
+    code = f"import sys, main; print([name for name in {heavy!r} if name in sys.modules])"
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'import.db'}"}
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO, env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+def test_concurrent_first_use_builds_once():
+    builds = []
+
+    def factory():
+        builds.append(threading.get_ident())
+        time.sleep(0.1)
+        return object()
+
+    service = LazyService("slow", factory)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service.get())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1
+    assert len({id(result) for result in results}) == 1
+    assert service.status()["ready"] and service.status()["load_seconds"] >= 0.1
+
+def test_failed_build_is_reported_and_retried():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ImportError("No module named 'sentence_transformers'")
+        return "built"
+
+    service = LazyService("flaky", flaky)
+    asyncio.run(warm_up([service]))
+    assert service.status() == {"ready": False, "load_seconds": None, "error": "No module named 'sentence_transformers'"}
+    assert service.get() == "built"
+    assert service.status()["error"] is None
+
+def test_warmup_builds_off_the_event_loop():
+    service = LazyService("slow", lambda: time.sleep(0.2) or "built")
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await warm_up([service])
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(scenario()) >= 5
+    assert service.ready
+
+def test_ready_probe_waits_for_every_service(client, rag, monkeypatch):
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["services"]["rag"]["ready"] is False
+
+    for name, instance in (("rag_service", rag), ("playlist_service", object())):
+        service = LazyService(name, lambda: instance)
+        service.get()
+        monkeypatch.setattr(main, name, service)
+    assert client.get("/ready").status_code == 200
+    # Liveness never depends on the models
+    assert client.get("/").json()["status"] == "healthy"
@@ -0,0 +1,48 @@
+"""SQLite connection profiles: PRAGMAs and pool sizing.
+
+    python -m pytest tests
+"""
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+from database import create_db_engine
+
+def _pragmas(engine):
+    with engine.connect() as conn:
+        return {
+            name: conn.execute(text(f"PRAGMA {name}")).scalar()
+            for name in ("journal_mode", "synchronous", "mmap_size", "cache_size", "busy_timeout", "temp_store")
+        }
+
+def test_production_profile_applies_pragmas_on_every_connection(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_BUSY_TIMEOUT_MS", "1234")
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'prod.db'}", profile="production")
+    expected = {
+        "journal_mode": "wal",
+        "synchronous": 1,  # NORMAL
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,
+        "busy_timeout": 1234,
+        "temp_store": 2,  # MEMORY
+    }
+    assert _pragmas(engine) == expected
+
+    # A second pooled connection gets them too, not just the first
+    with engine.connect():
+        assert _pragmas(engine) == expected
+    assert engine.pool.size() == 10
+    engine.dispose()
+
+def test_default_profile_leaves_sqlite_settings(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'default.db'}", profile="default")
+    pragmas = _pragmas(engine)
+    assert pragmas["journal_mode"] == "delete"
+    assert pragmas["synchronous"] == 2  # FULL
+    assert pragmas["mmap_size"] == 0
+    engine.dispose()
+
+def test_in_memory_database_gets_pragmas_without_pool_sizing():
+    engine = create_db_engine("sqlite:///:memory:", profile="production")
+    assert _pragmas(engine)["temp_store"] == 2
+    assert not isinstance(engine.pool, QueuePool)
+    engine.dispose()
@@ -0,0 +1,107 @@
+"""The single-pass classifier must agree with the old per-service any(kw in text) checks.
+
+    python -m pytest tests
+"""
+import random
+
+import pytest
+
+import text_signals
+from text_signals import analyze
+
+# Keyword lists exactly as the services had them before text_signals
+def legacy_signals(text: str):
+    text_lower = text.lower()
+    concerning = any(pattern in text_lower for pattern in [
+        "kill myself", "end my life", "want to die", "suicide",
+        "hurt myself", "self harm", "cut myself"
+    ])
+    crisis = any(keyword in text_lower for keyword in ["hurt", "harm", "suicide", "die", "kill", "end it"])
+
+    if any(keyword in text_lower for keyword in ["happy", "good", "great", "excited", "joy"]):
+        sentiment = "positive"
+    elif any(keyword in text_lower for keyword in ["anxious", "worried", "stress", "nervous", "panic"]):
+        sentiment = "anxious"
+    elif any(keyword in text_lower for keyword in ["sad", "upset", "angry", "frustrated", "down", "depressed"]):
+        sentiment = "negative"
+    else:
+        sentiment = None
+
+    themes = [kw for kw in [
+        "peace", "calm", "serenity", "joy", "happiness", "love", "hope",
+        "growth", "change", "reflection", "nature", "beauty", "connection",
+        "strength", "healing", "discovery", "journey", "light", "color",
+        "harmony", "balance", "freedom", "expression", "creativity"
+    ] if kw in text_lower] or ["abstract", "emotion", "expression"]
+
+    if any(word in text_lower for word in ["happy", "joy", "excited", "energetic"]):
+        color = (255, 215, 0)
+    elif any(word in text_lower for word in ["sad", "blue", "down"]):
+        color = (70, 130, 180)
+    elif any(word in text_lower for word in ["angry", "frustrated", "mad"]):
+        color = (220, 20, 60)
+    elif any(word in text_lower for word in ["calm", "peaceful", "serene"]):
+        color = (152, 251, 152)
+    elif any(word in text_lower for word in ["anxious", "nervous", "worried"]):
+        color = (186, 85, 211)
+    else:
+        color = (100, 149, 237)
+
+    harmful = any(word in text_lower for word in ["child", "minor", "illegal", "terrorist", "bomb", "suicide"])
+    return concerning, crisis, sentiment, themes, color, harmful
+
+def signals(text: str):
+    result = analyze(text)
+    return result.concerning, result.crisis, result.sentiment, result.art_themes, result.mood_color, result.art_harmful
+
+CORPUS = [
+    "",
+    "Today was a quiet day.",
+    "I felt HAPPY and calm after the walk.",
+    "Sometimes I want to die, and I think about suicide.",
+    "I want to kill myself",
+    "I'll end it all. I want to end my life.",
+    "That skill tree in the game was great fun",
+    "I killed it at the presentation, goodbye nerves",
+    "The diet is going well, no harm done",
+    "Downtown felt blue and the sadness lingered",
+    "My children made a colorful painting",
+    "Stressed about the minor exam but hopeful",
+    "Feeling panicky and worried, then relieved",
+    "So frustrated and angry, the mad traffic again",
+    "A peaceful, serene evening of reflection and healing",
+    "hurt myself by accident, a self harm scare? no, a cut myself slicing bread",
+    "unhappy, upset and depressed",
+    "Energetic morning: joyful journey of discovery, light and harmony",
+    "Balance, freedom, expression, creativity, strength, connection, beauty, nature",
+    "happinesses lovelight changeless growthful",
+    "the illegal bomb plot in the terrorist movie",
+]
+
+def _random_corpus(count: int):
+    rng = random.Random(12)
+    words = "the a i felt was walk day kill die end it my life hap happy down blue sad joy calm light skill harm".split()
+    return [
+        rng.choice(["", " ", "-"]).join(rng.choice(words) for _ in range(rng.randint(0, 30)))
+        for _ in range(count)
+    ]
+
+@pytest.fixture(params=["aho-corasick", "regex"])
+def backend(request, monkeypatch):
+    if request.param == "aho-corasick":
+        if not text_signals.AHOCORASICK_AVAILABLE:
+            pytest.skip("pyahocorasick is not installed")
+    else:
+        monkeypatch.setattr(text_signals, "AHOCORASICK_AVAILABLE", False)
+    return request.param
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_matches_legacy_checks(backend, text):
+    assert signals(text) == legacy_signals(text)
+
+def test_matches_legacy_checks_on_generated_text(backend):
+    for text in _random_corpus(500):
+        assert signals(text) == legacy_signals(text), text
+
+def test_overlapping_keywords_are_all_found(backend):
+    assert {"kill", "kill myself", "end it", "hurt"} <= text_signals.find_keywords("kill myselfend it hurt")
@@ -0,0 +1,147 @@
+"""NumpyVectorStore: several stores (processes) sharing one index directory.
+
+    python -m pytest tests
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from vector_store import NumpyVectorStore
+
+DIM = 8
+
+def _vector(seed: int):
+    return np.random.default_rng(seed).standard_normal(DIM).astype(np.float32)
+
+def _upsert(store: NumpyVectorStore, entry_id: int, user_id: int = 1):
+    store.upsert(
+        [f"entry-{entry_id}"],
+        np.stack([_vector(entry_id)]),
+        [f"text {entry_id}"],
+        [{"entry_id": entry_id, "user_id": user_id, "mood_tag": ""}]
+    )
+
+def _ids(store: NumpyVectorStore, user_id: int = 1):
+    return {hit["id"] for hit in store.query(_vector(0), user_id, 1000)}
+
+def _generation(root: str, user_id: int = 1) -> int:
+    store = NumpyVectorStore("test", root=root)
+    return store._read_manifest(store._user_dir(user_id))["generation"]
+
+def test_store_sees_writes_from_another_store(tmp_path):
+    a = NumpyVectorStore("test", root=str(tmp_path))
+    b = NumpyVectorStore("test", root=str(tmp_path))
+
+    _upsert(a, 1)
+    assert _ids(b) == {"entry-1"}  # b now has generation 1 cached
+
+    _upsert(a, 2)
+    assert _ids(b) == {"entry-1", "entry-2"}
+
+def test_writers_with_stale_caches_do_not_lose_updates(tmp_path):
+    a = NumpyVectorStore("test", root=str(tmp_path))
+    b = NumpyVectorStore("test", root=str(tmp_path))
+    _upsert(a, 1)
+    assert _ids(a) == _ids(b) == {"entry-1"}
+
+    # Both stores hold generation 1 in their caches when they write
+    _upsert(a, 2)
+    _upsert(b, 3)
+    assert _generation(str(tmp_path)) == 3
+    assert _ids(a) == _ids(b) == {"entry-1", "entry-2", "entry-3"}
+
+    # A deleted vector does not come back through the other store's next write
+    a.delete(["entry-2"], 1)
+    _upsert(b, 4)
+    assert _ids(a) == _ids(b) == {"entry-1", "entry-3", "entry-4"}
+
+def test_previous_generation_is_kept_for_readers(tmp_path):
+    store = NumpyVectorStore("test", root=str(tmp_path))
+    for entry_id in range(1, 5):
+        _upsert(store, entry_id)
+
+    files = os.listdir(store._user_dir(1))
+    assert {"ids_3.npy", "ids_4.npy"} <= set(files)
+    assert not any(name.startswith("ids_") and name not in ("ids_3.npy", "ids_4.npy") for name in files)
+
+    # A reader that cached generation 3 before the write still gets the new rows
+    reader = NumpyVectorStore("test", root=str(tmp_path))
+    assert _ids(reader) == {f"entry-{i}" for i in range(1, 5)}
+
+def _write_entries(root: str, entry_ids):
+    store = NumpyVectorStore("test", root=root)
+    for entry_id in entry_ids:
+        _upsert(store, entry_id)
+        store.query(_vector(entry_id), 1, 5)
+
+def test_concurrent_writer_processes(tmp_path):
+    root = str(tmp_path)
+    batches = [range(start, start + 10) for start in (1, 11, 21, 31)]
+    with ProcessPoolExecutor(max_workers=4, mp_context=multiprocessing.get_context("spawn")) as pool:
+        list(pool.map(_write_entries, [root] * len(batches), batches))
+
+    assert _ids(NumpyVectorStore("test", root=root)) == {f"entry-{i}" for i in range(1, 41)}
+    assert _generation(root) == 40
+
+def _corpus(count: int, users=(1, 2)):
+    rng = np.random.default_rng(7)
+    vectors = rng.standard_normal((count, DIM)).astype(np.float32)
+    ids = [f"entry-{i}" for i in range(count)]
+    metadatas = [{"entry_id": i, "user_id": users[i % len(users)], "mood_tag": "calm"} for i in range(count)]
+    return ids, vectors, [f"text {i}" for i in range(count)], metadatas
+
+def _exact_top(vectors, ids, metadatas, query, user_id, k):
+    rows = [i for i, metadata in enumerate(metadatas) if metadata["user_id"] == user_id]
+    normalized = vectors[rows] / np.linalg.norm(vectors[rows], axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    return [ids[rows[i]] for i in np.argsort(-scores)[:k]]
+
+def test_query_returns_the_exact_top_k_for_that_user_only(tmp_path):
+    ids, vectors, documents, metadatas = _corpus(200)
+    store = NumpyVectorStore("test", root=str(tmp_path))
+    store.add(ids, vectors, documents, metadatas)
+
+    query = _vector(99)
+    for user_id in (1, 2):
+        hits = store.query(query, user_id, 5)
+        assert [hit["id"] for hit in hits] == _exact_top(vectors, ids, metadatas, query, user_id, 5)
+        assert all(hit["metadata"]["user_id"] == user_id for hit in hits)
+        assert hits[0]["document"] == documents[int(hits[0]["id"].split("-")[1])]
+        assert [hit["score"] for hit in hits] == sorted((hit["score"] for hit in hits), reverse=True)
+
+def test_upsert_replaces_and_update_metadata_and_delete_apply(tmp_path):
+    store = NumpyVectorStore("test", root=str(tmp_path))
+    _upsert(store, 1)
+    _upsert(store, 2)
+
+    # Re-upserting an id replaces its vector instead of adding a second row
+    store.upsert(["entry-1"], np.stack([_vector(50)]), ["new text"], [{"entry_id": 1, "user_id": 1, "mood_tag": ""}])
+    hits = store.query(_vector(50), 1, 10)
+    assert [hit["id"] for hit in hits] == ["entry-1", "entry-2"]
+    assert hits[0]["document"] == "new text"
+    assert hits[0]["score"] == pytest.approx(1.0, abs=1e-5)
+
+    store.update_metadata(["entry-2"], [{"entry_id": 2, "user_id": 1, "mood_tag": "sad"}])
+    assert {hit["id"]: hit["metadata"]["mood_tag"] for hit in store.query(_vector(0), 1, 10)} == {"entry-1": "", "entry-2": "sad"}
+
+    store.delete(["entry-1"], 1)
+    assert _ids(store) == {"entry-2"}
+    assert store.query(_vector(0), 3, 10) == []
+
+def test_chroma_store_matches_the_numpy_store(tmp_path):
+    pytest.importorskip("chromadb")
+    from vector_store import ChromaVectorStore
+
+    ids, vectors, documents, metadatas = _corpus(60)
+    chroma = ChromaVectorStore("test", path=str(tmp_path / "chroma"))
+    numpy_store = NumpyVectorStore("test", root=str(tmp_path / "numpy"))
+    for store in (chroma, numpy_store):
+        store.add(ids, vectors, documents, metadatas)
+        store.delete(["entry-0"], 1)
+
+    query = _vector(99)
+    for user_id in (1, 2):
+        assert [hit["id"] for hit in chroma.query(query, user_id, 3)] == [hit["id"] for hit in numpy_store.query(query, user_id, 3)]
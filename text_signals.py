@@ -0,0 +1,133 @@
+import re
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+# Aho-Corasick automaton in C when available, otherwise a compiled regex
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Keyword groups shared by the chat and art services (plain substring matches)
+CONCERNING_PATTERNS = [
+    "kill myself", "end my life", "want to die", "suicide",
+    "hurt myself", "self harm", "cut myself"
+]
+CRISIS_KEYWORDS = ["hurt", "harm", "suicide", "die", "kill", "end it"]
+
+# Checked in order; the first bucket with a hit wins
+SENTIMENT_KEYWORDS = [
+    ("positive", ["happy", "good", "great", "excited", "joy"]),
+    ("anxious", ["anxious", "worried", "stress", "nervous", "panic"]),
+    ("negative", ["sad", "upset", "angry", "frustrated", "down", "depressed"]),
+]
+
+ART_THEMES = [
+    "peace", "calm", "serenity", "joy", "happiness", "love", "hope",
+    "growth", "change", "reflection", "nature", "beauty", "connection",
+    "strength", "healing", "discovery", "journey", "light", "color",
+    "harmony", "balance", "freedom", "expression", "creativity"
+]
+DEFAULT_ART_THEMES = ["abstract", "emotion", "expression"]
+
+# Checked in order; the first color with a hit wins
+MOOD_COLORS = [
+    ((255, 215, 0), ["happy", "joy", "excited", "energetic"]),      # Gold
+    ((70, 130, 180), ["sad", "blue", "down"]),                      # Steel Blue
+    ((220, 20, 60), ["angry", "frustrated", "mad"]),                # Crimson
+    ((152, 251, 152), ["calm", "peaceful", "serene"]),              # Pale Green
+    ((186, 85, 211), ["anxious", "nervous", "worried"]),            # Medium Orchid
+]
+DEFAULT_MOOD_COLOR = (100, 149, 237)  # Cornflower Blue
+
+ART_HARMFUL_CONTENT = ["child", "minor", "illegal", "terrorist", "bomb", "suicide"]
+
+class TextSignals(NamedTuple):
+    """Everything the services derive from keywords in a piece of text"""
+    keywords: FrozenSet[str]
+    concerning: bool
+    crisis: bool
+    sentiment: Optional[str]
+    art_themes: List[str]
+    mood_color: Tuple[int, int, int]
+    art_harmful: bool
+
+def _all_keywords() -> List[str]:
+    keywords = set(CONCERNING_PATTERNS) | set(CRISIS_KEYWORDS) | set(ART_THEMES) | set(ART_HARMFUL_CONTENT)
+    for _, group in SENTIMENT_KEYWORDS:
+        keywords.update(group)
+    for _, group in MOOD_COLORS:
+        keywords.update(group)
+    return sorted(keywords, key=lambda keyword: (-len(keyword), keyword))
+
+def _trie_pattern(keywords: List[str]) -> str:
+    """Regex alternation factored by shared prefixes so each position fails fast"""
+    trie: dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional tail: the longest keyword at a position wins
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+_KEYWORDS = _all_keywords()
+
+if AHOCORASICK_AVAILABLE:
+    _AUTOMATON = ahocorasick.Automaton()
+    for _keyword in _KEYWORDS:
+        _AUTOMATON.add_word(_keyword, _keyword)
+    _AUTOMATON.make_automaton()
+
+_PATTERN = re.compile(_trie_pattern(_KEYWORDS))
+
+# Shorter keywords starting where a longer one matched (e.g. "kill" in "kill myself")
+_IMPLIED: Dict[str, FrozenSet[str]] = {
+    keyword: frozenset(other for other in _KEYWORDS if keyword.startswith(other))
+    for keyword in _KEYWORDS
+}
+
+def find_keywords(text: str) -> FrozenSet[str]:
+    """Every known keyword that occurs in the text, from a single scan"""
+    text_lower = text.lower()
+    if AHOCORASICK_AVAILABLE:
+        return frozenset(keyword for _, keyword in _AUTOMATON.iter(text_lower))
+
+    # Restarting one character after each match finds overlapping keywords too
+    found = set()
+    match = _PATTERN.search(text_lower)
+    while match:
+        found.update(_IMPLIED[match.group()])
+        match = _PATTERN.search(text_lower, match.start() + 1)
+    return frozenset(found)
+
+def analyze(text: str) -> TextSignals:
+    """Scan the text once and return all keyword-based signals"""
+    found = find_keywords(text)
+
+    sentiment = next(
+        (bucket for bucket, group in SENTIMENT_KEYWORDS if found.intersection(group)),
+        None
+    )
+    mood_color = next(
+        (color for color, group in MOOD_COLORS if found.intersection(group)),
+        DEFAULT_MOOD_COLOR
+    )
+
+    return TextSignals(
+        keywords=found,
+        concerning=not found.isdisjoint(CONCERNING_PATTERNS),
+        crisis=not found.isdisjoint(CRISIS_KEYWORDS),
+        sentiment=sentiment,
+        art_themes=[theme for theme in ART_THEMES if theme in found] or list(DEFAULT_ART_THEMES),
+        mood_color=mood_color,
+        art_harmful=not found.isdisjoint(ART_HARMFUL_CONTENT)
+    )
@@ -0,0 +1,478 @@
+import contextlib
+import json
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_COLLECTION = "journal_entries"
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+
+# Pointer file switched by reindex.py once a new collection is complete
+ACTIVE_COLLECTION_PATH = os.getenv("ACTIVE_COLLECTION_PATH", "./data/active_collection.json")
+
+# Each API process records the collection it serves here, so reindex.py can
+# wait until every process has moved over after a switch
+COLLECTION_ACKS_DIR = ACTIVE_COLLECTION_PATH + ".acks"
+
+class VectorStore:
+    """Interface shared by the journal vector index backends
+
+    Query results are dicts with "id", "document", "metadata" and "score",
+    where score is cosine similarity (higher is closer).
+    """
+
+    def add(self, ids: List[str], embeddings, documents: List[str], metadatas: List[dict]):
+        raise NotImplementedError
+
+    def query(self, embedding, user_id: int, k: int) -> List[dict]:
+        raise NotImplementedError
+
+    def upsert(self, ids: List[str], embeddings, documents: List[str], metadatas: List[dict]):
+        raise NotImplementedError
+
+    def update_metadata(self, ids: List[str], metadatas: List[dict]):
+        raise NotImplementedError
+
+    def delete(self, ids: List[str], user_id: int):
+        raise NotImplementedError
+
+class ChromaVectorStore(VectorStore):
+    """Shared HNSW collection filtered by user_id metadata"""
+
+    def __init__(self, collection_name: str = DEFAULT_COLLECTION, path: str = "./data/chroma_db"):
+        import chromadb
+
+        self.collection_name = collection_name
+        self.client = chromadb.PersistentClient(path=path)
+        self.collection = self.client.get_or_create_collection(
+            name=collection_name,
+            metadata={"hnsw:space": "cosine"}
+        )
+
+    def add(self, ids, embeddings, documents, metadatas):
+        self.collection.add(
+            embeddings=[embedding.tolist() for embedding in embeddings],
+            documents=documents,
+            metadatas=metadatas,
+            ids=ids
+        )
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.collection.upsert(
+            embeddings=[embedding.tolist() for embedding in embeddings],
+            documents=documents,
+            metadatas=metadatas,
+            ids=ids
+        )
+
+    def query(self, embedding, user_id, k):
+        results = self.collection.query(
+            query_embeddings=[embedding.tolist()],
+            n_results=k,
+            where={"user_id": user_id}
+        )
+
+        hits = []
+        if results["documents"]:
+            for i, doc in enumerate(results["documents"][0]):
+                hits.append({
+                    "id": results["ids"][0][i],
+                    "document": doc,
+                    "metadata": results["metadatas"][0][i],
+                    "score": 1 - results["distances"][0][i] if results.get("distances") else None
+                })
+        return hits
+
+    def update_metadata(self, ids, metadatas):
+        self.collection.update(ids=ids, metadatas=metadatas)
+
+    def delete(self, ids, user_id):
+        if ids:
+            self.collection.delete(ids=ids)
+
+class NumpyVectorStore(VectorStore):
+    """Exact per-user index kept in memory-mapped .npy blocks
+
+    Each user has a directory holding a float32 matrix of normalized vectors,
+    an id array and a JSON sidecar with documents and metadata. Files are
+    written under a new generation number and a manifest points at the
+    current one, so readers holding an old mmap are never disturbed.
+
+    Several processes (uvicorn workers, reindex.py) may share a directory.
+    Every load checks the manifest, so a cached index is dropped once another
+    process writes a newer generation. Writes hold a per-user file lock and
+    number the new generation from the manifest on disk, and the previous
+    generation is kept so readers that just read the old manifest can still
+    open its files.
+
+    With quantization="int8" the vectors are also stored as int8 with one
+    float32 scale per row, and queries are scored against that matrix. The
+    top rescore_candidates are then rescored against the float32 file, which
+    stays on disk and is only paged in for those rows. Without rescoring the
+    float32 file is not written at all.
+    """
+
+    def __init__(
+        self,
+        collection_name: str = DEFAULT_COLLECTION,
+        root: str = "./data/vector_index",
+        max_loaded_users: Optional[int] = None,
+        quantization: Optional[str] = None,
+        rescore_candidates: Optional[int] = None
+    ):
+        self.collection_name = collection_name
+        self.root = os.path.join(root, collection_name)
+        self.max_loaded_users = max_loaded_users or int(os.getenv("VECTOR_INDEX_MAX_USERS", "256"))
+        self.quantization = (quantization or os.getenv("VECTOR_QUANTIZATION", "none")).lower()
+        if self.quantization not in ("none", "int8"):
+            raise ValueError(f"Unknown VECTOR_QUANTIZATION: {self.quantization}")
+        self.rescore_candidates = (
+            rescore_candidates if rescore_candidates is not None
+            else int(os.getenv("VECTOR_RESCORE_CANDIDATES", "32"))
+        )
+        os.makedirs(self.root, exist_ok=True)
+
+        # user_id -> loaded index, least recently used first
+        self._loaded: "OrderedDict[int, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, ids, embeddings, documents, metadatas):
+        self.upsert(ids, embeddings, documents, metadatas)
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        embeddings = _normalize(np.asarray(embeddings, dtype=np.float32))
+
+        by_user: Dict[int, List[int]] = {}
+        for row, metadata in enumerate(metadatas):
+            by_user.setdefault(metadata["user_id"], []).append(row)
+
+        with self._lock:
+            for user_id, rows in by_user.items():
+                with self._write_lock(user_id):
+                    self._upsert_user(user_id, rows, ids, embeddings, documents, metadatas)
+
+    def _upsert_user(self, user_id: int, rows: List[int], ids, embeddings, documents, metadatas):
+        # Loaded under the write lock, so this is the latest generation on disk
+        index = self._load(user_id)
+        new_ids = np.array([ids[row] for row in rows])
+
+        # Existing rows with the same ids are replaced
+        keep = ~np.isin(index["ids"], new_ids)
+        records = [record for record, kept in zip(index["records"], keep) if kept] + [
+            {"document": documents[row], "metadata": metadatas[row]} for row in rows
+        ]
+        self._write(
+            user_id,
+            np.vstack([_full_precision(index)[keep], embeddings[rows]]) if keep.any() else embeddings[rows],
+            np.concatenate([index["ids"][keep], new_ids]),
+            records
+        )
+
+    def query(self, embedding, user_id, k):
+        with self._lock:
+            index = self._load(user_id)
+
+        ids = index["ids"]
+        if not len(ids):
+            return []
+
+        query = _normalize(np.asarray(embedding, dtype=np.float32).reshape(1, -1))[0]
+
+        if index["qvectors"] is None:
+            scores = index["vectors"] @ query
+            top = _top_k(scores, k)
+            top_scores = scores[top]
+        else:
+            scores = _int8_scores(index["qvectors"], index["scales"], query)
+            if index["vectors"] is not None and self.rescore_candidates:
+                # Rescore a shortlist at full precision; only these rows are paged in
+                rows = np.sort(_top_k(scores, max(k, self.rescore_candidates)))
+                exact = np.asarray(index["vectors"][rows], dtype=np.float32) @ query
+                best = _top_k(exact, k)
+                top, top_scores = rows[best], exact[best]
+            else:
+                top = _top_k(scores, k)
+                top_scores = scores[top]
+
+        return [
+            {
+                "id": str(ids[row]),
+                "document": index["records"][row]["document"],
+                "metadata": index["records"][row]["metadata"],
+                "score": float(score)
+            }
+            for row, score in zip(top, top_scores)
+        ]
+
+    def update_metadata(self, ids, metadatas):
+        by_user: Dict[int, Dict[str, dict]] = {}
+        for vector_id, metadata in zip(ids, metadatas):
+            by_user.setdefault(metadata["user_id"], {})[vector_id] = metadata
+
+        with self._lock:
+            for user_id, updates in by_user.items():
+                with self._write_lock(user_id):
+                    index = self._load(user_id)
+                    records = [
+                        {**record, "metadata": updates.get(str(vector_id), record["metadata"])}
+                        for vector_id, record in zip(index["ids"], index["records"])
+                    ]
+                    self._write(user_id, _full_precision(index), index["ids"], records)
+
+    def delete(self, ids, user_id):
+        if not ids:
+            return
+        with self._lock, self._write_lock(user_id):
+            index = self._load(user_id)
+            keep = ~np.isin(index["ids"], np.array(ids))
+            if keep.all():
+                return
+            self._write(
+                user_id,
+                np.ascontiguousarray(_full_precision(index)[keep]),
+                index["ids"][keep],
+                [record for record, kept in zip(index["records"], keep) if kept]
+            )
+
+    def _user_dir(self, user_id: int) -> str:
+        return os.path.join(self.root, f"user_{user_id}")
+
+    @contextlib.contextmanager
+    def _write_lock(self, user_id: int):
+        """Exclusive across processes for one user's read-modify-write"""
+        user_dir = self._user_dir(user_id)
+        os.makedirs(user_dir, exist_ok=True)
+        with open(os.path.join(user_dir, ".lock"), "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _read_manifest(self, user_dir: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(user_dir, "manifest.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _load(self, user_id: int) -> Dict:
+        """Return the user's current index, mapping it from disk when another generation was written (caller holds the lock)"""
+        user_dir = self._user_dir(user_id)
+        for attempt in range(3):
+            manifest = self._read_manifest(user_dir)
+            generation = manifest["generation"] if manifest else 0
+            cached = self._loaded.get(user_id)
+            if cached is not None and cached["generation"] == generation:
+                self._loaded.move_to_end(user_id)
+                return cached
+            try:
+                index = self._read_generation(user_dir, manifest)
+                break
+            except FileNotFoundError:
+                # Two newer generations were written since the manifest was read
+                if attempt == 2:
+                    raise
+
+        self._loaded[user_id] = index
+        self._loaded.move_to_end(user_id)
+        while len(self._loaded) > self.max_loaded_users:
+            self._loaded.popitem(last=False)
+        return index
+
+    def _read_generation(self, user_dir: str, manifest: Optional[Dict]) -> Dict:
+        if manifest is None:
+            return {
+                "generation": 0,
+                "vectors": np.zeros((0, 0), dtype=np.float32),
+                "qvectors": None,
+                "scales": None,
+                "ids": np.array([], dtype=str),
+                "records": []
+            }
+
+        generation = manifest["generation"]
+        vectors_path = os.path.join(user_dir, f"vectors_{generation}.npy")
+        # ids first: it is always written, so a missing generation fails here
+        index = {
+            "generation": generation,
+            "ids": np.load(os.path.join(user_dir, f"ids_{generation}.npy")),
+            "vectors": np.load(vectors_path, mmap_mode="r") if os.path.exists(vectors_path) else None,
+            "qvectors": None,
+            "scales": None,
+        }
+        if manifest.get("quantization") == "int8":
+            # The int8 block is small enough to keep resident
+            index["qvectors"] = np.load(os.path.join(user_dir, f"qvectors_{generation}.npy"))
+            index["scales"] = np.load(os.path.join(user_dir, f"scales_{generation}.npy"))
+        with open(os.path.join(user_dir, f"records_{generation}.json")) as f:
+            index["records"] = json.load(f)
+        return index
+
+    def _write(self, user_id: int, vectors, ids, records: List[dict]):
+        """Write a new generation of the user's index and swap the manifest (caller holds both locks)"""
+        user_dir = self._user_dir(user_id)
+        os.makedirs(user_dir, exist_ok=True)
+        # Numbered from disk, not from this process's cache, so writers never reuse a generation
+        manifest = self._read_manifest(user_dir)
+        generation = (manifest["generation"] if manifest else 0) + 1
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.quantization == "int8":
+            qvectors, scales = quantize_int8(vectors)
+            np.save(os.path.join(user_dir, f"qvectors_{generation}.npy"), qvectors)
+            np.save(os.path.join(user_dir, f"scales_{generation}.npy"), scales)
+        if self.quantization == "none" or self.rescore_candidates:
+            np.save(os.path.join(user_dir, f"vectors_{generation}.npy"), vectors)
+        np.save(os.path.join(user_dir, f"ids_{generation}.npy"), np.asarray(ids))
+        with open(os.path.join(user_dir, f"records_{generation}.json"), "w") as f:
+            json.dump(records, f)
+
+        manifest_tmp = os.path.join(user_dir, "manifest.json.tmp")
+        with open(manifest_tmp, "w") as f:
+            json.dump({"generation": generation, "count": len(ids), "quantization": self.quantization}, f)
+        os.replace(manifest_tmp, os.path.join(user_dir, "manifest.json"))
+
+        self._loaded.pop(user_id, None)
+        self._remove_old_generations(user_dir, generation)
+
+    def _remove_old_generations(self, user_dir: str, current: int):
+        # current - 1 stays: a reader in another process may have just read its manifest
+        for name in os.listdir(user_dir):
+            stem, _, suffix = name.rpartition(".")
+            generation = stem.rpartition("_")[2]
+            if suffix in ("npy", "json") and generation.isdigit() and int(generation) < current - 1:
+                try:
+                    os.remove(os.path.join(user_dir, name))
+                except OSError:
+                    # Still mapped by a reader on Windows; retried on the next write
+                    pass
+
+def quantize_int8(vectors):
+    """Symmetric per-row int8 quantization; returns (int8 matrix, float32 scales)"""
+    scales = np.abs(vectors).max(axis=1) / 127 if len(vectors) else np.zeros(0, dtype=np.float32)
+    scales = np.where(scales == 0, 1, scales).astype(np.float32)
+    qvectors = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return qvectors, scales
+
+def _int8_scores(qvectors, scales, query, chunk_rows: int = 4096):
+    """Dot products against an int8 matrix without materialising it as float32 all at once"""
+    scores = np.empty(len(qvectors), dtype=np.float32)
+    for start in range(0, len(qvectors), chunk_rows):
+        block = qvectors[start:start + chunk_rows].astype(np.float32)
+        scores[start:start + chunk_rows] = (block @ query) * scales[start:start + chunk_rows]
+    return scores
+
+def _full_precision(index: Dict):
+    """Float32 vectors for rewriting an index, dequantizing when no float file was kept"""
+    if index["vectors"] is not None:
+        return index["vectors"]
+    return index["qvectors"].astype(np.float32) * index["scales"][:, None]
+
+def _top_k(scores, k: int):
+    """Indices of the k highest scores, best first"""
+    # argpartition finds the top k in linear time, then only those k are sorted
+    if len(scores) > k:
+        top = np.argpartition(-scores, k)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top])]
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+def read_active_collection() -> Dict[str, str]:
+    """Collection and embedding model currently served to /chat"""
+    if os.path.exists(ACTIVE_COLLECTION_PATH):
+        with open(ACTIVE_COLLECTION_PATH) as f:
+            return json.load(f)
+    return {"collection": DEFAULT_COLLECTION, "model": DEFAULT_MODEL}
+
+def write_active_collection(collection_name: str, model_name: str):
+    """Atomically point running services at another collection"""
+    tmp_path = ACTIVE_COLLECTION_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"collection": collection_name, "model": model_name}, f)
+    os.replace(tmp_path, ACTIVE_COLLECTION_PATH)
+
+def _ack_path() -> str:
+    return os.path.join(COLLECTION_ACKS_DIR, f"{socket.gethostname()}-{os.getpid()}.json")
+
+def write_collection_ack(collection_name: str):
+    """Record that this process now serves collection_name (model loaded, store open)"""
+    os.makedirs(COLLECTION_ACKS_DIR, exist_ok=True)
+    path = _ack_path()
+    with open(path + ".tmp", "w") as f:
+        json.dump({
+            "collection": collection_name,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "at": time.time()
+        }, f)
+    os.replace(path + ".tmp", path)
+
+def remove_collection_ack(path: Optional[str] = None):
+    """Drop this process's ack (on shutdown), or the ack file at path"""
+    try:
+        os.remove(path or _ack_path())
+    except OSError:
+        pass
+
+def read_collection_acks() -> List[Dict]:
+    """Acks of live API processes; files left by dead processes on this host are removed"""
+    acks = []
+    if not os.path.isdir(COLLECTION_ACKS_DIR):
+        return acks
+    for name in os.listdir(COLLECTION_ACKS_DIR):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(COLLECTION_ACKS_DIR, name)
+        try:
+            with open(path) as f:
+                ack = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if ack["host"] == socket.gethostname() and not _pid_alive(ack["pid"]):
+            remove_collection_ack(path)
+            continue
+        acks.append(ack)
+    return acks
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def create_vector_store(collection_name: str = DEFAULT_COLLECTION) -> VectorStore:
+    """Build the backend selected by VECTOR_BACKEND (chroma or numpy)"""
+    backend = os.getenv("VECTOR_BACKEND", "chroma").lower()
+    if backend == "numpy":
+        return NumpyVectorStore(collection_name)
+    if backend == "chroma":
+        return ChromaVectorStore(collection_name)
+    raise ValueError(f"Unknown VECTOR_BACKEND: {backend}")